@@ -0,0 +1,169 @@
+import gc
+import hashlib
+import os
+import pickle
+import sys
+from SourceFile import add_source
+
+##############################################################################################################
+##                                AST CACHE
+##############################################################################################################
+
+# Scripts loaded with RUN keep their parsed AST in a cache file, much like Python's __pycache__. Every cache
+# file starts with a small header that is checked before the AST itself is unpickled:
+#   (interpreter version, mtime_ns, size, sha1 of the source, base offset the AST was parsed at)
+# The version and size have to match. If the mtime matches too the file is trusted, otherwise the source
+# hash decides, so a script that was only touched still hits (and its header is written again with the new mtime,
+# so the next load does not hash the source again).
+#
+# Unpickling runs whatever the file says, so a cache file is only read when it, and the folder it is in, belong
+# to the current user and nobody else can write to them. The cache is off unless LexPars.USE_AST_CACHE is set.
+
+CACHE_FOLDER = '__eccache__'
+# None keeps cache files in a __eccache__ folder next to each script, a path puts them all in that directory
+CACHE_DIR = None
+# Any change to these files (or to the Python version) makes every cache file stale
+INTERPRETER_FILES = ('LexPars.py', 'SourceFile.py', 'ASTCache.py')
+
+stats = {'hits': 0, 'misses': 0}
+version = None
+
+def interpreter_version():
+	global version
+	if version is None:
+		digest = hashlib.sha1(sys.version.encode())
+		folder = os.path.dirname(os.path.abspath(__file__))
+		for name in INTERPRETER_FILES:
+			with open(os.path.join(folder, name), 'rb') as f:
+				digest.update(f.read())
+		version = digest.hexdigest()
+	return version
+
+def source_hash(text):
+	if isinstance(text, str): text = text.encode('utf-8')
+	return hashlib.sha1(text).hexdigest()
+
+def source_size(text):
+	# The size of the file text was read from, which counts bytes and not characters
+	return len(text.encode('utf-8')) if isinstance(text, str) else len(text)
+
+def cache_path(fn):
+	fn = os.path.abspath(fn)
+	name = os.path.basename(fn) + '.ecc'
+	if CACHE_DIR is None:
+		return os.path.join(os.path.dirname(fn), CACHE_FOLDER, name)
+	# One shared folder, so the full path goes into the name to keep scripts with the same name apart
+	return os.path.join(CACHE_DIR, hashlib.sha1(fn.encode()).hexdigest()[:16] + '-' + name)
+
+def trusted(path, fd):
+	# Whether the open cache file fd at path, and its folder, are the current user's and only theirs to write
+	if not hasattr(os, 'getuid'): return True
+	for stat in (os.fstat(fd), os.stat(os.path.dirname(path))):
+		if stat.st_uid != os.getuid() or stat.st_mode & 0o022: return False
+	return True
+
+def hit_rate():
+	total = stats['hits'] + stats['misses']
+	return stats['hits'] / total if total else 0.0
+
+
+def load(fn, text):
+	# The cached AST of fn, or None (a miss) when there is no usable cache file
+	touched = False
+	try:
+		stat = os.stat(fn)
+		path = cache_path(fn)
+		with open(path, 'rb') as f:
+			if not trusted(path, f.fileno()): raise PermissionError(path)
+			cached_version, mtime_ns, size, digest, base = pickle.load(f)
+			valid = cached_version == interpreter_version() and size == stat.st_size == source_size(text)
+			if valid and mtime_ns != stat.st_mtime_ns: valid = touched = digest == source_hash(text)
+			node = load_node(f) if valid else None
+	except Exception:
+		# A missing, unreadable or corrupt cache file only means the script gets parsed again
+		node = None
+
+	if node is None:
+		stats['misses'] += 1
+		return None
+
+	# Offsets in the AST belong to the address space of the run that parsed it. A script that is not registered
+	# yet takes its old base if that is still free, and otherwise the whole tree is moved to the new one.
+	delta = add_source(fn, text, base).base - base
+	if delta: shift_positions(node, delta)
+	if touched: store(fn, text, node)
+	stats['hits'] += 1
+	return node
+
+def load_node(f):
+	# Unpickling allocates every node at once, which would otherwise set off one GC pass after another
+	enabled = gc.isenabled()
+	gc.disable()
+	try:
+		return pickle.load(f)
+	finally:
+		if enabled: gc.enable()
+
+def store(fn, text, node):
+	path = cache_path(fn)
+	temp_path = f'{path}.{os.getpid()}.tmp'
+	try:
+		stat = os.stat(fn)
+		header = (interpreter_version(), stat.st_mtime_ns, stat.st_size, source_hash(text), add_source(fn, text).base)
+		os.makedirs(os.path.dirname(path), 0o700, exist_ok=True)
+		# Only the current user may write it, or load would not trust it
+		with os.fdopen(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+			pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+			pickle.dump(node, f, pickle.HIGHEST_PROTOCOL)
+		# Written aside and renamed, so a reader never sees half a cache file
+		os.replace(temp_path, path)
+	except Exception:
+		# Read-only folders or ASTs too deep to pickle just go uncached
+		if os.path.exists(temp_path): os.remove(temp_path)
+
+
+position_plans = {}
+
+def position_plan(cls):
+	# (position attributes, other attributes) of a node or token class, worked out once per class
+	plan = position_plans.get(cls)
+	if plan is None:
+		names = []
+		for klass in cls.__mro__:
+			names.extend(getattr(klass, '__slots__', ()))
+		plan = position_plans[cls] = ([name for name in names if name in ('pos_start', 'pos_end')],
+			[name for name in names if name not in ('pos_start', 'pos_end')])
+	return plan
+
+def shift_positions(node, delta):
+	# Moves every pos_start/pos_end in the tree (nodes and the tokens they keep) by delta, without recursion
+	seen = set()
+	pending = [node]
+	while pending:
+		obj = pending.pop()
+		if obj is None or isinstance(obj, (str, int, float)): continue
+		if isinstance(obj, (list, tuple)):
+			pending.extend(obj)
+			continue
+		if id(obj) in seen: continue
+		seen.add(id(obj))
+		# Encodings that keep their positions in arrays (FlatAST) move them themselves
+		shift = getattr(obj, 'shift_positions', None)
+		if shift is not None:
+			shift(delta)
+			continue
+
+		attributes = getattr(obj, '__dict__', None)
+		if attributes is not None:
+			for name, value in attributes.items():
+				if name == 'pos_start' or name == 'pos_end':
+					if value is not None: attributes[name] = value + delta
+				else:
+					pending.append(value)
+
+		position_names, other_names = position_plan(type(obj))
+		for name in position_names:
+			value = getattr(obj, name, None)
+			if value is not None: setattr(obj, name, value + delta)
+		for name in other_names:
+			pending.append(getattr(obj, name, None))
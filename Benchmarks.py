@@ -0,0 +1,385 @@
+#Benchmarks for EasyCode
+#Run with: python Benchmarks.py [name ...]   (no names runs every benchmark)
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import LexPars
+
+
+##############################################################################################################
+##                                  HELPERS
+##############################################################################################################
+
+#A chunk of code that uses every kind of token, repeated to build large generated scripts.
+SAMPLE_CODE = '''# Generated sample
+VAR total = 0
+FUN mult(a, b) -> a * b
+FOR i = 0 TO 100 STEP 2 THEN
+    VAR total = total + mult(i, 3.5) ^ 2
+    IF total >= 1000 AND NOT i == 4 THEN PRINT("big total") ELIF i != 7 THEN CONTINUE ELSE BREAK
+END
+VAR list = [1, 2, 3] + total; PRINT(LEN(list) - 1 / 2)
+WHILE total > 0 THEN VAR total = total - 1; RETURN total
+'''
+
+def make_source(size):
+    copies = size // len(SAMPLE_CODE) + 1
+    return SAMPLE_CODE * copies
+
+def best_time(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best: best = elapsed
+    return best
+
+def measure_memory(func, peak=False):
+    tracemalloc.start()
+    try:
+        result = func()
+        size, peak_size = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak_size if peak else size
+
+def report(name, value, unit):
+    print(f'  {name:<28} {value:>12.2f} {unit}')
+
+
+##############################################################################################################
+##                                  BENCHMARKS
+##############################################################################################################
+
+def bench_lexer(size=1_000_000):
+    text = make_source(size)
+    megabytes = len(text) / 1_000_000
+    print(f'Lexer throughput ({megabytes:.2f} MB of source)')
+    for name, lexer_class in LexPars.LEXERS.items():
+        elapsed = best_time(lambda: lexer_class('<bench>', text).make_tokens())
+        report(name, megabytes / elapsed, 'MB/s')
+
+def bench_token_memory(size=200_000):
+    text = make_source(size)
+    print('Memory kept alive by the token list')
+    for name, lexer_class in LexPars.LEXERS.items():
+        (tokens, _), size = measure_memory(lambda: lexer_class('<bench>', text).make_tokens())
+        report(name, size / len(tokens), 'bytes/token')
+
+def parse_list(fn, text):
+    tokens, _ = LexPars.RegexLexer(fn, text).make_tokens()
+    return LexPars.Parser(tokens).parse()
+
+def parse_stream(fn, text):
+    return LexPars.parse_stream(fn, text)
+
+def bench_stream_memory(sizes=(500_000, 2_000_000)):
+    print('Peak Python memory while parsing a script file (mapped, so the text itself is not counted)')
+    for size in sizes:
+        with tempfile.NamedTemporaryFile('w', suffix='.ec', delete=False) as f:
+            f.write(make_source(size))
+        try:
+            text = LexPars.map_file(f.name)
+            for name, parse in (('token list', parse_list), ('token stream', parse_stream)):
+                _, peak = measure_memory(lambda: parse(f.name, text), peak=True)
+                report(f'{name} {len(text) / 1_000_000:.0f} MB', peak / 1_000_000, 'MB')
+        finally:
+            os.remove(f.name)
+
+def advance_all(parser):
+    last = parser.token_count - 1 if isinstance(parser, LexPars.BufferParser) else len(parser.tokens) - 1
+    while parser.tok_idx < last:
+        parser.advance()
+
+def bench_token_store(size=500_000):
+    text = make_source(size)
+    stores = (
+        ('list', lambda: LexPars.RegexLexer('<bench>', text).make_tokens()[0], LexPars.Parser),
+        ('buffer', lambda: LexPars.RegexLexer('<bench>', text).make_buffer()[0], LexPars.BufferParser),
+    )
+    # The buffer is there to save memory (see TOKEN BUFFER), the speed lines show what that costs
+    print('Token list vs struct-of-arrays token buffer')
+    for name, make_store, parser_class in stores:
+        tokens, size = measure_memory(make_store)
+        count = len(tokens)
+        report(f'{name} memory', size / count, 'bytes/token')
+        elapsed = best_time(lambda: advance_all(parser_class(tokens)))
+        report(f'{name} Parser.advance', count / elapsed / 1_000_000, 'M tokens/s')
+        elapsed = best_time(lambda: parser_class(make_store()).parse())
+        report(f'{name} lex + parse', count / elapsed / 1_000, 'K tokens/s')
+        del tokens
+
+def make_block(statements):
+    body = ''.join(f'    VAR x{i} = x{i} + {i} * 2\n    IF x{i} > 3 THEN PRINT(x{i}) ELSE CONTINUE\n' for i in range(statements // 2))
+    return f'FUN block(a)\n{body}END\n'
+
+def bench_parse_blocks(sizes=(500, 1000, 2000, 4000, 8000)):
+    print('Parse time of one FUN body by number of statements (flat time per statement = linear)')
+    for size in sizes:
+        tokens, _ = LexPars.RegexLexer('<bench>', make_block(size)).make_tokens()
+        elapsed = best_time(lambda: LexPars.Parser(tokens).parse())
+        report(f'{size} statements', elapsed * 1_000_000 / size, 'us/statement')
+
+#Expression-only lines, so the time goes to operator precedence parsing
+EXPR_CODE = 'VAR x = -a + b * c ^ 2 ^ d / (e - 1) >= f(g, 3) AND NOT h == [1, 2] OR i < j * -k\n'
+
+def nesting_limit(wrap, limit=20_000):
+    #Deepest nesting that still parses before Python's recursion limit is hit
+    low, high = 0, limit
+    while low < high:
+        depth = (low + high + 1) // 2
+        tokens, _ = LexPars.RegexLexer('<bench>', wrap(depth)).make_tokens()
+        try:
+            LexPars.Parser(tokens).parse()
+            low = depth
+        except RecursionError:
+            high = depth - 1
+    return low
+
+def bench_parse_exprs(size=300_000):
+    text = EXPR_CODE * (size // len(EXPR_CODE) + 1)
+    tokens, _ = LexPars.RegexLexer('<bench>', text).make_tokens()
+    elapsed = best_time(lambda: LexPars.Parser(tokens).parse())
+    print('Expression parsing')
+    report('parse', len(tokens) / elapsed / 1_000, 'K tokens/s')
+    report('nested parentheses', nesting_limit(lambda depth: '(' * depth + '1' + ')' * depth), 'levels')
+    report('nested unary minus', nesting_limit(lambda depth: '-' * depth + '1'), 'levels')
+
+def bench_ast_memory(size=300_000):
+    text = make_source(size)
+    parse_list('<bench>', text)
+    tree, tree_size = measure_memory(lambda: parse_list('<bench>', text).node)
+    flat, flat_size = measure_memory(lambda: LexPars.FlatAST.from_tree(tree))
+    print(f'Memory kept alive by the AST ({len(flat)} nodes, counting the tokens they keep)')
+    report('tree', tree_size / len(flat), 'bytes/node')
+    report('flat', flat_size / len(flat), 'bytes/node')
+
+def bench_ast_cache(size=500_000):
+    print('Getting the AST of a RUN script: parsing vs loading its cache file')
+    with tempfile.TemporaryDirectory() as folder:
+        fn = os.path.join(folder, 'bench.ec')
+        with open(fn, 'w') as f:
+            f.write(make_source(size))
+        text = LexPars.map_file(fn)
+        node, _ = LexPars.parse_source(fn, text)
+        LexPars.ASTCache.store(fn, text, node)
+        parse_time = best_time(lambda: LexPars.parse_source(fn, text))
+        load_time = best_time(lambda: LexPars.ASTCache.load(fn, text))
+        #Paid on top of the load when another source already sits at the base the AST was parsed at
+        rebase_time = best_time(lambda: LexPars.ASTCache.shift_positions(node, 0))
+    report('parse', parse_time * 1_000, 'ms')
+    report('cache load', load_time * 1_000, 'ms')
+    report('rebase positions', rebase_time * 1_000, 'ms')
+    report('speedup', parse_time / load_time, 'x')
+
+#Small programs that spend their time in the engine rather than the parser
+ENGINE_WORKLOADS = {
+    'for loop': 'VAR total = 0\nFOR i = 0 TO 30000 THEN\n    VAR total = total + i * 2\nEND',
+    'while loop': 'VAR i = 0\nWHILE i < 20000 THEN\n    VAR i = i + 1\n    IF i / 2 > 10 THEN CONTINUE\nEND',
+    'recursion': 'FUN fib(n) -> IF n < 2 THEN n ELSE fib(n - 1) + fib(n - 2)\nfib(18)',
+    'deep recursion': 'VAR step = 1\nFUN down(n) -> IF n == 0 THEN 0 ELSE down(n - step) + step\nFOR i = 0 TO 300 THEN down(60)',
+    'calls in a loop': 'FUN add(a, b) -> a + b\nVAR total = 0\nFOR i = 0 TO 20000 THEN VAR total = add(total, i)',
+    'lists': 'VAR items = [0]\nFOR i = 0 TO 2000 THEN\n    VAR items = items + i\nEND\nFOR i = 0 TO 2000 THEN items / i',
+    'constants': 'VAR total = 0\nFOR i = 0 TO 20000 THEN\n    VAR total = total + 60 * 60 * 24\n    IF 1 == 1 THEN VAR total = total - 1 ELSE PRINT(total)\nEND',
+    'arrow calls': 'FUN mult(a, b) -> a * b\nVAR total = 0\nFOR i = 0 TO 150 THEN\n    FOR j = 0 TO 150 THEN VAR total = total + mult(i, j)\nEND',
+    'loop invariants': 'VAR a = 3\nVAR total = 0\nFOR i = 0 TO 20000 THEN\n    VAR total = total + (a ^ 2 + a * 4 - 1) * i\n    IF a * 2 > 5 THEN VAR total = total - 1\nEND',
+    'induction variables': 'VAR n = 7\nVAR total = 0\nFOR i = 0 TO 20000 THEN\n    VAR total = total + i * n - i * 3\nEND',
+    'arithmetic': 'VAR total = 0\nFOR i = 1 TO 20000 THEN\n    VAR total = total + (i * i - 3 * i + 7) / (i + 1)\n    IF total > 100000 THEN VAR total = total - 100000\nEND',
+}
+
+def bench_engines(engines=None, repeat=3):
+    engines = engines or list(LexPars.ENGINES)
+    print('Run time of each engine (lex and parse excluded)')
+    for name, code in ENGINE_WORKLOADS.items():
+        node, _ = LexPars.parse_source('<bench>', code)
+        times = {}
+        for engine in engines:
+            times[engine] = best_time(lambda: LexPars.ENGINES[engine](node), repeat)
+            report(f'{name} ({engine})', times[engine] * 1_000, 'ms')
+        for engine in engines[1:]:
+            report(f'{name} {engine} speedup', times[engines[0]] / times[engine], 'x')
+
+def bench_optimizer(engines=None):
+    engines = engines or list(LexPars.ENGINES)
+    print('Run time with and without the AST optimizer')
+    for name, code in ENGINE_WORKLOADS.items():
+        plain, _ = LexPars.parse_source('<bench>', code, optimize=False)
+        optimized, _ = LexPars.parse_source('<bench>', code, optimize=True)
+        for engine in engines:
+            plain_time = best_time(lambda: LexPars.ENGINES[engine](plain))
+            optimized_time = best_time(lambda: LexPars.ENGINES[engine](optimized))
+            report(f'{name} ({engine}) speedup', plain_time / optimized_time, 'x')
+
+def bench_tiers():
+    print('Tree interpreter with and without tiered execution')
+    for name, code in ENGINE_WORKLOADS.items():
+        node, _ = LexPars.parse_source('<bench>', code)
+        times = {}
+        for tiered in (False, True):
+            LexPars.TIERED_EXECUTION = tiered
+            times[tiered] = best_time(lambda: LexPars.interpret(node))
+        LexPars.TIERED_EXECUTION = True
+        report(f'{name} speedup', times[False] / times[True], 'x')
+    for profile in LexPars.tier_stats():
+        print(f'  {profile}')
+
+def bench_numbers(engines=None):
+    engines = engines or list(LexPars.ENGINES)
+    print('Run time with and without number specialization')
+    for name, code in ENGINE_WORKLOADS.items():
+        nodes = {}
+        for specialize in (False, True):
+            LexPars.SPECIALIZE_NUMBERS = specialize
+            nodes[specialize], _ = LexPars.parse_source('<bench>', code)
+        LexPars.SPECIALIZE_NUMBERS = True
+        for engine in engines:
+            plain_time = best_time(lambda: LexPars.ENGINES[engine](nodes[False]))
+            specialized_time = best_time(lambda: LexPars.ENGINES[engine](nodes[True]))
+            report(f'{name} ({engine}) speedup', plain_time / specialized_time, 'x')
+
+def count_calls(owner, name, counts, key):
+    #Wraps owner.name to count its calls in counts[key], gives back the original to put back
+    original = owner.__dict__[name]
+    def counted(*args):
+        counts[key] += 1
+        return original(*args)
+    setattr(owner, name, counted)
+    return original
+
+def bench_raising():
+    print('RTResults made per node visited, and run time, with results or exceptions for control flow')
+    #Tiered execution would compile the hot functions away from both walks
+    LexPars.TIERED_EXECUTION = False
+    for name, code in ENGINE_WORKLOADS.items():
+        node, _ = LexPars.parse_source('<bench>', code)
+        for engine, interpreter_class in (('tree', LexPars.Interpreter), ('raising', LexPars.RaisingInterpreter)):
+            counts = {'visits': 0, 'results': 0}
+            visit = count_calls(interpreter_class, 'visit', counts, 'visits')
+            init = count_calls(LexPars.RTResult, '__init__', counts, 'results')
+            try:
+                LexPars.ENGINES[engine](node)
+            finally:
+                interpreter_class.visit = visit
+                LexPars.RTResult.__init__ = init
+            report(f'{name} ({engine}) RTResults', counts['results'] / counts['visits'], 'per visit')
+            report(f'{name} ({engine}) time', best_time(lambda: LexPars.ENGINES[engine](node)) * 1_000, 'ms')
+    LexPars.TIERED_EXECUTION = True
+
+def bench_call_depth(depths=(1_000, 10_000, 50_000)):
+    print('Recursion in the VM, which keeps its call frames on the heap')
+    for depth in depths:
+        node, _ = LexPars.parse_source('<bench>', f'FUN down(n) -> IF n == 0 THEN 0 ELSE down(n - 1) + 1\ndown({depth})')
+        _, peak = measure_memory(lambda: LexPars.run_bytecode(node), peak=True)
+        report(f'{depth} calls time', best_time(lambda: LexPars.run_bytecode(node), 1) * 1_000, 'ms')
+        report(f'{depth} calls memory', peak / depth, 'bytes/frame')
+
+def bench_values(count=100_000, iterations=1_000):
+    print('Memory per Number, and Values made per loop iteration')
+    numbers, size = measure_memory(lambda: [LexPars.Number(i + 0.5) for i in range(count)])
+    report('Number memory', size / count - sys.getsizeof(numbers) / count, 'bytes/Number')
+    #The tree interpreter, without tiered execution, builds every Value with one of these
+    LexPars.TIERED_EXECUTION = False
+    node, _ = LexPars.parse_source('<bench>', f'VAR total = 0\nFOR i = 0 TO {iterations} THEN VAR total = total + i * 2')
+    counts = {'values': 0}
+    originals = [(owner, name, count_calls(owner, name, counts, 'values'))
+                 for owner, name in ((LexPars.Number, '__init__'), (LexPars.String, '__init__'), (LexPars.List, '__init__'), (LexPars, 'new_number'))]
+    try:
+        LexPars.interpret(node)
+    finally:
+        for owner, name, original in originals: setattr(owner, name, original)
+    LexPars.TIERED_EXECUTION = True
+    report('Values made', counts['values'] / iterations, 'per iteration')
+
+def bench_tail_calls(depths=(1_000, 10_000, 100_000)):
+    print('Tail recursion in the tree interpreter, which reuses one Python frame per call chain')
+    for depth in depths:
+        node, _ = LexPars.parse_source('<bench>', f'FUN count(n, total) -> IF n == 0 THEN total ELSE count(n - 1, total + n)\ncount({depth}, 0)')
+        _, peak = measure_memory(lambda: LexPars.interpret(node), peak=True)
+        report(f'{depth} calls time', best_time(lambda: LexPars.interpret(node), 1) * 1_000, 'ms')
+        report(f'{depth} calls memory', peak / depth, 'bytes/call')
+
+def bench_copies(engines=None, iterations=2_000):
+    print('Value copies per loop iteration that reads variables and passes a list through a call')
+    source = (f'VAR items = [1, 2, 3]\nFUN pick(xs) -> xs\nVAR total = 0\n'
+              f'FOR i = 0 TO {iterations} THEN\n    VAR got = pick(items)\n    VAR total = total + i\nEND')
+    #Only the copy of the called function should be left, that one carries the call's position
+    for engine in engines or LexPars.ENGINES:
+        counts = {'copies': 0}
+        originals = [(owner, 'copy', count_calls(owner, 'copy', counts, 'copies'))
+                     for owner in (LexPars.Number, LexPars.String, LexPars.List)]
+        try:
+            _, error = LexPars.run('<bench>', source, engine=engine)
+        finally:
+            for owner, name, original in originals: setattr(owner, name, original)
+        if error: raise RuntimeError(error.as_string())
+        report(f'{engine} copies', counts['copies'] / iterations, 'per iteration')
+
+def bench_lists(sizes=(10_000, 100_000, 1_000_000)):
+    print('Building a list one element at a time, with `+` (a new List each time) and with APPEND (in place)')
+    for size in sizes:
+        for name, step in (('plus', 'VAR items = items + i'), ('append', 'APPEND(items, i)')):
+            node, _ = LexPars.parse_source('<bench>', f'VAR items = [0]\nFOR i = 0 TO {size} THEN {step}\nLEN(items)')
+            report(f'{size} {name} time', best_time(lambda: LexPars.run_closures(node), 1) * 1_000, 'ms')
+
+def bench_arrays(size=1_000_000):
+    print(f'Summing and scaling {size} numbers, with a FOR loop over a List and with an Array')
+    _, error = LexPars.run('<bench>', f'VAR items = FOR i = 0 TO {size} THEN i\nVAR numbers = ARRAY(items)')
+    if error: raise RuntimeError(error.as_string())
+    workloads = {
+        'sum list': f'VAR total = 0\nFOR i = 0 TO {size} THEN VAR total = total + items / i',
+        'sum array': 'SUM(numbers)',
+        'scale list': f'FOR i = 0 TO {size} THEN (items / i) * 2',
+        'scale array': 'numbers * 2',
+    }
+    for name, code in workloads.items():
+        node, _ = LexPars.parse_source('<bench>', code)
+        report(f'{name} time', best_time(lambda: LexPars.run_closures(node), 1) * 1_000, 'ms')
+    print(f'  (NumPy {"is" if LexPars.NumericArray.numpy else "is not"} installed)')
+
+def bench_strings(sizes=(10_000, 100_000, 1_000_000), flat_limit=100_000):
+    print('Building a string from 10-character appends, as one str and as a rope, then printing it to a str')
+    rope_min = LexPars.Rope.MIN_LENGTH
+    for size in sizes:
+        node, _ = LexPars.parse_source('<bench>', f'VAR text = ""\nFOR i = 0 TO {size} THEN\n    VAR text = text + "0123456789"\nEND\nPRINT_RET(text)')
+        #A MIN_LENGTH no String reaches keeps every one a str, which the appends copy each time
+        for name, min_length in (('str', float('inf')), ('rope', rope_min)):
+            if name == 'str' and size > flat_limit: continue
+            LexPars.Rope.MIN_LENGTH = min_length
+            try:
+                report(f'{size * 10 / 1_000_000:g} MB {name} time', best_time(lambda: LexPars.run_closures(node), 1) * 1_000, 'ms')
+            finally:
+                LexPars.Rope.MIN_LENGTH = rope_min
+
+
+BENCHMARKS = {
+    'lexer': bench_lexer,
+    'token_memory': bench_token_memory,
+    'stream_memory': bench_stream_memory,
+    'token_store': bench_token_store,
+    'parse_blocks': bench_parse_blocks,
+    'parse_exprs': bench_parse_exprs,
+    'ast_memory': bench_ast_memory,
+    'ast_cache': bench_ast_cache,
+    'engines': bench_engines,
+    'optimizer': bench_optimizer,
+    'tiers': bench_tiers,
+    'numbers': bench_numbers,
+    'raising': bench_raising,
+    'call_depth': bench_call_depth,
+    'tail_calls': bench_tail_calls,
+    'values': bench_values,
+    'copies': bench_copies,
+    'lists': bench_lists,
+    'arrays': bench_arrays,
+    'strings': bench_strings,
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
+        print()
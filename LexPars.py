@@ -7,7 +7,16 @@ import sys
 from typing import Text
 from arrows import *
 import string
+import re
+import operator
+import weakref
+from array import array
 from SymbolTable import *
+from PersistentVector import Vector, TransientVector
+import NumericArray
+import Rope
+import ASTCache
+from SourceFile import *
 sys.path.insert(0, "../..")
 import os
 import math
@@ -98,9 +107,11 @@ class Error:
         self.details = details
     
     def as_string(self):
+        source = find_source(self.pos_start)
+        ln, _ = source.line_col(self.pos_start)
         errorLog  = f'{self.error_name}: {self.details}\n'
-        errorLog += f'File {self.pos_start.fn}, line {self.pos_start.ln + 1}'
-        errorLog += '\n\n' + string_with_arrows(self.pos_start.ftxt, self.pos_start, self.pos_end)
+        errorLog += f'File {source.fn}, line {ln + 1}'
+        errorLog += '\n\n' + string_with_arrows(source, self.pos_start, self.pos_end)
         return errorLog
 
 class IllegalCharError(Error):
@@ -123,82 +134,171 @@ class RTError(Error):
     def as_string(self):
         errorLog  = self.generate_traceback()
         errorLog += f'{self.error_name}: {self.details}'
-        errorLog += '\n\n' + string_with_arrows(self.pos_start.ftxt, self.pos_start, self.pos_end)
+        errorLog += '\n\n' + string_with_arrows(find_source(self.pos_start), self.pos_start, self.pos_end)
         return errorLog
 
     def generate_traceback(self):
-        errorLog = ''
+        # Innermost context first, joined the other way round once (a deep recursion has a line per call)
+        lines = []
         pos = self.pos_start
         ctx = self.context
 
         while ctx:
-            errorLog = f'  File {pos.fn}, line {str(pos.ln + 1)}, in {ctx.display_name}\n' + errorLog
+            source = find_source(pos)
+            ln, _ = source.line_col(pos)
+            lines.append(f'  File {source.fn}, line {str(ln + 1)}, in {ctx.display_name}\n')
+            if ctx.elided: lines.append(f'  [{ctx.elided} tail call frame{"s" if ctx.elided > 1 else ""} elided]\n')
             pos = ctx.parent_entry_pos
             ctx = ctx.parent
 
-        return 'Traceback (most recent call last):\n' + errorLog
-
-
-# POSITION
-class Position:
-    def __init__(self, idx, ln, col, fn, ftxt):
-        self.idx = idx
-        self.ln = ln
-        self.col = col
-        self.fn = fn
-        self.ftxt = ftxt
-
-    def advance(self, current_char=None):
-        self.idx += 1
-        self.col += 1
-
-        if current_char == '\n':
-            self.ln += 1
-            self.col = 0
-
-        return self
-
-    def copy(self):
-        return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
+        return 'Traceback (most recent call last):\n' + ''.join(reversed(lines))
 
 
 #TOKEN CLASS to generate tokens
+#Positions are integer offsets (see SourceFile.py), a token without an explicit end covers one character.
 class Token:
+    __slots__ = ('type', 'value', 'pos_start', 'pos_end')
+
     def __init__(self, type_, value=None, pos_start=None, pos_end=None):
         self.type = type_
         self.value = value
 
-        if pos_start:
-            self.pos_start = pos_start.copy()
-            self.pos_end = pos_start.copy()
-            self.pos_end.advance()
+        if pos_start is not None:
+            self.pos_start = pos_start
+            self.pos_end = pos_start + 1
 
-        if pos_end:
-            self.pos_end = pos_end.copy()
+        if pos_end is not None:
+            self.pos_end = pos_end
 
     def matches(self, type_, value):
         return self.type == type_ and self.value == value
+
+    #Tokens never change, only a TokenCursor needs copying before the parser keeps it
+    def snapshot(self):
+        return self
     
     def __repr__(self):
         if self.value: return f'{self.type}:{self.value}'
         return f'{self.type}'
 
 
+# TOKEN BUFFER
+# Struct-of-arrays token store: one small type code, the start and end offsets and an index into a table of
+# interned values per token, instead of one Token object each. BufferParser reads it through a TokenCursor,
+# and indexing it still gives back a Token for anything else that wants one.
+#
+# It is a memory optimization, not a speed one: a token takes about 21 bytes instead of about 156, but reading
+# the columns costs more than indexing a list, so parsing from it is slower. That is why it is only used with
+# token_store='buffer', for texts whose token list would not fit, and DEFAULT_TOKEN_STORE stays 'list'.
+TOKEN_TYPES = [
+    TT_INT, TT_FLOAT, TT_PLUS, TT_MINUS, TT_MUL, TT_DIV, TT_LPAREN, TT_RPAREN, TT_EOF, TT_EXPONENT,
+    TT_ID, TT_KEYWORD, TT_EQ, TT_EXACT, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE, TT_COMMA, TT_ARROW,
+    TT_STRING, TT_LSQUARE, TT_RSQUARE, TT_NEWLINE,
+]
+TOKEN_TYPE_CODES = {type_: code for code, type_ in enumerate(TOKEN_TYPES)}
+
+class TokenBuffer:
+    def __init__(self):
+        self.types = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.value_ids = array('I')
+        # Value 0 is None, every other value is stored once per token type so 1 and 1.0 stay apart
+        self.values = [None]
+        self.value_lookup = {code: {} for code in range(len(TOKEN_TYPES))}
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        buffer = cls()
+        for tok in tokens:
+            buffer.append(tok.type, tok.value, tok.pos_start, tok.pos_end)
+        return buffer
+
+    def append(self, type_, value, pos_start, pos_end):
+        code = TOKEN_TYPE_CODES[type_]
+        if value is None:
+            value_id = 0
+        else:
+            lookup = self.value_lookup[code]
+            value_id = lookup.get(value)
+            if value_id is None:
+                value_id = lookup[value] = len(self.values)
+                self.values.append(value)
+        self.types.append(code)
+        self.starts.append(pos_start)
+        self.ends.append(pos_end)
+        self.value_ids.append(value_id)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, idx):
+        return Token(TOKEN_TYPES[self.types[idx]], self.values[self.value_ids[idx]], self.starts[idx], self.ends[idx])
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in (self.types, self.starts, self.ends, self.value_ids))
+
+
+# The token under a BufferParser's tok_idx. An advance only moves idx and reads the type, which the parser looks
+# at all the time; the value and offsets are read from their columns when asked for
+class TokenCursor:
+    __slots__ = ('type', 'idx', 'buffer')
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.type = None
+        self.idx = -1
+
+    @property
+    def value(self):
+        return self.buffer.values[self.buffer.value_ids[self.idx]]
+
+    @property
+    def pos_start(self):
+        return self.buffer.starts[self.idx]
+
+    @property
+    def pos_end(self):
+        return self.buffer.ends[self.idx]
+
+    def matches(self, type_, value):
+        return self.type == type_ and self.buffer.values[self.buffer.value_ids[self.idx]] == value
+
+    def snapshot(self):
+        return Token(self.type, self.value, self.pos_start, self.pos_end)
+
+    def __repr__(self):
+        return repr(self.snapshot())
+
+
 # LEXER CODE
 class Lexer:
     def __init__(self, fn, text):
         self.fn = fn
         self.text = text
-        self.pos = Position(-1, 0, -1, fn, text)
+        self.source = add_source(fn, text)
+        self.pos = self.source.base - 1
         self.current_char = None
         self.advance()
     
     def advance(self):
-        self.pos.advance(self.current_char)
-        self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
+        self.pos += 1
+        idx = self.pos - self.source.base
+        self.current_char = self.text[idx] if idx < len(self.text) else None
 
     def make_tokens(self):
-        tokens = []
+        tokens = list(self.iter_tokens())
+        if self.error: return [], self.error
+        return tokens, None
+
+    def make_buffer(self):
+        tokens = TokenBuffer.from_tokens(self.iter_tokens())
+        if self.error: return None, self.error
+        return tokens, None
+
+    #Yields the tokens one at a time, on an error it records it in self.error and finishes with EOF.
+    def iter_tokens(self):
+        self.error = None
 
         while self.current_char != None:
 
@@ -206,88 +306,92 @@ class Lexer:
                 self.advance()
 
             elif self.current_char in DIGITS:
-                tokens.append(self.make_num())
+                yield self.make_num()
 
             elif self.current_char in LETTERS:
-                tokens.append(self.make_id())
+                yield self.make_id()
 
             elif self.current_char == '#':
                 self.skip_comment()
 
             elif self.current_char in ';\n':
-                tokens.append(Token(TT_NEWLINE, pos_start=self.pos))
+                yield Token(TT_NEWLINE, pos_start=self.pos)
                 self.advance()
 
             elif self.current_char == '+':
-                tokens.append(Token(TT_PLUS, pos_start=self.pos))
+                yield Token(TT_PLUS, pos_start=self.pos)
                 self.advance()
 
             elif self.current_char == '-':
-                tokens.append(self.make_minus_or_arrow())
+                yield self.make_minus_or_arrow()
 
             elif self.current_char == '*':
-                tokens.append(Token(TT_MUL, pos_start=self.pos))
+                yield Token(TT_MUL, pos_start=self.pos)
                 self.advance()
 
             elif self.current_char == '/':
-                tokens.append(Token(TT_DIV, pos_start=self.pos))
+                yield Token(TT_DIV, pos_start=self.pos)
                 self.advance()
 
             elif self.current_char == '^':
-                tokens.append(Token(TT_EXPONENT, pos_start=self.pos))
+                yield Token(TT_EXPONENT, pos_start=self.pos)
                 self.advance()
 
             elif self.current_char == '(':
-                tokens.append(Token(TT_LPAREN, pos_start=self.pos))
+                yield Token(TT_LPAREN, pos_start=self.pos)
                 self.advance()
 
             elif self.current_char == ')':
-                tokens.append(Token(TT_RPAREN, pos_start=self.pos))
+                yield Token(TT_RPAREN, pos_start=self.pos)
                 self.advance()
 
             elif self.current_char == '!':
                 token, error = self.make_notEquals()
-                if error: return [], error
-                tokens.append(token)
+                if error:
+                    self.error = error
+                    yield Token(TT_EOF, pos_start=self.pos)
+                    return
+                yield token
 
             elif self.current_char == '=':
-                tokens.append(self.make_equals())
+                yield self.make_equals()
 
             elif self.current_char == '<':
-                tokens.append(self.make_lessThan())
+                yield self.make_lessThan()
 
             elif self.current_char == '>':
-                tokens.append(self.make_greaterThan())
+                yield self.make_greaterThan()
 
             elif self.current_char == ',':
-                tokens.append(Token(TT_COMMA, pos_start=self.pos))
+                yield Token(TT_COMMA, pos_start=self.pos)
                 self.advance()
             
             elif self.current_char == '"':
-                tokens.append(self.make_string())
+                yield self.make_string()
             
             elif self.current_char == '[':
-                tokens.append(Token(TT_LSQUARE, pos_start=self.pos))
+                yield Token(TT_LSQUARE, pos_start=self.pos)
                 self.advance()
 
             elif self.current_char == ']':
-                tokens.append(Token(TT_RSQUARE, pos_start=self.pos))
+                yield Token(TT_RSQUARE, pos_start=self.pos)
                 self.advance()
 
             else:
-                pos_start = self.pos.copy()
+                pos_start = self.pos
                 char = self.current_char
                 self.advance()
-                return [], IllegalCharError(pos_start, self.pos, "'" + char + "'")
+                self.error = IllegalCharError(pos_start, self.pos, "'" + char + "'")
+                yield Token(TT_EOF, pos_start=self.pos)
+                return
 
-        tokens.append(Token(TT_EOF, pos_start=self.pos))
-        return tokens, None
+        yield Token(TT_EOF, pos_start=self.pos)
 
 
     def make_num(self):
         num_str = ''
         dot_count = 0
-        pos_start = self.pos.copy()
+        pos_start = self.pos
         while self.current_char != None and self.current_char in DIGITS + '.':
             if self.current_char == '.':
                 if dot_count == 1: break
@@ -303,7 +407,7 @@ class Lexer:
 
     def make_id(self):
         id_str = ''
-        pos_start = self.pos.copy()
+        pos_start = self.pos
         while self.current_char != None and self.current_char in LETTERS_DIGITS + '_':
             id_str += self.current_char
             self.advance()
@@ -313,7 +417,7 @@ class Lexer:
 
     def make_minus_or_arrow(self):
         tok_type = TT_MINUS
-        pos_start = self.pos.copy()
+        pos_start = self.pos
         self.advance()
         if self.current_char == '>':
             self.advance()
@@ -322,7 +426,7 @@ class Lexer:
 
 
     def make_notEquals(self):
-        pos_start = self.pos.copy()
+        pos_start = self.pos
         self.advance()
         if self.current_char == '=':
             self.advance()
@@ -333,7 +437,7 @@ class Lexer:
 
     def make_equals(self):
         tok_type = TT_EQ
-        pos_start = self.pos.copy()
+        pos_start = self.pos
         self.advance()
         if self.current_char == '=':
             self.advance()
@@ -343,7 +447,7 @@ class Lexer:
 
     def make_lessThan(self):
         tok_type = TT_LT
-        pos_start = self.pos.copy()
+        pos_start = self.pos
         self.advance()
         if self.current_char == '=':
             self.advance()
@@ -353,7 +457,7 @@ class Lexer:
 
     def make_greaterThan(self):
         tok_type = TT_GT
-        pos_start = self.pos.copy()
+        pos_start = self.pos
         self.advance()
         if self.current_char == '=':
             self.advance()
@@ -369,7 +473,7 @@ class Lexer:
 
     def make_string(self):
         string = ''
-        pos_start = self.pos.copy()
+        pos_start = self.pos
         escape_character = False
         self.advance()
         escape_characters = {
@@ -386,11 +490,154 @@ class Lexer:
                 else:
                     string += self.current_char
             self.advance()
-            escape_character = False       
+            escape_character = False
         self.advance()
         return Token(TT_STRING, string, pos_start, self.pos)
 
 
+# REGEX LEXER
+# Same token stream and errors as Lexer, but every token is recognised by one compiled master regex
+# instead of walking the text one character at a time.
+class RegexLexer:
+    TOKEN_REGEX = re.compile(r'''
+        (?P<SKIP>[ \t]+)
+      | (?P<COMMENT>\#[^\n]*\n?)
+      | (?P<NUMBER>[0-9]+(?:\.[0-9]*)?)
+      | (?P<ID>[A-Za-z][A-Za-z0-9_]*)
+      | (?P<STRING>"[^"]*"?)
+      | (?P<NEWLINE>[;\n])
+      | (?P<OP>->|!=|==|<=|>=|[-+*/^()=<>,\[\]])
+      | (?P<BANG>!)
+      | (?P<ILLEGAL>.)
+    ''', re.VERBOSE | re.DOTALL)
+
+    OP_TYPES = {
+        '+': TT_PLUS, '-': TT_MINUS, '*': TT_MUL, '/': TT_DIV, '^': TT_EXPONENT,
+        '(': TT_LPAREN, ')': TT_RPAREN, '[': TT_LSQUARE, ']': TT_RSQUARE, ',': TT_COMMA,
+        '->': TT_ARROW, '!=': TT_NE, '=': TT_EQ, '==': TT_EQ,
+        '<': TT_LT, '<=': TT_LTE, '>': TT_GT, '>=': TT_GTE,
+    }
+
+    TOKEN_REGEX_BYTES = re.compile(TOKEN_REGEX.pattern.encode(), re.VERBOSE | re.DOTALL)
+
+    KEYWORDS = frozenset(VARLIST)
+
+    #The text can also be bytes or an mmap of a script (see map_file in SourceFile.py)
+    def __init__(self, fn, text):
+        self.fn = fn
+        self.text = text
+        self.source = add_source(fn, text)
+
+    def make_tokens(self):
+        tokens = list(self.iter_tokens())
+        if self.error: return [], self.error
+        return tokens, None
+
+    def make_buffer(self):
+        tokens = TokenBuffer()
+        append = tokens.append
+        for type_, value, pos_start, pos_end in self.scan():
+            append(type_, value, pos_start, pos_end)
+        if self.error: return None, self.error
+        return tokens, None
+
+    #Yields the tokens one at a time, on an error it records it in self.error and finishes with EOF.
+    def iter_tokens(self):
+        for type_, value, pos_start, pos_end in self.scan():
+            yield Token(type_, value, pos_start, pos_end)
+
+    #Yields (type, value, pos_start, pos_end) for every token, iter_tokens and make_buffer are built on it.
+    def scan(self):
+        self.error = None
+        text = self.text
+        is_text = isinstance(text, str)
+        token_regex = self.TOKEN_REGEX if is_text else self.TOKEN_REGEX_BYTES
+        base = self.source.base
+        op_types = self.OP_TYPES
+        keywords = self.KEYWORDS
+        eof = len(text)
+
+        for match in token_regex.finditer(text):
+            kind = match.lastgroup
+            start, end = match.span()
+
+            if kind == 'SKIP' or kind == 'COMMENT':
+                continue
+
+            value = match.group() if is_text else match.group().decode('utf-8', 'replace')
+
+            if kind == 'NUMBER':
+                if '.' in value: yield TT_FLOAT, float(value), base + start, base + end
+                else: yield TT_INT, int(value), base + start, base + end
+
+            elif kind == 'ID':
+                yield TT_KEYWORD if value in keywords else TT_ID, value, base + start, base + end
+
+            elif kind == 'STRING':
+                # Backslashes are dropped without escaping anything, exactly like Lexer.make_string
+                closed = end - start > 1 and value[-1] == '"'
+                # An unterminated string also steps over the end of the text
+                if not closed:
+                    end += 1
+                    eof = end
+                yield TT_STRING, (value[1:-1] if closed else value[1:]).replace('\\', ''), base + start, base + end
+
+            elif kind == 'NEWLINE':
+                yield TT_NEWLINE, None, base + start, base + end
+
+            elif kind == 'OP':
+                yield op_types[value], None, base + start, base + end
+
+            elif kind == 'BANG':
+                # Lexer.make_notEquals steps over the character after '!' before reporting
+                self.error = ExpectedCharError(base + start, base + end + 1, "'=' (after '!')")
+                yield TT_EOF, None, base + end + 1, base + end + 2
+                return
+
+            else:
+                if not is_text: value = bytes(text[start:start + 4]).decode('utf-8', 'ignore')[:1] or value
+                self.error = IllegalCharError(base + start, base + end, "'" + value + "'")
+                yield TT_EOF, None, base + end, base + end + 1
+                return
+
+        yield TT_EOF, None, base + eof, base + eof + 1
+
+
+LEXERS = {
+    'classic': Lexer,
+    'regex': RegexLexer,
+}
+
+DEFAULT_LEXER = 'classic'
+
+
+# TOKEN STREAM
+# Pulls tokens from a lexer's iter_tokens() as the parser needs them, so the whole token list never exists at
+# once. The parser only ever moves on to the next token, so the newest one is all the stream keeps.
+class TokenStream:
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.tokens = lexer.iter_tokens()
+        self.idx = -1
+        self.tok = None
+
+    def get(self, idx):
+        # The token at idx, which is never behind the newest one, or None past EOF
+        while self.idx < idx:
+            tok = next(self.tokens, None)
+            if tok is None: return None
+            self.idx += 1
+            self.tok = tok
+        return self.tok
+
+    def drain(self):
+        for _ in self.tokens: pass
+
+    @property
+    def error(self):
+        return self.lexer.error
+
+
 
 
 ##############################################################################################################
@@ -399,8 +646,11 @@ class Lexer:
 
 
 # NODES
+# Nodes are slotted, big ASTs stay alive for a long time in Function bodies and the AST cache
 
 class NumberNode:
+    __slots__ = ('tok', 'pos_start', 'pos_end')
+
     def __init__(self, tok):
         self.tok = tok
         self.pos_start = self.tok.pos_start
@@ -410,12 +660,16 @@ class NumberNode:
         return f'{self.tok}'
 
 class VarAccessNode:
+    __slots__ = ('var_name_tok', 'pos_start', 'pos_end')
+
     def __init__(self, var_name_tok):
         self.var_name_tok = var_name_tok
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.var_name_tok.pos_end
 
 class VarAssignNode:
+    __slots__ = ('var_name_tok', 'value_node', 'pos_start', 'pos_end')
+
     def __init__(self, var_name_tok, value_node):
         self.var_name_tok = var_name_tok
         self.value_node = value_node
@@ -423,6 +677,8 @@ class VarAssignNode:
         self.pos_end = self.value_node.pos_end
 
 class BinOpNode:
+    __slots__ = ('left_node', 'op_tok', 'right_node', 'pos_start', 'pos_end')
+
     def __init__(self, left_node, op_tok, right_node):
         self.left_node = left_node
         self.op_tok = op_tok
@@ -434,6 +690,8 @@ class BinOpNode:
         return f'({self.left_node}, {self.op_tok}, {self.right_node})'
 
 class UnaryOpNode:
+    __slots__ = ('op_tok', 'node', 'pos_start', 'pos_end')
+
     def __init__(self, op_tok, node):
         self.op_tok = op_tok
         self.node = node
@@ -444,6 +702,8 @@ class UnaryOpNode:
         return f'({self.op_tok}, {self.node})'
 
 class IfNode:
+    __slots__ = ('cases', 'else_case', 'pos_start', 'pos_end')
+
     def __init__(self, cases, else_case):
         self.cases = cases
         self.else_case = else_case
@@ -451,6 +711,9 @@ class IfNode:
         self.pos_end = (self.else_case or self.cases[len(self.cases) - 1])[0].pos_end
 
 class ForNode:
+    __slots__ = ('var_name_tok', 'start_value_node', 'end_value_node', 'step_value_node', 'body_node', 'pos_start', 'pos_end', 'should_return_null',
+        'hoisted')
+
     def __init__(self, var_name_tok, start_value_node, end_value_node, step_value_node, body_node, should_return_null):
         self.var_name_tok = var_name_tok
         self.start_value_node = start_value_node
@@ -460,16 +723,23 @@ class ForNode:
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.body_node.pos_end
         self.should_return_null = should_return_null
+        # The InvariantNodes and InductionNodes in the body the loop works out once per run, see hoist_invariants
+        self.hoisted = []
 
 class WhileNode:
+    __slots__ = ('condition_node', 'body_node', 'pos_start', 'pos_end', 'should_return_null', 'hoisted')
+
     def __init__(self, condition_node, body_node, should_return_null):
         self.condition_node = condition_node
         self.body_node = body_node
         self.pos_start = self.condition_node.pos_start
         self.pos_end = self.body_node.pos_end
         self.should_return_null = should_return_null
+        self.hoisted = []
 
 class FuncDefNode:
+    __slots__ = ('var_name_tok', 'arg_name_toks', 'body_node', 'should_auto_return', 'pos_start', 'pos_end')
+
     def __init__(self, var_name_tok, arg_name_toks, body_node, should_auto_return):
         self.var_name_tok = var_name_tok
         self.arg_name_toks = arg_name_toks
@@ -486,9 +756,13 @@ class FuncDefNode:
         self.pos_end = self.body_node.pos_end
 
 class CallNode:
+    __slots__ = ('node_to_call', 'arg_nodes', 'tail', 'pos_start', 'pos_end')
+
     def __init__(self, node_to_call, arg_nodes):
         self.node_to_call = node_to_call
         self.arg_nodes = arg_nodes
+        # Set by mark_tail_calls when the call's value is what its FUN gives back
+        self.tail = False
         self.pos_start = self.node_to_call.pos_start
 
         if len(self.arg_nodes) > 0:
@@ -497,22 +771,30 @@ class CallNode:
             self.pos_end = self.node_to_call.pos_end
 
 class ReturnNode:
+    __slots__ = ('node_to_return', 'pos_start', 'pos_end')
+
     def __init__(self, node_to_return, pos_start, pos_end):
         self.node_to_return = node_to_return
         self.pos_start = pos_start
         self.pos_end = pos_end
 
 class ContinueNode:
+    __slots__ = ('pos_start', 'pos_end')
+
     def __init__(self, pos_start, pos_end):
         self.pos_start = pos_start
         self.pos_end = pos_end
 
 class BreakNode:
+    __slots__ = ('pos_start', 'pos_end')
+
     def __init__(self, pos_start, pos_end):
         self.pos_start = pos_start
         self.pos_end = pos_end
 
 class StringNode:
+    __slots__ = ('tok', 'pos_start', 'pos_end')
+
     def __init__(self, tok):
         self.tok = tok
         self.pos_start = self.tok.pos_start
@@ -522,11 +804,333 @@ class StringNode:
         return f'{self.tok}'
 
 class ListNode:
+    __slots__ = ('element_nodes', 'pos_start', 'pos_end')
+
     def __init__(self, element_nodes, pos_start, pos_end):
         self.element_nodes = element_nodes
         self.pos_start = pos_start
         self.pos_end = pos_end
 
+# Never made by the parser. The loop optimizer wraps a pure expression a loop does not change in it, and the
+# engines then work its value out once per run of the loop (see LOOP PRE-HEADERS).
+class InvariantNode:
+    __slots__ = ('node', 'var_name_toks', 'cache', 'pos_start', 'pos_end')
+
+    def __init__(self, node, var_name_toks):
+        self.node = node
+        self.var_name_toks = var_name_toks
+        self.cache = new_invariant_cache()
+        self.pos_start = self.node.pos_start
+        self.pos_end = self.node.pos_end
+
+# Never made by the parser either. The loop optimizer wraps `i * k` in it, where i is the variable of the FOR loop
+# and k a literal or an InvariantNode, and the loop then adds step * k to its value every step instead of
+# multiplying (see LOOP PRE-HEADERS).
+class InductionNode:
+    __slots__ = ('node', 'var_name_tok', 'cache', 'pos_start', 'pos_end')
+
+    def __init__(self, node, var_name_tok):
+        self.node = node
+        self.var_name_tok = var_name_tok
+        self.cache = new_induction_cache()
+        self.pos_start = self.node.pos_start
+        self.pos_end = self.node.pos_end
+
+# Never made by the parser either. The inliner puts it in place of a CallNode whose callee is a small arrow FUN,
+# and keeps that FUN's body_node and argument names. When the callee still is that FUN and every argument is a
+# Number, engines work out the body's value right away (see compile_inline_number), otherwise they make the call.
+class InlineCallNode:
+    __slots__ = ('node_to_call', 'arg_nodes', 'body_node', 'arg_name_toks', 'evaluator', 'pos_start', 'pos_end')
+
+    def __init__(self, call_node, func_def_node):
+        self.node_to_call = call_node.node_to_call
+        self.arg_nodes = call_node.arg_nodes
+        self.body_node = func_def_node.body_node
+        self.arg_name_toks = func_def_node.arg_name_toks
+        self.evaluator = None
+        self.pos_start = call_node.pos_start
+        self.pos_end = call_node.pos_end
+
+# Never made by the parser either. specialize_numbers wraps Number arithmetic on literals and variables that only
+# ever hold Numbers in it, and engines then work the whole expression out on raw ints and floats, making one
+# Number for its result. A variable that does not hold a Number after all (or a division by zero, or any other
+# failure) makes the wrapped expression run the usual way instead, which fails or gives what it always did.
+class NumericNode:
+    __slots__ = ('node', 'evaluator', 'pos_start', 'pos_end')
+
+    def __init__(self, node):
+        self.node = node
+        self.evaluator = None
+        self.pos_start = node.pos_start
+        self.pos_end = node.pos_end
+
+
+# FLAT AST
+# An optional encoding of a whole tree as parallel arrays with one entry per node, numbered children first:
+#   kinds           index of the node class in NODE_CLASSES
+#   starts, ends    pos_start and pos_end
+#   operands        index of the node's token (tok, op_tok or var_name_tok) in tokens, or -1
+#   flags           should_return_null / should_auto_return / tail, and for an IF whether it has an ELSE
+#   item_starts     where the node's items start in items, they end where the next node's start
+#   items           child node indices (-1 for a missing one), plus each IF case's flag, FUN's argument tokens
+#                   and loop's hoisted nodes
+# Kept tokens go into a TokenBuffer. node(index) returns a view with the same class name and attributes as the
+# tree node, so the Interpreter (or anything else dispatching on the class name) walks both forms the same way.
+# There is one view per index, made on first access, and a view reads each field from the arrays once and then
+# keeps it, so walking the same nodes again costs what walking tree nodes does.
+NODE_CLASSES = (NumberNode, StringNode, VarAccessNode, VarAssignNode, BinOpNode, UnaryOpNode, IfNode, ForNode,
+    WhileNode, FuncDefNode, CallNode, ReturnNode, ContinueNode, BreakNode, ListNode, InvariantNode, InlineCallNode,
+    NumericNode, InductionNode)
+NODE_KINDS = {node_class: kind for kind, node_class in enumerate(NODE_CLASSES)}
+
+class FlatAST:
+    def __init__(self):
+        self.kinds = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.operands = array('q')
+        self.flags = array('B')
+        self.item_starts = array('I', [0])
+        self.items = array('q')
+        self.tokens = TokenBuffer()
+        self.root = -1
+        # The caches of InvariantNodes and InductionNodes and the evaluators of InlineCallNodes and NumericNodes,
+        # by node index
+        self.caches = {}
+        # Index of each FUN body added so far, by id, an InlineCallNode shares its body with the FUN. Hoisted
+        # nodes are in here too, for their loop to refer to
+        self.shared = {}
+        # The view of each node index handed out so far
+        self.views = {}
+
+    # Views are made again after unpickling, they hold nothing the arrays don't
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['views'] = {}
+        return state
+
+    @classmethod
+    def from_tree(cls, node):
+        ast = cls()
+        ast.root = ast.add(node)
+        ast.shared.clear()
+        return ast
+
+    def add_token(self, tok):
+        if tok is None: return -1
+        self.tokens.append(tok.type, tok.value, tok.pos_start, tok.pos_end)
+        return len(self.tokens) - 1
+
+    def add(self, node):
+        if node is None: return -1
+        node_type = type(node)
+        operand, flags, items = -1, 0, ()
+
+        if node_type in (NumberNode, StringNode):
+            operand = self.add_token(node.tok)
+        elif node_type is VarAccessNode:
+            operand = self.add_token(node.var_name_tok)
+        elif node_type is VarAssignNode:
+            items = (self.add(node.value_node),)
+            operand = self.add_token(node.var_name_tok)
+        elif node_type is BinOpNode:
+            items = (self.add(node.left_node), self.add(node.right_node))
+            operand = self.add_token(node.op_tok)
+        elif node_type is UnaryOpNode:
+            items = (self.add(node.node),)
+            operand = self.add_token(node.op_tok)
+        elif node_type is IfNode:
+            items = []
+            for condition, expr, should_return_null in node.cases:
+                items.extend((self.add(condition), self.add(expr), should_return_null))
+            if node.else_case:
+                expr, should_return_null = node.else_case
+                items.extend((self.add(expr), should_return_null))
+                flags = 1
+        elif node_type is ForNode:
+            items = [self.add(node.start_value_node), self.add(node.end_value_node), self.add(node.step_value_node), self.add(node.body_node)]
+            items.extend(self.shared[id(hoisted_node)] for hoisted_node in node.hoisted)
+            operand = self.add_token(node.var_name_tok)
+            flags = node.should_return_null
+        elif node_type is WhileNode:
+            items = [self.add(node.condition_node), self.add(node.body_node)]
+            items.extend(self.shared[id(hoisted_node)] for hoisted_node in node.hoisted)
+            flags = node.should_return_null
+        elif node_type is FuncDefNode:
+            items = [self.add_shared(node.body_node)]
+            operand = self.add_token(node.var_name_tok)
+            items.extend(self.add_token(tok) for tok in node.arg_name_toks)
+            flags = node.should_auto_return
+        elif node_type is CallNode:
+            items = [self.add(node.node_to_call)]
+            items.extend(self.add(arg_node) for arg_node in node.arg_nodes)
+            flags = node.tail
+        elif node_type is ReturnNode:
+            items = (self.add(node.node_to_return),)
+        elif node_type is ListNode:
+            items = [self.add(element_node) for element_node in node.element_nodes]
+        elif node_type is InvariantNode:
+            items = [self.add(node.node)]
+            items.extend(self.add_token(tok) for tok in node.var_name_toks)
+        elif node_type is InlineCallNode:
+            # As many arguments as argument names, so the items split in half after the callee and the body
+            items = [self.add(node.node_to_call), self.add_shared(node.body_node)]
+            items.extend(self.add(arg_node) for arg_node in node.arg_nodes)
+            items.extend(self.add_token(tok) for tok in node.arg_name_toks)
+        elif node_type is NumericNode:
+            items = (self.add(node.node),)
+        elif node_type is InductionNode:
+            items = (self.add(node.node),)
+            operand = self.add_token(node.var_name_tok)
+
+        self.kinds.append(NODE_KINDS[node_type])
+        self.starts.append(node.pos_start)
+        self.ends.append(node.pos_end)
+        self.operands.append(operand)
+        self.flags.append(flags)
+        self.items.extend(items)
+        self.item_starts.append(len(self.items))
+        if node_type is InvariantNode or node_type is InductionNode: self.shared[id(node)] = len(self.kinds) - 1
+        return len(self.kinds) - 1
+
+    def add_shared(self, node):
+        index = self.shared.get(id(node))
+        if index is None: index = self.shared[id(node)] = self.add(node)
+        return index
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def node(self, index):
+        if index < 0: return None
+        view = self.views.get(index)
+        if view is None: view = self.views[index] = FLAT_NODE_CLASSES[self.kinds[index]](self, index)
+        return view
+
+    def root_node(self):
+        return self.node(self.root)
+
+    def token(self, index):
+        if index < 0: return None
+        return self.tokens[index]
+
+    def node_items(self, index):
+        return self.items[self.item_starts[index]:self.item_starts[index + 1]]
+
+    def shift_positions(self, delta):
+        # Used by the AST cache, the tree walk there can't see inside the arrays
+        for column in (self.starts, self.ends, self.tokens.starts, self.tokens.ends):
+            for idx in range(len(column)):
+                column[idx] += delta
+        # The views made so far keep the old positions
+        self.views = {}
+
+    def nbytes(self):
+        columns = (self.kinds, self.starts, self.ends, self.operands, self.flags, self.item_starts, self.items)
+        return sum(column.itemsize * len(column) for column in columns) + self.tokens.nbytes()
+
+
+class flat_field:
+    # A view field, read from the arrays on first access and from then on found in the view's __dict__
+    def __init__(self, get):
+        self.get = get
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, view, owner=None):
+        if view is None: return self
+        value = view.__dict__[self.name] = self.get(view)
+        return value
+
+class FlatNode:
+    __slots__ = ('ast', 'index')
+
+    def __init__(self, ast, index):
+        self.ast = ast
+        self.index = index
+
+    # The view classes share their names with the tree classes, so pickle has to rebuild views through the FlatAST
+    def __reduce__(self):
+        return FlatAST.node, (self.ast, self.index)
+
+    pos_start = flat_field(lambda view: view.ast.starts[view.index])
+    pos_end = flat_field(lambda view: view.ast.ends[view.index])
+
+def flat_token():
+    return flat_field(lambda view: view.ast.token(view.ast.operands[view.index]))
+
+def flat_child(position):
+    def get(view):
+        ast = view.ast
+        return ast.node(ast.items[ast.item_starts[view.index] + position])
+    return flat_field(get)
+
+def flat_children(first):
+    return flat_field(lambda view: [view.ast.node(index) for index in view.ast.node_items(view.index)[first:]])
+
+def flat_flag():
+    return flat_field(lambda view: bool(view.ast.flags[view.index]))
+
+def flat_if_cases(view):
+    items = view.ast.node_items(view.index)
+    count = len(items) - 2 if view.ast.flags[view.index] else len(items)
+    return [(view.ast.node(items[idx]), view.ast.node(items[idx + 1]), bool(items[idx + 2])) for idx in range(0, count, 3)]
+
+def flat_else_case(view):
+    if not view.ast.flags[view.index]: return None
+    items = view.ast.node_items(view.index)
+    return view.ast.node(items[-2]), bool(items[-1])
+
+def flat_arg_tokens(view):
+    return [view.ast.token(index) for index in view.ast.node_items(view.index)[1:]]
+
+def flat_cache(new_cache):
+    def get(view):
+        cache = view.ast.caches.get(view.index)
+        if cache is None: cache = view.ast.caches[view.index] = new_cache()
+        return cache
+    return flat_field(get)
+
+def flat_inline_args(view):
+    items = view.ast.node_items(view.index)
+    count = (len(items) - 2) // 2
+    return [view.ast.node(index) for index in items[2:2 + count]], [view.ast.token(index) for index in items[2 + count:]]
+
+def set_flat_evaluator(view, evaluator):
+    view.ast.caches[view.index] = evaluator
+
+FLAT_NODE_FIELDS = {
+    NumberNode: {'tok': flat_token()},
+    StringNode: {'tok': flat_token()},
+    VarAccessNode: {'var_name_tok': flat_token()},
+    VarAssignNode: {'var_name_tok': flat_token(), 'value_node': flat_child(0)},
+    BinOpNode: {'left_node': flat_child(0), 'op_tok': flat_token(), 'right_node': flat_child(1)},
+    UnaryOpNode: {'op_tok': flat_token(), 'node': flat_child(0)},
+    IfNode: {'cases': flat_field(flat_if_cases), 'else_case': flat_field(flat_else_case)},
+    ForNode: {'var_name_tok': flat_token(), 'start_value_node': flat_child(0), 'end_value_node': flat_child(1),
+        'step_value_node': flat_child(2), 'body_node': flat_child(3), 'should_return_null': flat_flag(), 'hoisted': flat_children(4)},
+    WhileNode: {'condition_node': flat_child(0), 'body_node': flat_child(1), 'should_return_null': flat_flag(), 'hoisted': flat_children(2)},
+    FuncDefNode: {'var_name_tok': flat_token(), 'arg_name_toks': flat_field(flat_arg_tokens), 'body_node': flat_child(0),
+        'should_auto_return': flat_flag()},
+    CallNode: {'node_to_call': flat_child(0), 'arg_nodes': flat_children(1), 'tail': flat_flag()},
+    ReturnNode: {'node_to_return': flat_child(0)},
+    ContinueNode: {},
+    BreakNode: {},
+    ListNode: {'element_nodes': flat_children(0)},
+    InvariantNode: {'node': flat_child(0), 'var_name_toks': flat_field(flat_arg_tokens), 'cache': flat_cache(lambda: new_invariant_cache())},
+    InlineCallNode: {'node_to_call': flat_child(0), 'body_node': flat_child(1),
+        'arg_nodes': flat_field(lambda view: flat_inline_args(view)[0]),
+        'arg_name_toks': flat_field(lambda view: flat_inline_args(view)[1]),
+        'evaluator': property(lambda view: view.ast.caches.get(view.index), set_flat_evaluator)},
+    NumericNode: {'node': flat_child(0), 'evaluator': property(lambda view: view.ast.caches.get(view.index), set_flat_evaluator)},
+    InductionNode: {'node': flat_child(0), 'var_name_tok': flat_token(), 'cache': flat_cache(lambda: new_induction_cache())},
+}
+# One view class per node class, named like it so visit_<name> dispatch finds it. Views have a __dict__ for the
+# fields they keep (see flat_field)
+FLAT_NODE_CLASSES = tuple(type(node_class.__name__, (FlatNode,), {'fields': tuple(FLAT_NODE_FIELDS[node_class]),
+    **FLAT_NODE_FIELDS[node_class]}) for node_class in NODE_CLASSES)
+
 
 # PARSE RESULT
 class ParseResult:
@@ -535,7 +1139,6 @@ class ParseResult:
         self.node = None
         self.last_registered_advance_count = 0
         self.advance_count = 0
-        self.to_reverse_count = 0
 
     def register_advancement(self):
         self.last_registered_advance_count = 1
@@ -556,15 +1159,29 @@ class ParseResult:
             self.error = error
         return self
 
-    def try_register(self, response):
-        if response.error:
-            self.to_reverse_count = response.advance_count
-            return None
-        return self.register(response)
-
 
 
 # PARSERCODE
+EXPR_START_TYPES = frozenset((TT_INT, TT_FLOAT, TT_STRING, TT_ID, TT_PLUS, TT_MINUS, TT_LPAREN, TT_LSQUARE))
+EXPR_START_KEYWORDS = frozenset(('VAR', 'NOT', 'IF', 'FOR', 'WHILE', 'FUN'))
+STATEMENT_START_KEYWORDS = EXPR_START_KEYWORDS | {'RETURN', 'CONTINUE', 'BREAK'}
+
+#Binding power of each binary operator, a higher power binds tighter. Unary '+'/'-' take a POWER_EXPONENT
+#operand and 'NOT' a POWER_COMPARISON one, like factor and comp-expr in the grammar.
+POWER_LOGIC = 1
+POWER_COMPARISON = 2
+POWER_SUM = 3
+POWER_PRODUCT = 4
+POWER_EXPONENT = 5
+BINARY_POWERS = {
+    TT_EQ: POWER_COMPARISON, TT_NE: POWER_COMPARISON, TT_LT: POWER_COMPARISON, TT_GT: POWER_COMPARISON,
+    TT_LTE: POWER_COMPARISON, TT_GTE: POWER_COMPARISON,
+    TT_PLUS: POWER_SUM, TT_MINUS: POWER_SUM,
+    TT_MUL: POWER_PRODUCT, TT_DIV: POWER_PRODUCT,
+    TT_EXPONENT: POWER_EXPONENT,
+}
+BINARY_KEYWORD_POWERS = {'AND': POWER_LOGIC, 'OR': POWER_LOGIC}
+
 class Parser:
     def __init__(self, tokens):
         self.tokens = tokens
@@ -577,21 +1194,16 @@ class Parser:
             self.current_tok = self.tokens[self.tok_idx]
         return self.current_tok
 
-    def reverse(self, amount=1):
-        self.tok_idx -= amount
-        self.update_current_tok()
-        return self.current_tok
-
-    def update_current_tok(self):
-        if self.tok_idx >= 0 and self.tok_idx < len(self.tokens):
-            self.current_tok = self.tokens[self.tok_idx]
-
     def parse(self):
         response = self.statements()
         if not response.error and self.current_tok.type != TT_EOF:
-            return response.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected '+', '-', '*', '/', '^', '==', '!=', '<', '>', <=', '>=', 'AND' or 'OR'"))
+            return response.failure(self.expected_operator())
         return response
 
+    #What parse() reports when the statements end before EOF
+    def expected_operator(self):
+        return InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected '+', '-', '*', '/', '^', '==', '!=', '<', '>', <=', '>=', 'AND' or 'OR'")
+
     
 
 
@@ -599,7 +1211,7 @@ class Parser:
     def statements(self):
         response = ParseResult()
         statements = []
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         while self.current_tok.type == TT_NEWLINE:
             response.register_advancement()
@@ -609,49 +1221,53 @@ class Parser:
         if response.error: return response
         statements.append(statement)
 
-        more_statements = True
-
+        # One token of lookahead decides if another statement follows, so nothing is parsed twice
         while True:
             newline_count = 0
             while self.current_tok.type == TT_NEWLINE:
                 response.register_advancement()
                 self.advance()
                 newline_count += 1
-            if newline_count == 0:
-                more_statements = False
-      
-            if not more_statements: break
-            statement = response.try_register(self.statement())
-            if not statement:
-                self.reverse(response.to_reverse_count)
-                more_statements = False
-                continue
+
+            if newline_count == 0 or not self.starts_statement(): break
+            statement = response.register(self.statement())
+            if response.error: return response
             statements.append(statement)
 
-        return response.success(ListNode(statements, pos_start, self.current_tok.pos_end.copy()))
+        return response.success(ListNode(statements, pos_start, self.current_tok.pos_end))
+
+    #FIRST sets of the statement and expr rules, anything else (END, ELSE, ELIF, EOF, ...) ends a block
+    def starts_expr(self):
+        if self.current_tok.type == TT_KEYWORD: return self.current_tok.value in EXPR_START_KEYWORDS
+        return self.current_tok.type in EXPR_START_TYPES
+
+    def starts_statement(self):
+        if self.current_tok.type == TT_KEYWORD: return self.current_tok.value in STATEMENT_START_KEYWORDS
+        return self.current_tok.type in EXPR_START_TYPES
 
     def statement(self):
         response = ParseResult()
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         if self.current_tok.matches(TT_KEYWORD, 'RETURN'):
             response.register_advancement()
             self.advance()
 
-            expr = response.try_register(self.expr())
-            if not expr:
-                self.reverse(response.to_reverse_count)
-            return response.success(ReturnNode(expr, pos_start, self.current_tok.pos_start.copy()))
+            expr = None
+            if self.starts_expr():
+                expr = response.register(self.expr())
+                if response.error: return response
+            return response.success(ReturnNode(expr, pos_start, self.current_tok.pos_start))
     
         if self.current_tok.matches(TT_KEYWORD, 'CONTINUE'):
             response.register_advancement()
             self.advance()
-            return response.success(ContinueNode(pos_start, self.current_tok.pos_start.copy()))
+            return response.success(ContinueNode(pos_start, self.current_tok.pos_start))
         
         if self.current_tok.matches(TT_KEYWORD, 'BREAK'):
             response.register_advancement()
             self.advance()
-            return response.success(BreakNode(pos_start, self.current_tok.pos_start.copy()))
+            return response.success(BreakNode(pos_start, self.current_tok.pos_start))
 
         expr = response.register(self.expr())
         if response.error:
@@ -666,7 +1282,7 @@ class Parser:
             if self.current_tok.type != TT_ID:
                 return response.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected identifier"))
 
-            var_name = self.current_tok
+            var_name = self.current_tok.snapshot()
             response.register_advancement()
             self.advance()
             if self.current_tok.type != TT_EQ:
@@ -678,50 +1294,55 @@ class Parser:
             if response.error: return response
             return response.success(VarAssignNode(var_name, expr))
 
-        node = response.register(self.bin_op(self.comp_expr, ((TT_KEYWORD, 'AND'), (TT_KEYWORD, 'OR'))))
+        node = response.register(self.binary_expr(POWER_LOGIC))
         if response.error:
             return response.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected 'VAR', 'IF', 'FOR', 'WHILE', 'FUN', int, float, identifier, '+', '-', '(', '[' or 'NOT'"))
 
         return response.success(node)
 
 
-    def comp_expr(self):
+    # Operator precedence parsing: one loop climbs the BINARY_POWERS table instead of one function per level.
+    # min_power is the weakest operator this call may consume, so POWER_LOGIC parses a whole expr, POWER_COMPARISON
+    # a comp-expr, POWER_EXPONENT a factor and so on. Trees are the same the recursive grammar rules built.
+    def binary_expr(self, min_power):
         response = ParseResult()
-        if self.current_tok.matches(TT_KEYWORD, 'NOT'):
-            op_tok = self.current_tok
+        tok = self.current_tok
+        if tok.type in (TT_PLUS, TT_MINUS):
+            op_tok = tok.snapshot()
             response.register_advancement()
             self.advance()
-            node = response.register(self.comp_expr())
+            node = response.register(self.binary_expr(POWER_EXPONENT))
             if response.error: return response
-            return response.success(UnaryOpNode(op_tok, node))
-        
-        node = response.register(self.bin_op(self.arith_expr, (TT_EQ, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE)))
-        if response.error: return response.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected int, float, identifier, '+', '-', '(', '[', 'IF', 'FOR', 'WHILE', 'FUN' or 'NOT'"))
-        return response.success(node)
-
-
-    def arith_expr(self):
-        return self.bin_op(self.term, (TT_PLUS, TT_MINUS))
+            left = UnaryOpNode(op_tok, node)
 
+        elif min_power <= POWER_COMPARISON and tok.matches(TT_KEYWORD, 'NOT'):
+            op_tok = tok.snapshot()
+            response.register_advancement()
+            self.advance()
+            node = response.register(self.binary_expr(POWER_COMPARISON))
+            if response.error: return response
+            left = UnaryOpNode(op_tok, node)
 
-    def term(self):
-        return self.bin_op(self.factor, (TT_MUL, TT_DIV))
+        else:
+            left = response.register(self.call())
+            if response.error:
+                if min_power > POWER_COMPARISON: return response
+                return response.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected int, float, identifier, '+', '-', '(', '[', 'IF', 'FOR', 'WHILE', 'FUN' or 'NOT'"))
 
+        while True:
+            tok = self.current_tok
+            power = BINARY_KEYWORD_POWERS.get(tok.value) if tok.type == TT_KEYWORD else BINARY_POWERS.get(tok.type)
+            if power is None or power < min_power: break
 
-    def factor(self):
-        response = ParseResult()
-        tok = self.current_tok
-        if tok.type in (TT_PLUS, TT_MINUS):
+            op_tok = tok.snapshot()
             response.register_advancement()
             self.advance()
-            factor = response.register(self.factor())
+            # '^' is right associative, every other operator is left associative
+            right = response.register(self.binary_expr(power if power == POWER_EXPONENT else power + 1))
             if response.error: return response
-            return response.success(UnaryOpNode(tok, factor))
-        return self.power()
-
+            left = BinOpNode(left, op_tok, right)
 
-    def power(self):
-        return self.bin_op(self.call, (TT_EXPONENT, ), self.factor)
+        return response.success(left)
 
 
     def call(self):
@@ -759,7 +1380,7 @@ class Parser:
 
     def atom(self):
         response = ParseResult()
-        tok = self.current_tok
+        tok = self.current_tok.snapshot()
         if tok.type in (TT_INT, TT_FLOAT):
             response.register_advancement()
             self.advance()
@@ -817,7 +1438,7 @@ class Parser:
     def list_expr(self):
         response = ParseResult()
         element_nodes = []
-        pos_start = self.current_tok.pos_start.copy()
+        pos_start = self.current_tok.pos_start
 
         if self.current_tok.type != TT_LSQUARE:
             return response.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, f"Expected '['"))
@@ -846,7 +1467,7 @@ class Parser:
         response.register_advancement()
         self.advance()
 
-        return response.success(ListNode(element_nodes, pos_start, self.current_tok.pos_end.copy()))
+        return response.success(ListNode(element_nodes, pos_start, self.current_tok.pos_end))
 
 
     def if_expr(self):
@@ -854,6 +1475,8 @@ class Parser:
         all_cases = response.register(self.if_expr_cases('IF'))
         if response.error: return response
         cases, else_case = all_cases
+        # An IfNode starts at its first case, so there has to be one
+        if not cases: return response.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected 'IF'"))
         return response.success(IfNode(cases, else_case))
 
 
@@ -959,7 +1582,7 @@ class Parser:
         if self.current_tok.type != TT_ID:
             return response.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, f"Expected identifier"))
 
-        var_name = self.current_tok
+        var_name = self.current_tok.snapshot()
         response.register_advancement()
         self.advance()
         if self.current_tok.type != TT_EQ:
@@ -1056,7 +1679,7 @@ class Parser:
         response.register_advancement()
         self.advance()
         if self.current_tok.type == TT_ID:
-            var_name_tok = self.current_tok
+            var_name_tok = self.current_tok.snapshot()
             response.register_advancement()
             self.advance()
             if self.current_tok.type != TT_LPAREN:
@@ -1070,7 +1693,7 @@ class Parser:
         self.advance()
         arg_name_toks = []
         if self.current_tok.type == TT_ID:
-            arg_name_toks.append(self.current_tok)
+            arg_name_toks.append(self.current_tok.snapshot())
             response.register_advancement()
             self.advance()
             
@@ -1081,7 +1704,7 @@ class Parser:
                 if self.current_tok.type != TT_ID:
                     return response.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, f"Expected identifier"))
 
-                arg_name_toks.append(self.current_tok)
+                arg_name_toks.append(self.current_tok.snapshot())
                 response.register_advancement()
                 self.advance()
             
@@ -1118,22 +1741,507 @@ class Parser:
 
         return response.success(FuncDefNode(var_name_tok, arg_name_toks, body, False))
 
-    def bin_op(self, func_a, ops, func_b=None):
-        if func_b == None:
-            func_b = func_a
-        response = ParseResult()
-        left = response.register(func_a())
-        if response.error: return response
 
-        while self.current_tok.type in ops or (self.current_tok.type, self.current_tok.value) in ops:
-            op_tok = self.current_tok
-            response.register_advancement()
-            self.advance()
-            right = response.register(func_b())
-            if response.error: return response
-            left = BinOpNode(left, op_tok, right)
-        return response.success(left)
 
+# BUFFER PARSER
+# Same grammar as Parser, but walks a TokenBuffer with one TokenCursor pointed at tok_idx, so no Token is built
+# unless a node keeps it.
+class BufferParser(Parser):
+    def __init__(self, tokens):
+        self.token_count = len(tokens)
+        self.token_types = tokens.types
+        self.current_tok = TokenCursor(tokens)
+        super().__init__(tokens)
+
+    def advance(self):
+        idx = self.tok_idx = self.tok_idx + 1
+        cursor = self.current_tok
+        if idx < self.token_count:
+            cursor.idx = idx
+            cursor.type = TOKEN_TYPES[self.token_types[idx]]
+        return cursor
+
+
+# STREAM PARSER
+# Same grammar as Parser, but reads its tokens from a TokenStream instead of a list.
+class StreamParser(Parser):
+    def advance(self):
+        self.tok_idx += 1
+        self.update_current_tok()
+        return self.current_tok
+
+    def update_current_tok(self):
+        tok = self.tokens.get(self.tok_idx)
+        if tok: self.current_tok = tok
+
+    def iter_statements(self):
+        # The ParseResults of the top level statements one at a time, each a ListNode of its own, parsed the way
+        # statements() and parse() parse them. A syntax error is the last ParseResult
+        while self.current_tok.type == TT_NEWLINE: self.advance()
+
+        while True:
+            response = self.statement()
+            if response.error:
+                yield response
+                return
+            node = response.node
+            yield response.success(ListNode([node], node.pos_start, node.pos_end))
+
+            newline_count = 0
+            while self.current_tok.type == TT_NEWLINE:
+                self.advance()
+                newline_count += 1
+            if newline_count == 0 or not self.starts_statement(): break
+
+        if self.current_tok.type != TT_EOF: yield ParseResult().failure(self.expected_operator())
+
+
+##############################################################################################################
+##                                  AST OPTIMIZER
+##############################################################################################################
+
+# Rewrites the parser's tree before an engine runs it, without changing what the program prints, returns or
+# reports. Constant Number arithmetic is folded with the same Value methods the engines use, and left alone
+# whenever it would fail, so a division by zero still fails at runtime at the same position. IF cases with a
+# constant condition are pruned, and statements after an unconditional RETURN, BREAK or CONTINUE are dropped.
+# In loops, pure Number expressions the loop does not change are wrapped in InvariantNodes and multiples of the
+# FOR variable in InductionNodes (see hoist_invariants), and calls to small arrow FUNs become InlineCallNodes (see
+# inline_calls). Last, arithmetic on variables that
+# only ever hold Numbers is wrapped in NumericNodes (see specialize_numbers). Calls a FUN ends with are marked
+# as tail calls (see mark_tail_calls), which parse_source does without optimizing too.
+
+# Integer powers with a bigger exponent are left to runtime, they could take long and might never run
+FOLD_POWER_LIMIT = 64
+# Set to False to leave loop bodies as they are
+OPTIMIZE_LOOPS = True
+# Set to False to leave every call a call
+INLINE_CALLS = True
+# Arrow FUN bodies with more nodes than this are not inlined
+INLINE_MAX_NODES = 16
+# Set to False to have every operator make its Number
+SPECIALIZE_NUMBERS = True
+# Set to False to have every call nest, tail calls included (see TAIL CALLS)
+TAIL_CALLS = True
+
+def constant_truth(node):
+    # True or False for a literal condition, None when it is only known at runtime
+    if type(node) is NumberNode: return node.tok.value != 0
+    if type(node) is StringNode: return len(node.tok.value) > 0
+    return None
+
+def constant_number(value, pos_start, pos_end):
+    if type(value) is int: return NumberNode(Token(TT_INT, value, pos_start, pos_end))
+    if type(value) is float: return NumberNode(Token(TT_FLOAT, value, pos_start, pos_end))
+    # Complex results of powers stay runtime values
+    return None
+
+def fold(operation, node):
+    # The NumberNode for a constant operation, or the node itself when it has to run
+    try:
+        result, error = operation()
+    except Exception:
+        return node
+    if error: return node
+    return constant_number(result.value, node.pos_start, node.pos_end) or node
+
+def is_small_power(base, exponent):
+    return not (type(base) is int and type(exponent) is int) or abs(base) <= 1 or exponent <= FOLD_POWER_LIMIT
+
+class ASTOptimizer:
+    def optimize(self, node):
+        method = getattr(self, f'optimize_{type(node).__name__}', None)
+        return method(node) if method else node
+
+    def optimize_VarAssignNode(self, node):
+        node.value_node = self.optimize(node.value_node)
+        return node
+
+    def optimize_BinOpNode(self, node):
+        node.left_node = self.optimize(node.left_node)
+        node.right_node = self.optimize(node.right_node)
+        if type(node.left_node) is not NumberNode or type(node.right_node) is not NumberNode: return node
+
+        left, right = node.left_node.tok.value, node.right_node.tok.value
+        method_name = binary_method(node.op_tok)
+        if method_name == 'power_of' and not is_small_power(left, right): return node
+        return fold(lambda: getattr(Number(left), method_name)(Number(right)), node)
+
+    def optimize_UnaryOpNode(self, node):
+        node.node = self.optimize(node.node)
+        if type(node.node) is not NumberNode: return node
+
+        number = Number(node.node.tok.value)
+        if node.op_tok.type == TT_MINUS: return fold(lambda: number.multiplied_by(Number(-1)), node)
+        if node.op_tok.matches(TT_KEYWORD, 'NOT'): return fold(number.notted, node)
+        return fold(lambda: (number, None), node)
+
+    def optimize_IfNode(self, node):
+        cases = []
+        else_case = node.else_case
+        # The first case whose condition is always false, and the case that is always taken
+        never_taken = always_taken = None
+        for condition, expr, should_return_null in node.cases:
+            condition = self.optimize(condition)
+            truth = constant_truth(condition)
+            if truth is False:
+                if never_taken is None: never_taken = (condition, expr, should_return_null)
+                continue
+            if truth is True:
+                # Always taken, so it becomes the ELSE and every case after it goes
+                else_case = (self.optimize(expr), should_return_null)
+                always_taken = condition
+                break
+            cases.append((condition, self.optimize(expr), should_return_null))
+
+        if else_case and not always_taken: else_case = (self.optimize(else_case[0]), else_case[1])
+        # An IF that always runs one branch is that branch, as long as its value is the IF's value
+        if not cases and else_case and not else_case[1]: return else_case[0]
+        # Otherwise the IF still gives back NULL itself, so the node stays, with the constant case that decides it
+        # (an IfNode always has a case)
+        if not cases and always_taken:
+            cases, else_case = [(always_taken,) + else_case], None
+        elif not cases:
+            cases = [never_taken]
+        node.cases = cases
+        node.else_case = else_case
+        return node
+
+    def optimize_ForNode(self, node):
+        node.start_value_node = self.optimize(node.start_value_node)
+        node.end_value_node = self.optimize(node.end_value_node)
+        if node.step_value_node: node.step_value_node = self.optimize(node.step_value_node)
+        node.body_node = self.optimize(node.body_node)
+        if OPTIMIZE_LOOPS:
+            body_assigned = assigned_names(node.body_node, set())
+            # The variable only counts when nothing but the loop assigns it
+            counter = node.var_name_tok if node.var_name_tok.value not in body_assigned else None
+            node.body_node = hoist_invariants(node.body_node, body_assigned | {node.var_name_tok.value}, node.hoisted, counter)
+        return node
+
+    def optimize_WhileNode(self, node):
+        node.condition_node = self.optimize(node.condition_node)
+        node.body_node = self.optimize(node.body_node)
+        if OPTIMIZE_LOOPS:
+            assigned = assigned_names(node.body_node, set())
+            node.condition_node = hoist_invariants(node.condition_node, assigned, node.hoisted)
+            node.body_node = hoist_invariants(node.body_node, assigned, node.hoisted)
+        return node
+
+    def optimize_FuncDefNode(self, node):
+        node.body_node = self.optimize(node.body_node)
+        return node
+
+    def optimize_CallNode(self, node):
+        node.node_to_call = self.optimize(node.node_to_call)
+        node.arg_nodes = [self.optimize(arg_node) for arg_node in node.arg_nodes]
+        return node
+
+    def optimize_ListNode(self, node):
+        element_nodes = []
+        for element_node in node.element_nodes:
+            element_node = self.optimize(element_node)
+            element_nodes.append(element_node)
+            # Nothing after this statement can run
+            if type(element_node) in (ReturnNode, ContinueNode, BreakNode): break
+        node.element_nodes = element_nodes
+        return node
+
+    def optimize_ReturnNode(self, node):
+        if node.node_to_return: node.node_to_return = self.optimize(node.node_to_return)
+        return node
+
+
+# LOOP INVARIANTS
+# A loop runs its body again and again, and a pure Number expression whose variables the loop never assigns
+# (like `a ^ 2` or `n * 2 + 1`) would give the same value every time. Such an expression is wrapped in an
+# InvariantNode, and `i * k` in a FOR loop over i (k a literal or such an expression) in an InductionNode, whose
+# value goes up by step * k every step. The loop keeps both in its hoisted list, and the engines work them out
+# once per run of the loop (see LOOP PRE-HEADERS). Calls, PRINT included, are never part of either, and neither
+# are Strings or Lists, whose contents change in place.
+def assigned_names(node, names):
+    # Every name a loop or function body can bind: VAR targets, FOR variables and FUN names, but not inside FUN bodies.
+    # Goes by class names, so flat views work too
+    kind = type(node).__name__
+    if kind == 'VarAssignNode' or kind == 'ForNode' or (kind == 'FuncDefNode' and node.var_name_tok):
+        names.add(node.var_name_tok.value)
+    if kind != 'FuncDefNode':
+        for child in ast_children(node): assigned_names(child, names)
+    return names
+
+def invariant_reads(node, var_name_toks):
+    # Collects the variables of a pure Number expression into var_name_toks, False for anything else
+    node_type = type(node)
+    if node_type is NumberNode: return True
+    if node_type is VarAccessNode:
+        if all(tok.value != node.var_name_tok.value for tok in var_name_toks): var_name_toks.append(node.var_name_tok)
+        return True
+    if node_type is BinOpNode: return invariant_reads(node.left_node, var_name_toks) and invariant_reads(node.right_node, var_name_toks)
+    if node_type is UnaryOpNode: return invariant_reads(node.node, var_name_toks)
+    return False
+
+def hoist_invariants(node, assigned, hoisted, counter=None):
+    # Wraps the invariants (and with the FOR variable's token as counter, the inductions) of a loop body that
+    # assigns the names in assigned, and adds them to hoisted
+    node_type = type(node)
+    if node_type is BinOpNode or node_type is UnaryOpNode:
+        var_name_toks = []
+        if invariant_reads(node, var_name_toks) and var_name_toks and all(tok.value not in assigned for tok in var_name_toks):
+            invariant = InvariantNode(node, var_name_toks)
+            hoisted.append(invariant)
+            return invariant
+        if counter is not None and node_type is BinOpNode and node.op_tok.type == TT_MUL:
+            induction = hoist_induction(node, assigned, hoisted, counter)
+            if induction is not None: return induction
+    # FUN bodies run in their own Context, and nested loops have already been done
+    if node_type in (FuncDefNode, InvariantNode, InductionNode): return node
+    map_children(node, lambda child: hoist_invariants(child, assigned, hoisted, counter))
+    return node
+
+def hoist_induction(node, assigned, hoisted, counter):
+    # An InductionNode for node if it is `counter * k` or `k * counter`, otherwise None
+    if type(node.left_node) is VarAccessNode and node.left_node.var_name_tok.value == counter.value:
+        side = 'right_node'
+    elif type(node.right_node) is VarAccessNode and node.right_node.var_name_tok.value == counter.value:
+        side = 'left_node'
+    else:
+        return None
+
+    # The counter itself is in assigned, so k cannot read it
+    factor = getattr(node, side)
+    var_name_toks = []
+    if not invariant_reads(factor, var_name_toks) or any(tok.value in assigned for tok in var_name_toks): return None
+    if var_name_toks:
+        factor = InvariantNode(factor, var_name_toks)
+        setattr(node, side, factor)
+        hoisted.append(factor)
+    elif type(factor) is not NumberNode:
+        # Constant arithmetic the optimizer left to runtime
+        return None
+    induction = InductionNode(node, counter)
+    hoisted.append(induction)
+    return induction
+
+
+# INLINING
+# A call to an arrow FUN like `FUN mult(a, b) -> a * b` creates an Interpreter, a Context and a SymbolTable,
+# checks and populates the arguments and copies the result, all for one multiplication. When the whole body is a
+# small pure Number expression, the call becomes an InlineCallNode that still evaluates the callee name and the
+# arguments like a call, but then works out the body directly. Whether the name still refers to that FUN is
+# checked on every call against the FUN's body_node, since a later VAR, another scope or a RUN script can rebind
+# it, and anything unusual (a String argument, a division by zero) just makes the call.
+def inline_candidates(node):
+    # name -> FuncDefNode for every inlinable FUN, a name defined more than once is left out
+    functions = {}
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if type(node) is FuncDefNode and node.var_name_tok:
+            functions.setdefault(node.var_name_tok.value, []).append(node)
+        pending.extend(ast_children(node))
+
+    candidates = {}
+    for name, func_def_nodes in functions.items():
+        func_def_node = func_def_nodes[0]
+        if len(func_def_nodes) == 1 and func_def_node.should_auto_return and invariant_reads(func_def_node.body_node, []) \
+            and count_nodes(func_def_node.body_node) <= INLINE_MAX_NODES:
+            candidates[name] = func_def_node
+    return candidates
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in ast_children(node))
+
+def yields_new_value(node):
+    # Whether the node's value is always a new object, which the call's populate_args can change unseen
+    node_type = type(node)
+    if node_type in (NumberNode, StringNode, VarAccessNode, CallNode, InlineCallNode, ListNode, NumericNode): return True
+    # A List divided by an index gives back the element itself
+    if node_type is BinOpNode: return node.op_tok.type != TT_DIV
+    if node_type is UnaryOpNode: return node.op_tok.type != TT_PLUS or yields_new_value(node.node)
+    if node_type is InvariantNode or node_type is InductionNode: return yields_new_value(node.node)
+    return False
+
+def inline_calls(node, candidates):
+    map_children(node, lambda child: inline_calls(child, candidates))
+    if type(node) is CallNode and type(node.node_to_call) is VarAccessNode:
+        func_def_node = candidates.get(node.node_to_call.var_name_tok.value)
+        if func_def_node and len(node.arg_nodes) == len(func_def_node.arg_name_toks) and all(yields_new_value(arg_node) for arg_node in node.arg_nodes):
+            return InlineCallNode(node, func_def_node)
+    return node
+
+
+# NUMBER SPECIALIZATION
+# Every operator makes a new Number, so `total + i * 2` makes two and copies both variables first. In each scope
+# (the top level, and every FUN body on its own) the names that are only ever assigned Numbers are worked out:
+# FOR variables, and VAR targets whose every value is Number arithmetic on literals and such names. Operator
+# expressions on those become NumericNodes, which engines work out on raw numbers, boxing only the result.
+# Scoping is dynamic, so one of these names can still hold anything at runtime (the caller's variable in a FUN,
+# a RUN script's global): a NumericNode checks every variable it reads and runs its expression the usual way
+# when one is not a Number.
+def numeric_names(node):
+    assignments = scope_assignments(node, {})
+    names = set(assignments)
+    # Dropping one name can make the values of others not numeric either
+    changed = True
+    while changed:
+        changed = False
+        for name in list(names):
+            if not all(value is None or is_numeric(value, names) for value in assignments[name]):
+                names.discard(name)
+                changed = True
+    return names
+
+def scope_assignments(node, assignments):
+    # name -> the value nodes assigned to it in one scope, None for a FOR variable. A FUN name gets its FuncDefNode
+    node_type = type(node)
+    if node_type is VarAssignNode:
+        assignments.setdefault(node.var_name_tok.value, []).append(node.value_node)
+    elif node_type is ForNode:
+        assignments.setdefault(node.var_name_tok.value, []).append(None)
+    elif node_type is FuncDefNode:
+        if node.var_name_tok: assignments.setdefault(node.var_name_tok.value, []).append(node)
+        return assignments
+    for child in ast_children(node): scope_assignments(child, assignments)
+    return assignments
+
+def is_numeric(node, names):
+    # Whether node is Number arithmetic on literals and names
+    node_type = type(node)
+    if node_type is NumberNode: return True
+    if node_type is VarAccessNode: return node.var_name_tok.value in names
+    if node_type is BinOpNode: return is_numeric(node.left_node, names) and is_numeric(node.right_node, names)
+    if node_type in (UnaryOpNode, InvariantNode, InductionNode): return is_numeric(node.node, names)
+    return False
+
+def specialize_numbers(node, names):
+    node_type = type(node)
+    if (node_type is BinOpNode or node_type is UnaryOpNode) and is_numeric(node, names): return NumericNode(node)
+    if node_type is FuncDefNode:
+        # An arrow body that is one operator expression is left alone, InlineCallNodes share it
+        if type(node.body_node) not in (BinOpNode, UnaryOpNode):
+            node.body_node = specialize_numbers(node.body_node, numeric_names(node.body_node))
+        return node
+    # The body of an InlineCallNode is its FUN's, and an InvariantNode or InductionNode already skips its whole
+    # expression
+    if node_type is InlineCallNode:
+        node.arg_nodes = [specialize_numbers(arg_node, names) for arg_node in node.arg_nodes]
+        return node
+    if node_type is InvariantNode or node_type is InductionNode: return node
+    map_children(node, lambda child: specialize_numbers(child, names))
+    return node
+
+
+# TAIL CALLS
+# A call is in tail position when the FUN it is in gives back its value right away: the body of an arrow FUN,
+# or an IF branch there, or the expression of a RETURN (whose value is dropped for NULL, so the call is still
+# the last thing that happens). A RETURN inside a loop does not count, as a CONTINUE or BREAK the callee lets
+# escape would act on that loop. Every engine makes such a call to a FUN once the caller is done, in the same
+# Python frame (or VM frame) the caller ran in, so tail recursion goes as deep as it likes: the Interpreter in
+# Function.execute, the raising, closure and python engines in RaisingFunction.call and ClosureFunction.call, a
+# compiled tier in the Function.execute it runs for, and the VM in run_code. See TailCall.
+def mark_tail_calls(node, tail=False, returns=False):
+    # tail: node's value is what its FUN gives back. returns: a RETURN here ends its FUN and no loop is around it
+    node_type = type(node)
+    if node_type is FuncDefNode:
+        mark_tail_calls(node.body_node, node.should_auto_return, True)
+        return
+    if node_type is IfNode:
+        for condition, expr, should_return_null in node.cases:
+            mark_tail_calls(condition, False, returns)
+            mark_tail_calls(expr, tail and not should_return_null, returns)
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            mark_tail_calls(expr, tail and not should_return_null, returns)
+        return
+    if node_type is ReturnNode:
+        if node.node_to_return: mark_tail_calls(node.node_to_return, returns, returns)
+        return
+    # The body of an InlineCallNode is its FUN's, which gets marked there
+    if node_type is InlineCallNode:
+        for arg_node in node.arg_nodes: mark_tail_calls(arg_node, False, returns)
+        return
+
+    if node_type is CallNode: node.tail = tail
+    if node_type is ForNode or node_type is WhileNode: returns = False
+    for child in ast_children(node): mark_tail_calls(child, False, returns)
+
+def has_tail_calls(node):
+    # Whether a FUN body has calls marked tail, not counting the FUNs inside it. Goes by class names, so flat
+    # views work too
+    kind = type(node).__name__
+    if kind == 'CallNode' and node.tail: return True
+    if kind == 'FuncDefNode': return False
+    return any(has_tail_calls(child) for child in ast_children(node))
+
+
+# AST WALKING
+# Both work from the node classes' slots (or a flat view's fields), so they fit every node kind. A loop's hoisted
+# nodes are in its body already
+AST_NON_CHILDREN = ('pos_start', 'pos_end', 'cache', 'evaluator', 'hoisted')
+
+def node_fields(node):
+    node_type = type(node)
+    return node_type.fields if isinstance(node, FlatNode) else node_type.__slots__
+
+def ast_children(node):
+    children = []
+    for name in node_fields(node):
+        value = getattr(node, name)
+        if name in AST_NON_CHILDREN or name.endswith(('_tok', '_toks')) or value is None: continue
+        if name == 'cases':
+            for condition, expr, should_return_null in value: children.extend((condition, expr))
+        elif name == 'else_case':
+            children.append(value[0])
+        elif isinstance(value, list):
+            children.extend(value)
+        elif type(value) is not bool and not isinstance(value, Token):
+            children.append(value)
+    return children
+
+def map_children(node, function):
+    # Replaces every child of node with function(child)
+    for name in node_fields(node):
+        value = getattr(node, name)
+        if name in AST_NON_CHILDREN or name.endswith(('_tok', '_toks')) or value is None: continue
+        if name == 'cases':
+            setattr(node, name, [(function(condition), function(expr), should_return_null) for condition, expr, should_return_null in value])
+        elif name == 'else_case':
+            setattr(node, name, (function(value[0]), value[1]))
+        elif isinstance(value, list):
+            setattr(node, name, [function(child) for child in value])
+        elif type(value) is not bool and not isinstance(value, Token):
+            setattr(node, name, function(value))
+
+
+# Prints the tree before and after optimize_ast to stderr, EASYCODE_DUMP_AST in the environment turns it on
+DUMP_AST = bool(os.environ.get('EASYCODE_DUMP_AST'))
+
+# Inlining and number specialization look at every FUN and assignment in node, they are left out when node is
+# only part of the program (whole_program unset)
+def optimize_ast(node, dump=None, whole_program=True):
+    if dump is None: dump = DUMP_AST
+    if dump: print(f'AST before optimization:\n{dump_ast(node)}', file=sys.stderr)
+    node = ASTOptimizer().optimize(node)
+    if INLINE_CALLS and whole_program: node = inline_calls(node, inline_candidates(node))
+    if SPECIALIZE_NUMBERS and whole_program: node = specialize_numbers(node, numeric_names(node))
+    if TAIL_CALLS: mark_tail_calls(node)
+    if dump: print(f'AST after optimization:\n{dump_ast(node)}', file=sys.stderr)
+    return node
+
+def dump_ast(node, depth=0):
+    # One line per node, its tokens and flags after the class name and its children indented below it
+    label = [type(node).__name__]
+    for name in type(node).__slots__:
+        value = getattr(node, name)
+        if isinstance(value, Token):
+            label.append(value.type if value.value is None else f'{value.type}:{value.value}')
+        elif type(value) is bool:
+            if value: label.append(name)
+        elif name.endswith('_toks'):
+            label.append(f'({", ".join(tok.value for tok in value)})')
+
+    lines = ['  ' * depth + ' '.join(label)]
+    lines.extend(dump_ast(child, depth + 1) for child in ast_children(node))
+    return '\n'.join(lines)
 
 
 ##############################################################################################################
@@ -1146,6 +2254,10 @@ class Context:
         self.parent = parent
         self.parent_entry_pos = parent_entry_pos
         self.symbol_table = None
+        # The TierProfile of the function this context runs, which loops count their iterations in
+        self.profile = None
+        # How many calls between parent and this one were left out by tail calls (see TailCall)
+        self.elided = 0
 
 
 
@@ -1207,10 +2319,14 @@ class RTResult:
 
 
 # NUMBER AND VALUE CLASS
+# Values have slots rather than a __dict__: every arithmetic result and loop step makes one
 class Value:
+    __slots__ = ('pos_start', 'pos_end', 'context')
+
     def __init__(self):
-        self.set_pos()
-        self.set_context()
+        self.pos_start = None
+        self.pos_end = None
+        self.context = None
 
     def set_pos(self, pos_start=None, pos_end=None):
         self.pos_start = pos_start
@@ -1281,25 +2397,35 @@ class Value:
         )
 
 class Number(Value):
+    __slots__ = ('value',)
+
     def __init__(self, value):
-        super().__init__()
+        self.pos_start = None
+        self.pos_end = None
+        self.context = None
         self.value = value
 
     def added_to(self, second):
         if isinstance(second, Number):
-            return Number(self.value + second.value).set_context(self.context), None
+            return new_number(self.value + second.value, self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.add, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def subtracted_by(self, second):
         if isinstance(second, Number):
-            return Number(self.value - second.value).set_context(self.context), None
+            return new_number(self.value - second.value, self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.sub, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def multiplied_by(self, second):
         if isinstance(second, Number):
-            return Number(self.value * second.value).set_context(self.context), None
+            return new_number(self.value * second.value, self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.mul, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
@@ -1308,66 +2434,82 @@ class Number(Value):
             if second.value == 0:
                 return None, RTError(second.pos_start, second.pos_end, 'Division by zero', self.context)
 
-            return Number(self.value / second.value).set_context(self.context), None
+            return new_number(self.value / second.value, self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.truediv, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def power_of(self, second):
         if isinstance(second, Number):
-            return Number(self.value ** second.value).set_context(self.context), None
+            return new_number(self.value ** second.value, self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.pow, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def get_comparison_equals(self, second):
         if isinstance(second, Number):
-            return Number(int(self.value == second.value)).set_context(self.context), None
+            return new_number(int(self.value == second.value), self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.eq, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def get_comparison_notEquals(self, second):
         if isinstance(second, Number):
-            return Number(int(self.value != second.value)).set_context(self.context), None
+            return new_number(int(self.value != second.value), self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.ne, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def get_comparison_lessThan(self, second):
         if isinstance(second, Number):
-            return Number(int(self.value < second.value)).set_context(self.context), None
+            return new_number(int(self.value < second.value), self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.lt, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def get_comparison_greaterThan(self, second):
         if isinstance(second, Number):
-            return Number(int(self.value > second.value)).set_context(self.context), None
+            return new_number(int(self.value > second.value), self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.gt, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def get_comparison_lessThanEquals(self, second):
         if isinstance(second, Number):
-            return Number(int(self.value <= second.value)).set_context(self.context), None
+            return new_number(int(self.value <= second.value), self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.le, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def get_comparison_greaterThanEquals(self, second):
         if isinstance(second, Number):
-            return Number(int(self.value >= second.value)).set_context(self.context), None
+            return new_number(int(self.value >= second.value), self.context, None, None), None
+        elif isinstance(second, Array):
+            return second.operated(operator.ge, self, True)
         else:
             return None, Value.illegal_operation(self, second)
 
     def and_comparedTo(self, second):
         if isinstance(second, Number):
-            return Number(int(self.value and second.value)).set_context(self.context), None
+            return new_number(int(self.value and second.value), self.context, None, None), None
         else:
             return None, Value.illegal_operation(self, second)
 
     def or_comparedTo(self, second):
         if isinstance(second, Number):
-            return Number(int(self.value or second.value)).set_context(self.context), None
+            return new_number(int(self.value or second.value), self.context, None, None), None
         else:
             return None, Value.illegal_operation(self, second)
 
     def notted(self):
-        return Number(1 if self.value == 0 else 0).set_context(self.context), None
+        return new_number(1 if self.value == 0 else 0, self.context, None, None), None
 
     def copy(self):
         copy = Number(self.value)
@@ -1387,24 +2529,56 @@ Number.false = Number(0)
 Number.true = Number(1)
 Number.math_PI = Number(math.pi)
 
+# SMALL INTEGERS
+# Like CPython's small int cache: one Number for each int FOR loops count through most, given to every loop
+# that stores it in its variable instead of a new one (see SHARED VALUES)
+SMALL_INT_MIN, SMALL_INT_MAX = -5, 1024
+SMALL_INTS = [Number(i) for i in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
+
+def new_number(value, context, pos_start, pos_end):
+    # Number(value).set_context(context).set_pos(pos_start, pos_end) without the method calls
+    number = object.__new__(Number)
+    number.pos_start = pos_start
+    number.pos_end = pos_end
+    number.context = context
+    number.value = value
+    return number
+
+def small_number(value):
+    # Number(value), shared from SMALL_INTS when value is a small int
+    if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX: return SMALL_INTS[value - SMALL_INT_MIN]
+    return new_number(value, None, None, None)
+
+# A String's contents are a str, or a rope (see Rope) once it has been built up with + or *. The rope is
+# flattened into a str the first time something reads value, which PRINT, str() and repr() all do.
 class String(Value):
+    __slots__ = ('contents',)
+
     def __init__(self, value):
-        super().__init__()
-        self.value = value
+        self.pos_start = None
+        self.pos_end = None
+        self.context = None
+        self.contents = value
+
+    @property
+    def value(self):
+        contents = self.contents
+        if type(contents) is not str: contents = self.contents = Rope.flatten(contents)
+        return contents
 
     def added_to(self, second):
-        if isinstance(second, String): return String(self.value + second.value).set_context(self.context), None
+        if isinstance(second, String): return String(Rope.concat(self.contents, second.contents)).set_context(self.context), None
         else: return None, Value.illegal_operation(self, second)
 
     def multiplied_by(self, second):
-        if isinstance(second, Number): return String(self.value * second.value).set_context(self.context), None
+        if isinstance(second, Number): return String(Rope.repeat(self.contents, second.value)).set_context(self.context), None
         else: return None, Value.illegal_operation(self, second)
 
     def is_true(self):
-        return len(self.value) > 0
+        return Rope.length(self.contents) > 0
 
     def copy(self):
-        copy = String(self.value)
+        copy = String(self.contents)
         copy.set_pos(self.pos_start, self.pos_end)
         copy.set_context(self.context)
         return copy
@@ -1415,21 +2589,37 @@ class String(Value):
     def __repr__(self):
         return f'"{self.value}"'
 
+# A List is shared like any other Value: every name bound to it sees what APPEND, POP and EXTEND do to it. The
+# operators give a new List and leave their operands as they were. The elements are a persistent Vector (see
+# PersistentVector), so a new List shares all but O(log32 n) of them with its operand, and copy() shares the
+# Vector itself. APPEND, POP and EXTEND change a List in place through mutable_elements(), which switches its
+# elements to a TransientVector, and vector() switches them back before anything else shares them.
 class List(Value):
+    __slots__ = ('elements',)
+
     def __init__(self, elements):
-        super().__init__()
-        self.elements = elements
+        # Takes a Python list of Values (the list itself, nothing else may change it afterwards) or a Vector
+        self.pos_start = None
+        self.pos_end = None
+        self.context = None
+        self.elements = elements if type(elements) is Vector else Vector(elements)
+
+    def vector(self):
+        if type(self.elements) is TransientVector: self.elements = self.elements.persistent()
+        return self.elements
+
+    def mutable_elements(self):
+        if type(self.elements) is Vector: self.elements = self.elements.transient()
+        return self.elements
 
     def added_to(self, second):
-        new_list = self.copy()
-        new_list.elements.append(second)
+        new_list = List(self.vector().appended(second)).set_context(self.context)
         return new_list, None
 
     def subtracted_by(self, second):
         if isinstance(second, Number):
-            new_list = self.copy()
             try:
-                new_list.elements.pop(second.value)
+                new_list = List(self.vector().removed(second.value)).set_context(self.context)
                 return new_list, None
             except:
                 return None, RTError(second.pos_start, second.pos_end, 'Element at this index could not be removed from list because index is out of bounds', self.context)
@@ -1438,8 +2628,7 @@ class List(Value):
 
     def multiplied_by(self, second):
         if isinstance(second, List):
-            new_list = self.copy()
-            new_list.elements.extend(second.elements)
+            new_list = List(self.vector().concatenated(second.vector())).set_context(self.context)
             return new_list, None
         else:
             return None, Value.illegal_operation(self, second)
@@ -1457,7 +2646,7 @@ class List(Value):
         return ", ".join([str(x) for x in self.elements])
 
     def copy(self):
-        copy = List(self.elements)
+        copy = List(self.vector())
         copy.set_pos(self.pos_start, self.pos_end)
         copy.set_context(self.context)
         return copy
@@ -1466,6 +2655,108 @@ class List(Value):
         return f'[{", ".join([repr(x) for x in self.elements])}]'
 
 
+# An Array holds nothing but numbers, unboxed in one buffer (see NumericArray) instead of a Number each. An
+# operator works on all of its elements in one call: element by element with an Array of the same length, or
+# with a Number on either side against every element. Like a Number it never changes once made.
+class Array(Value):
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.pos_start = None
+        self.pos_end = None
+        self.context = None
+        self.data = data
+
+    def operated(self, op, second, reflected=False):
+        # op applied to self and second, or to second and self when reflected (second is then the left operand)
+        if isinstance(second, Array):
+            if len(second.data) != len(self.data):
+                return None, RTError(second.pos_start, second.pos_end, 'Arrays must have the same length', self.context)
+            other = second.data
+        elif isinstance(second, Number):
+            other = second.value
+        else:
+            return None, Value.illegal_operation(self, second)
+
+        try:
+            data = NumericArray.operate(op, other, self.data) if reflected else NumericArray.operate(op, self.data, other)
+        except ZeroDivisionError:
+            divisor = self if reflected else second
+            return None, RTError(divisor.pos_start, divisor.pos_end, 'Division by zero', self.context)
+        except (OverflowError, ValueError) as error:
+            left, right = (second, self) if reflected else (self, second)
+            message = 'Result is too large' if isinstance(error, OverflowError) else 'Result is not a real number'
+            return None, RTError(left.pos_start, right.pos_end, message, self.context)
+        return Array(data).set_context(self.context), None
+
+    def added_to(self, second):
+        return self.operated(operator.add, second)
+
+    def subtracted_by(self, second):
+        return self.operated(operator.sub, second)
+
+    def multiplied_by(self, second):
+        return self.operated(operator.mul, second)
+
+    def divided_by(self, second):
+        return self.operated(operator.truediv, second)
+
+    def power_of(self, second):
+        return self.operated(operator.pow, second)
+
+    def get_comparison_equals(self, second):
+        return self.operated(operator.eq, second)
+
+    def get_comparison_notEquals(self, second):
+        return self.operated(operator.ne, second)
+
+    def get_comparison_lessThan(self, second):
+        return self.operated(operator.lt, second)
+
+    def get_comparison_greaterThan(self, second):
+        return self.operated(operator.gt, second)
+
+    def get_comparison_lessThanEquals(self, second):
+        return self.operated(operator.le, second)
+
+    def get_comparison_greaterThanEquals(self, second):
+        return self.operated(operator.ge, second)
+
+    def notted(self):
+        # Element by element like the comparisons: 1 where an element is 0, 0 everywhere else
+        return self.operated(operator.eq, Number(0))
+
+    def is_true(self):
+        return len(self.data) > 0
+
+    def copy(self):
+        copy = Array(self.data)
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def __str__(self):
+        return ", ".join([str(x) for x in self.data.tolist()])
+
+    def __repr__(self):
+        return f'ARRAY([{", ".join([repr(x) for x in self.data.tolist()])}])'
+
+
+# SHARED VALUES
+# Values are not copied to be passed around: a variable read, an argument or a call's result is the Value itself,
+# so reading one makes nothing. Numbers and Strings never change once made, and Lists change as List says. A
+# Value keeps the position and context it was made with, and an error points at where it was used instead: an
+# operator that fails runs again on copies placed at its operands' nodes, in the running context, which gives
+# the error it always gave. Only a call still copies its callee, whose position and context its call runs with.
+def operation_error(context, method_name, left, left_node, right=None, right_node=None):
+    # The error of a failed operator: right_node is None for an operand that is not in the code, like NOT's
+    # missing one or the -1 of a unary minus
+    left = left.copy().set_pos(left_node.pos_start, left_node.pos_end).set_context(context)
+    if right_node is not None: right = right.copy().set_pos(right_node.pos_start, right_node.pos_end).set_context(context)
+    method = getattr(left, method_name)
+    return (method() if right is None else method(right))[1]
+
+
 class BaseFunction(Value):
     def __init__(self, name):
         super().__init__()
@@ -1490,7 +2781,6 @@ class BaseFunction(Value):
         for i in range(len(args)):
             arg_name = arg_names[i]
             arg_value = args[i]
-            arg_value.set_context(exec_ctx)
             exec_ctx.symbol_table.set(arg_name, arg_value)
     
     def check_and_populate_args(self, arg_names, args, exec_ctx):
@@ -1507,23 +2797,55 @@ class Function(BaseFunction):
         self.body_node = body_node
         self.arg_names = arg_names
         self.should_auto_return = should_auto_return
+        # Shared by every copy of a function the Interpreter made (see TIERED EXECUTION)
+        self.profile = None
 
     def execute(self, args):
-        response = RTResult()
-        interpreter = Interpreter()
-        exec_ctx = self.generate_new_context()
+        function = self
+        # Tail calls the body asks for are made here, one after the other (see TailCall). returns_null says a
+        # RETURN made one of them, so the value is NULL, and tail_ctx is the Context of the call that made the last
+        returns_null = False
+        tail_ctx = None
 
-        response.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
-        if response.should_return(): return response
+        while True:
+            profile = function.profile
+            if profile is not None and TIERED_EXECUTION and profile.enter(function, args):
+                response = profile.execute_compiled(function, args, tail_ctx)
+                tail_call = response.value
+                if type(tail_call) is TailCall and not response.should_return():
+                    # The compiled body handed back a tail call to another interpreted FUN
+                    returns_null = returns_null or tail_call.returns_null
+                    function, args, tail_ctx = tail_call.function, tail_call.args, tail_call.function.context
+                    continue
+                if returns_null and not response.should_return(): response.success(Number.null)
+                return response
+
+            response = RTResult()
+            interpreter = Interpreter()
+            exec_ctx = function.generate_new_context()
+            exec_ctx.profile = profile
+            if tail_ctx is not None: elide_tail_caller(exec_ctx, tail_ctx)
+
+            response.register(function.check_and_populate_args(function.arg_names, args, exec_ctx))
+            if response.should_return(): return response
 
-        value = response.register(interpreter.visit(self.body_node, exec_ctx))
-        if response.should_return() and response.func_return_value == None: return response
+            try:
+                value = response.register(interpreter.visit(function.body_node, exec_ctx))
+            except RecursionError:
+                return response.failure(call_depth_error(function))
+            tail_call = response.func_return_value if type(response.func_return_value) is TailCall else value
+            if type(tail_call) is TailCall:
+                returns_null = returns_null or tail_call is response.func_return_value
+                function, args, tail_ctx = tail_call.function, tail_call.args, exec_ctx
+                continue
+            if response.should_return() and response.func_return_value == None: return response
 
-        ret_value = (value if self.should_auto_return else None) or response.func_return_value or Number.null
-        return response.success(ret_value)
+            ret_value = (value if function.should_auto_return else None) or response.func_return_value or Number.null
+            return response.success(Number.null if returns_null else ret_value)
 
     def copy(self):
         copy = Function(self.name, self.body_node, self.arg_names, self.should_auto_return)
+        copy.profile = self.profile
         copy.set_context(self.context)
         copy.set_pos(self.pos_start, self.pos_end)
         return copy
@@ -1532,6 +2854,38 @@ class Function(BaseFunction):
         return f"<function {self.name}>"
 
 
+# CALL DEPTH
+# Every engine but the VM runs an EasyCode call inside Python calls of its own, so how deep calls can go is up to
+# Python's recursion limit: a few hundred EasyCode calls with the default limit. The call that reaches it fails
+# with an RTError like the one the VM gives past MAX_CALL_DEPTH, with a traceback line for every call. Deeper
+# recursion needs engine='vm'.
+def call_depth_error(function):
+    # function is the callee's copy for the call, at the call's position and in the caller's Context
+    return RTError(function.pos_start, function.pos_end, "Maximum call depth exceeded (engine='vm' goes deeper)", function.context)
+
+
+# TAIL CALLS
+# What the Interpreter gives back for a call marked tail (see mark_tail_calls) to an interpreted FUN: the copy
+# of the callee and the arguments, for the Function.execute running the caller to call once the caller's body
+# is done, in its own loop, so tail recursion takes no Python stack. The caller's Context then leaves the
+# traceback chain (the callee's Context counts it in elided), but not its SymbolTable: scoping is dynamic, and
+# the callee can still read the caller's variables.
+class TailCall:
+    __slots__ = ('function', 'args', 'returns_null')
+
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+        # Set when a RETURN made the call, in a compiled tier that hands it to Function.execute
+        self.returns_null = False
+
+def elide_tail_caller(exec_ctx, tail_ctx):
+    # The Context of a tail call takes the place of its caller's (tail_ctx) in the traceback chain
+    if exec_ctx.parent is tail_ctx:
+        exec_ctx.parent, exec_ctx.parent_entry_pos = tail_ctx.parent, tail_ctx.parent_entry_pos
+        exec_ctx.elided = tail_ctx.elided + 1
+
+
 class BuiltInFunction(BaseFunction):
     def __init__(self, name):
         super().__init__(name)
@@ -1621,7 +2975,7 @@ class BuiltInFunction(BaseFunction):
         if not isinstance(list_, List):
             return RTResult().failure(RTError(self.pos_start, self.pos_end,"First argument must be list", exec_ctx))
         
-        list_.elements.append(value)
+        list_.mutable_elements().append(value)
         return RTResult().success(Number.null)
     execute_append.arg_names = ["list", "value"]
 
@@ -1636,7 +2990,7 @@ class BuiltInFunction(BaseFunction):
             return RTResult().failure(RTError(
                 self.pos_start, self.pos_end, "Second argument must be number", exec_ctx))
         
-        try: element = list_.elements.pop(index.value)
+        try: element = list_.mutable_elements().pop(index.value)
         except: 
             return RTResult().failure(RTError(self.pos_start, self.pos_end, 'Element at this index could not be removed from list   because index is out of bounds', exec_ctx))
         return RTResult().success(element)
@@ -1645,6 +2999,8 @@ class BuiltInFunction(BaseFunction):
     def execute_len(self, exec_ctx):
         list_ = exec_ctx.symbol_table.get("list")
 
+        if isinstance(list_, Array): return RTResult().success(Number(len(list_.data)))
+
         if not isinstance(list_, List):
             return RTResult().failure(RTError(self.pos_start, self.pos_end, "Argument must be list", exec_ctx))
 
@@ -1660,10 +3016,55 @@ class BuiltInFunction(BaseFunction):
         if not isinstance(listB, List):
             return RTResult().failure(RTError(self.pos_start, self.pos_end, "Second argument must be list", exec_ctx))
 
-        listA.elements.extend(listB.elements)
+        # listB's elements before listA becomes transient, listB may be listA
+        elements = listB.vector()
+        listA.mutable_elements().extend(elements)
         return RTResult().success(Number.null)
     execute_extend.arg_names = ["listA", "listB"]
 
+    def numbers_argument(self, exec_ctx):
+        # The buffer of the Array in "values", or of one made from the List of Numbers in it, otherwise None
+        values = exec_ctx.symbol_table.get("values")
+        if isinstance(values, Array): return values.data
+        if isinstance(values, List) and all(isinstance(element, Number) for element in values.elements):
+            return NumericArray.from_numbers([element.value for element in values.elements])
+        return None
+
+    def execute_array(self, exec_ctx):
+        data = self.numbers_argument(exec_ctx)
+        if data is None:
+            return RTResult().failure(RTError(self.pos_start, self.pos_end, "Argument must be list of numbers", exec_ctx))
+        return RTResult().success(Array(data))
+    execute_array.arg_names = ["values"]
+
+    def execute_sum(self, exec_ctx):
+        data = self.numbers_argument(exec_ctx)
+        if data is None:
+            return RTResult().failure(RTError(self.pos_start, self.pos_end, "Argument must be array or list of numbers", exec_ctx))
+        return RTResult().success(Number(NumericArray.total(data)))
+    execute_sum.arg_names = ["values"]
+
+    def execute_reduce(self, exec_ctx, reduce):
+        # MIN, MAX and MEAN, which have no value for no elements
+        data = self.numbers_argument(exec_ctx)
+        if data is None:
+            return RTResult().failure(RTError(self.pos_start, self.pos_end, "Argument must be array or list of numbers", exec_ctx))
+        if not len(data):
+            return RTResult().failure(RTError(self.pos_start, self.pos_end, "Argument must not be empty", exec_ctx))
+        return RTResult().success(Number(reduce(data)))
+
+    def execute_min(self, exec_ctx):
+        return self.execute_reduce(exec_ctx, NumericArray.minimum)
+    execute_min.arg_names = ["values"]
+
+    def execute_max(self, exec_ctx):
+        return self.execute_reduce(exec_ctx, NumericArray.maximum)
+    execute_max.arg_names = ["values"]
+
+    def execute_mean(self, exec_ctx):
+        return self.execute_reduce(exec_ctx, NumericArray.mean)
+    execute_mean.arg_names = ["values"]
+
     def execute_run(self, exec_ctx):
         fn = exec_ctx.symbol_table.get("fn")
         if not isinstance(fn, String):
@@ -1671,11 +3072,12 @@ class BuiltInFunction(BaseFunction):
         
         fn = fn.value
         try:
-            with open(fn, "r") as f:
-                script = f.read()
+            script = map_file(fn)
         except Exception as e:
             return RTResult().failure(RTError(self.pos_start, self.pos_end, f"Failed to load script \"{fn}\"\n" + str(e), exec_ctx))
-        _, error = run(fn, script)
+        # The script can rebind what the loops running now read (see LOOP PRE-HEADERS)
+        rebinds[0] += 1
+        _, error = run_script(fn, script)
     
         if error:
             return RTResult().failure(RTError(self.pos_start, self.pos_end, f"Failed to finish executing script \"{fn}\"\n" + error.as_string(), exec_ctx))
@@ -1695,11 +3097,192 @@ BuiltInFunction.is_function = BuiltInFunction("is_function")
 BuiltInFunction.append      = BuiltInFunction("append")
 BuiltInFunction.pop         = BuiltInFunction("pop")
 BuiltInFunction.extend      = BuiltInFunction("extend")
+BuiltInFunction.array       = BuiltInFunction("array")
+BuiltInFunction.sum         = BuiltInFunction("sum")
+BuiltInFunction.min         = BuiltInFunction("min")
+BuiltInFunction.max         = BuiltInFunction("max")
+BuiltInFunction.mean        = BuiltInFunction("mean")
 
 BuiltInFunction.run			= BuiltInFunction("run")
 
 
 # INTERPRETER CLASS
+# LOOP PRE-HEADERS
+# Every run of a loop works out each of its hoisted nodes once. An InvariantNode's cache is [number, epoch], an
+# InductionNode's [number, epoch, step, delta]: the number the node gives in this run of the loop (None until it
+# is known), and the value rebinds had when the run started. On entry, enter_loop() empties the caches and keeps
+# what they held for leave_loop() to put back on exit, so the run of the same loop in a recursive call's body
+# does not change the caller's. The first use in a run then works the expression out the usual way, so an error
+# happens when and where it always did, and keep_hoisted() keeps its number when every later use would give that
+# too. Later uses take the number without reading a variable. A FOR loop adds delta (step * k) to an
+# InductionNode's number every step with step_inductions().
+#
+# Nothing in the loop assigns the variables a hoisted node reads, so only a RUN script can rebind them while it
+# runs. RUN counts up rebinds, and a cache whose epoch is older is not used for the rest of the run.
+rebinds = [0]
+# The epoch of a cache that is not used for the rest of the run
+NOT_HOISTED = -1
+
+def new_invariant_cache():
+    return [None, NOT_HOISTED]
+
+def new_induction_cache():
+    return [None, NOT_HOISTED, None, None]
+
+def enter_loop(caches, step=None):
+    # Empties the caches of a loop's hoisted nodes for a new run, and gives back what they held
+    saved = [cache[:] for cache in caches]
+    epoch = rebinds[0]
+    for cache in caches:
+        cache[0] = None
+        cache[1] = epoch
+        if len(cache) > 2: cache[2] = step
+    return saved
+
+def leave_loop(caches, saved):
+    for cache, held in zip(caches, saved): cache[:] = held
+
+def step_inductions(caches):
+    for cache in caches:
+        if cache[0] is not None: cache[0] += cache[3]
+
+def hoisted_number(cache):
+    # The number kept for this run of the loop, or None
+    return cache[0] if cache[1] == rebinds[0] else None
+
+def keep_hoisted(node, symbol_table, number):
+    # After the first use of an InvariantNode or InductionNode in a run of its loop gave number (None for a value
+    # that is not a Number): keeps it when every later use gives it too, and otherwise stops trying for the run
+    cache = node.cache
+    if cache[1] != rebinds[0]: return
+    if number is not None:
+        if type(node).__name__ == 'InvariantNode':
+            # A List can change in place, so each variable has to hold a Number
+            if all(type(symbol_table.get(tok.value)) is Number for tok in node.var_name_toks):
+                cache[0] = number
+                return
+        else:
+            counter = symbol_table.get(node.var_name_tok.value)
+            factor = induction_factor(node)
+            # Only ints, a running sum of floats would drift away from the products
+            if type(number) is int and type(cache[2]) is int and type(counter) is Number and type(counter.value) is int \
+                    and (factor is None or hoisted_number(factor) is not None):
+                # number is counter * k, so k is known unless the counter is 0, and then the next use tries again
+                if counter.value:
+                    cache[0] = number
+                    cache[3] = cache[2] * (number // counter.value)
+                return
+    cache[1] = NOT_HOISTED
+
+def induction_factor(node):
+    # The cache of an InductionNode's k, None when k is a literal
+    expression = node.node
+    for operand in (expression.left_node, expression.right_node):
+        if type(operand).__name__ == 'InvariantNode': return operand.cache
+    return None
+
+
+# What each Value method does when both operands are Numbers. divided_by is left out, it fails on 0.
+NUMBER_OPERATIONS = {
+    'added_to': operator.add, 'subtracted_by': operator.sub, 'multiplied_by': operator.mul,
+    'power_of': operator.pow,
+    'get_comparison_equals': lambda a, b: int(a == b), 'get_comparison_notEquals': lambda a, b: int(a != b),
+    'get_comparison_lessThan': lambda a, b: int(a < b), 'get_comparison_greaterThan': lambda a, b: int(a > b),
+    'get_comparison_lessThanEquals': lambda a, b: int(a <= b),
+    'get_comparison_greaterThanEquals': lambda a, b: int(a >= b),
+    'and_comparedTo': lambda a, b: int(a and b), 'or_comparedTo': lambda a, b: int(a or b),
+}
+
+# INLINED CALLS
+class InlineFallback(Exception):
+    pass
+
+def compile_inline_number(node, arg_names):
+    # Turns an inlined FUN body into a function (argument numbers, caller's symbol table) -> the number the call
+    # would give. It raises instead whenever the call could do anything else, like fail or give a String.
+    node_type = type(node).__name__
+    if node_type == 'NumberNode':
+        value = node.tok.value
+        return lambda values, symbol_table: value
+
+    if node_type == 'VarAccessNode':
+        var_name = node.var_name_tok.value
+        if var_name in arg_names:
+            # The last one wins when an argument name repeats, like in populate_args
+            index = len(arg_names) - 1 - arg_names[::-1].index(var_name)
+            return lambda values, symbol_table: values[index]
+
+        # Anything else is looked up from the call's Context, which is the caller's
+        def free_variable(values, symbol_table):
+            value = symbol_table.get(var_name)
+            if type(value) is not Number: raise InlineFallback()
+            return value.value
+        return free_variable
+
+    if node_type == 'BinOpNode':
+        left = compile_inline_number(node.left_node, arg_names)
+        right = compile_inline_number(node.right_node, arg_names)
+        method_name = binary_method(node.op_tok)
+        # A division by zero raises ZeroDivisionError here, and the call then fails the usual way
+        operation = operator.truediv if method_name == 'divided_by' else NUMBER_OPERATIONS[method_name]
+        return lambda values, symbol_table: operation(left(values, symbol_table), right(values, symbol_table))
+
+    if node_type == 'UnaryOpNode':
+        operand = compile_inline_number(node.node, arg_names)
+        if node.op_tok.type == TT_MINUS: return lambda values, symbol_table: operand(values, symbol_table) * -1
+        if node.op_tok.matches(TT_KEYWORD, 'NOT'): return lambda values, symbol_table: 1 if operand(values, symbol_table) == 0 else 0
+        return operand
+
+    if node_type == 'InvariantNode' or node_type == 'InductionNode':
+        # Only in a NumericNode's expression, kept like the engines keep it
+        expression = compile_inline_number(node.node, arg_names)
+        cache = node.cache
+
+        def hoisted(values, symbol_table):
+            number = cache[0]
+            if number is not None and cache[1] == rebinds[0]: return number
+            number = expression(values, symbol_table)
+            keep_hoisted(node, symbol_table, number)
+            return number
+        return hoisted
+
+    raise InlineFallback()
+
+def inline_evaluator(node):
+    evaluator = node.evaluator
+    if evaluator is None:
+        evaluator = node.evaluator = compile_inline_number(node.body_node, [tok.value for tok in node.arg_name_toks])
+    return evaluator
+
+def inline_number(evaluator, value_to_call, body_node, args, symbol_table):
+    # The number an InlineCallNode gives without making the call, or None when the call has to be made
+    if not isinstance(value_to_call, Function): return None
+    body = value_to_call.body_node
+    # Two flat views are the same node if they share the FlatAST and index (shift_positions makes new views)
+    if body is not body_node and not (isinstance(body, FlatNode) and isinstance(body_node, FlatNode) and
+        body.ast is body_node.ast and body.index == body_node.index): return None
+
+    values = []
+    for arg in args:
+        if type(arg) is not Number: return None
+        values.append(arg.value)
+    try:
+        return evaluator(values, symbol_table)
+    except Exception:
+        # The call runs the same pure body again, and fails or raises exactly like it always did
+        return None
+
+# SPECIALIZED NUMBERS
+def numeric_number(node, symbol_table):
+    # The number a NumericNode's expression gives, or None when it has to run with Values
+    evaluator = node.evaluator
+    try:
+        if evaluator is None: evaluator = node.evaluator = compile_inline_number(node.node, ())
+        return evaluator((), symbol_table)
+    except Exception:
+        return None
+
+
 class Interpreter:
     def visit(self, node, context):
         method_name = f'visit_{type(node).__name__}'
@@ -1713,7 +3296,7 @@ class Interpreter:
 
  #Visit methods for each node type
     def visit_NumberNode(self, node, context):
-        return RTResult().success(Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end))
+        return RTResult().success(new_number(node.tok.value, context, node.pos_start, node.pos_end))
 
     def visit_VarAccessNode(self, node, context):
         response = RTResult()
@@ -1722,7 +3305,6 @@ class Interpreter:
 
         if not value:
             return response.failure(RTError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context))
-        value = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
         return response.success(value)
 
     def visit_VarAssignNode(self, node, context):
@@ -1780,25 +3362,27 @@ class Interpreter:
             result, error = left.or_comparedTo(right)
 
         if error:
-            return response.failure(error)
+            return response.failure(operation_error(context, binary_method(node.op_tok), left, node.left_node, right, node.right_node))
 
         else:
-            return response.success(result.set_pos(node.pos_start, node.pos_end))
+            return response.success(result)
 
 
     def visit_UnaryOpNode(self, node, context):
         response = RTResult()
-        number = response.register(self.visit(node.node, context))
+        value = response.register(self.visit(node.node, context))
         if response.should_return(): return response
-        error = None
+        number, error = value, None
 
-        if node.op_tok.type == TT_MINUS: number, error = number.multiplied_by(Number(-1))
+        if node.op_tok.type == TT_MINUS:
+            number, error = value.multiplied_by(Number(-1))
+            if error: return response.failure(operation_error(context, 'multiplied_by', value, node.node, Number(-1)))
 
-        elif node.op_tok.matches(TT_KEYWORD, 'NOT'): number, error = number.notted()
-
-        if error: return response.failure(error)
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            number, error = value.notted()
+            if error: return response.failure(operation_error(context, 'notted', value, node.node))
 
-        else: return response.success(number.set_pos(node.pos_start, node.pos_end))
+        return response.success(number)
 
 
     def visit_IfNode(self, node, context):
@@ -1843,21 +3427,30 @@ class Interpreter:
             condition = lambda: i < end_value.value
         else:
             condition = lambda: i > end_value.value
-    
-        while condition():
-            context.symbol_table.set(node.var_name_tok.value, Number(i))
-            i += step_value.value
 
-            value = res.register(self.visit(node.body_node, context))
-            if res.should_return() and res.loop_should_continue == False and res.loop_should_break == False: return res
-            
-            if res.loop_should_continue:
-                continue
-            
-            if res.loop_should_break:
-                break
+        hoisted = [hoisted_node.cache for hoisted_node in node.hoisted]
+        inductions = [cache for cache in hoisted if len(cache) > 2]
+        saved = enter_loop(hoisted, step_value.value)
+        try:
+            profile = context.profile
+            while condition():
+                if profile is not None: profile.back_edges += 1
+                context.symbol_table.set(node.var_name_tok.value, small_number(i))
+                i += step_value.value
+                if inductions: step_inductions(inductions)
+
+                value = res.register(self.visit(node.body_node, context))
+                if res.should_return() and res.loop_should_continue == False and res.loop_should_break == False: return res
 
-            elements.append(value)
+                if res.loop_should_continue:
+                    continue
+
+                if res.loop_should_break:
+                    break
+
+                elements.append(value)
+        finally:
+            leave_loop(hoisted, saved)
 
         return res.success(Number.null if node.should_return_null else
       List(elements).set_context(context).set_pos(node.pos_start, node.pos_end))
@@ -1866,23 +3459,30 @@ class Interpreter:
     def visit_WhileNode(self, node, context):
         response = RTResult()
         elements = []
-        while True:
-            condition = response.register(self.visit(node.condition_node, context))
-            if response.should_return(): return response
+        hoisted = [hoisted_node.cache for hoisted_node in node.hoisted]
+        saved = enter_loop(hoisted)
+        try:
+            profile = context.profile
+            while True:
+                if profile is not None: profile.back_edges += 1
+                condition = response.register(self.visit(node.condition_node, context))
+                if response.should_return(): return response
 
-            if not condition.is_true():
-                break
+                if not condition.is_true():
+                    break
 
-            value = response.register(self.visit(node.body_node, context))
-            if response.should_return() and response.loop_should_continue == False and response.loop_should_break == False: return response
+                value = response.register(self.visit(node.body_node, context))
+                if response.should_return() and response.loop_should_continue == False and response.loop_should_break == False: return response
 
-            if response.loop_should_continue:
-                continue
-            
-            if response.loop_should_break:
-                break
+                if response.loop_should_continue:
+                    continue
 
-            elements.append(value)
+                if response.loop_should_break:
+                    break
+
+                elements.append(value)
+        finally:
+            leave_loop(hoisted, saved)
         return response.success(Number.null if node.should_return_null else List(elements).set_context(context).set_pos(node.pos_start, node.pos_end))
 
 
@@ -1892,6 +3492,7 @@ class Interpreter:
         body_node = node.body_node
         arg_names = [arg_name.value for arg_name in node.arg_name_toks]
         func_value = Function(func_name, body_node, arg_names, node.should_auto_return).set_context(context).set_pos(node.pos_start, node.pos_end)
+        func_value.profile = TierProfile(func_value.name)
         if node.var_name_tok:
             context.symbol_table.set(func_name, func_value)
         return response.success(func_value)
@@ -1902,15 +3503,15 @@ class Interpreter:
         args = []
         value_to_call = response.register(self.visit(node.node_to_call, context))
         if response.should_return(): return response
-        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end)
+        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
 
         for arg_node in node.arg_nodes:
             args.append(response.register(self.visit(arg_node, context)))
             if response.should_return(): return response
 
+        if node.tail and type(value_to_call) is Function: return response.success(TailCall(value_to_call, args))
         return_value = response.register(value_to_call.execute(args))
         if response.should_return(): return response
-        return_value = return_value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
         return response.success(return_value)
     
     def visit_StringNode(self, node, context):
@@ -1932,7 +3533,8 @@ class Interpreter:
         if node.node_to_return:
             value = response.register(self.visit(node.node_to_return, context))
         if response.should_return(): return response
-        else:
+        # A tail call goes on to Function.execute, which still gives NULL for it
+        elif not (node.node_to_return and type(value) is TailCall):
             value = Number.null
         
         return response.success_return(value)
@@ -1943,6 +3545,2150 @@ class Interpreter:
     def visit_BreakNode(self, node, context):
         return RTResult().success_break()
 
+    def visit_InlineCallNode(self, node, context):
+        response = RTResult()
+        callee = node.node_to_call
+        var_name = callee.var_name_tok.value
+        value = context.symbol_table.get(var_name)
+        if value is None:
+            return response.failure(RTError(callee.pos_start, callee.pos_end, f"'{var_name}' is not defined", context))
+
+        args = []
+        for arg_node in node.arg_nodes:
+            args.append(response.register(self.visit(arg_node, context)))
+            if response.should_return(): return response
+
+        number = inline_number(inline_evaluator(node), value, node.body_node, args, context.symbol_table)
+        if number is not None: return response.success(new_number(number, context, node.pos_start, node.pos_end))
+
+        value_to_call = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+        return_value = response.register(value_to_call.execute(args))
+        if response.should_return(): return response
+        return response.success(return_value)
+
+    def visit_InvariantNode(self, node, context):
+        response = RTResult()
+        number = hoisted_number(node.cache)
+        if number is not None: return response.success(new_number(number, context, node.pos_start, node.pos_end))
+
+        value = response.register(self.visit(node.node, context))
+        if response.should_return(): return response
+        keep_hoisted(node, context.symbol_table, value.value if type(value) is Number else None)
+        return response.success(value)
+
+    visit_InductionNode = visit_InvariantNode
+
+    def visit_NumericNode(self, node, context):
+        number = numeric_number(node, context.symbol_table)
+        if number is not None: return RTResult().success(new_number(number, context, node.pos_start, node.pos_end))
+        return self.visit(node.node, context)
+
+
+##############################################################################################################
+##                                BYTECODE COMPILER AND VM
+##############################################################################################################
+
+# The AST is compiled once to a list of instructions (opcode, argument, pos_start, pos_end), where the
+# positions are the ones the Interpreter would have given the value or error the instruction makes. A stack
+# VM runs them with the same Values, Contexts and SymbolTables, so results and errors match the Interpreter.
+# Operators get their operands' nodes as well, for an error to point at them (see SHARED VALUES).
+OP_LOAD_NAME = 0        # arg: name
+OP_LOAD_NUMBER = 1      # arg: the number
+OP_LOAD_STRING = 2      # arg: the string
+OP_LOAD_NULL = 3
+OP_STORE_NAME = 4       # arg: name, the value stays on the stack
+OP_STORE_NAME_POP = 5   # arg: name
+OP_POP = 6
+OP_BINARY_OP = 7        # arg: (name of the Value method, like 'added_to', left node, right node)
+OP_UNARY_MINUS = 8      # arg: the operand's node
+OP_UNARY_NOT = 9        # arg: the operand's node
+OP_JUMP = 11            # arg: target
+OP_POP_JUMP_IF_FALSE = 12   # arg: target
+OP_BUILD_LIST = 13      # arg: element count
+OP_MAKE_FUNCTION = 14   # arg: FunctionTemplate
+OP_PREPARE_CALL = 15
+OP_CALL = 16            # arg: argument count
+OP_SETUP_WHILE = 17     # arg: (continue target, break target, collect elements, hoisted caches)
+OP_SETUP_FOR = 18       # arg: (continue target, break target, collect elements, has step, hoisted caches)
+OP_FOR_ITER = 19        # arg: (name, exit target, induction caches)
+OP_LOOP_APPEND = 20
+OP_END_LOOP = 21        # arg: LOOP_RESULT_*
+OP_RETURN = 22
+OP_CONTINUE = 23
+OP_BREAK = 24
+OP_END = 25
+OP_LOAD_CALLEE = 26     # arg: (name, pos_start, pos_end of the name), LOAD_NAME and PREPARE_CALL in one
+OP_LOAD_HOISTED = 27    # arg: (cache, target), pushes the number kept for this run of the loop and jumps, if any
+OP_KEEP_HOISTED = 28    # arg: the InvariantNode or InductionNode, keeps the value on top of the stack
+OP_LOAD_INLINE_CALLEE = 29  # arg: name, pushes the value itself, INLINE_CALL decides whether it gets called
+OP_INLINE_CALL = 30     # arg: (argument count, evaluator, body_node, target), jumps past the CALL after it if it can
+OP_NUMERIC = 31         # arg: (evaluator, target), pushes the expression's Number and jumps past it if it can
+OP_TAIL_CALL = 32       # arg: (argument count, returns NULL), leaves anything but a CompiledFunction to the CALL after it
+
+OPCODE_NAMES = {value: name[3:] for name, value in globals().items() if name.startswith('OP_')}
+
+LOOP_RESULT_NONE = 0    # the loop's value is not used
+LOOP_RESULT_NULL = 1    # should_return_null
+LOOP_RESULT_LIST = 2
+
+# How a frame ended, besides running off the end of its code or failing
+SIGNAL_NONE = 0
+SIGNAL_RETURN = 1
+SIGNAL_CONTINUE = 2
+SIGNAL_BREAK = 3
+
+BINARY_OP_METHODS = {
+    TT_PLUS: 'added_to', TT_MINUS: 'subtracted_by', TT_MUL: 'multiplied_by', TT_DIV: 'divided_by',
+    TT_EXPONENT: 'power_of', TT_EQ: 'get_comparison_equals', TT_NE: 'get_comparison_notEquals',
+    TT_LT: 'get_comparison_lessThan', TT_GT: 'get_comparison_greaterThan',
+    TT_LTE: 'get_comparison_lessThanEquals', TT_GTE: 'get_comparison_greaterThanEquals',
+}
+BINARY_KEYWORD_METHODS = {'AND': 'and_comparedTo', 'OR': 'or_comparedTo'}
+
+
+class CodeObject:
+    __slots__ = ('name', 'instructions')
+
+    def __init__(self, name, instructions):
+        self.name = name
+        self.instructions = instructions
+
+    def disassemble(self):
+        lines = []
+        for idx, (op, arg, pos_start, pos_end) in enumerate(self.instructions):
+            lines.append(f'{idx:>5} {OPCODE_NAMES[op]:<18} {"" if arg is None else repr(arg)}')
+        return '\n'.join(lines)
+
+class FunctionTemplate:
+    __slots__ = ('name', 'code', 'arg_names', 'should_auto_return', 'body_node')
+
+    def __init__(self, name, code, arg_names, should_auto_return, body_node):
+        self.name = name
+        self.code = code
+        self.arg_names = arg_names
+        self.should_auto_return = should_auto_return
+        self.body_node = body_node
+
+    def __repr__(self):
+        return f'<code {self.name or "<anonymous>"}>'
+
+
+# COMPILER
+# compile(node, keep) emits code that leaves the node's value on the stack when keep is set and nothing
+# otherwise, so statement lists, loop bodies and multi-line IF blocks never build values nobody reads.
+class Compiler:
+    def __init__(self):
+        self.instructions = []
+        # Whether the FUN being compiled gives back NULL, whatever a tail call in it gives (see TAIL CALLS)
+        self.returns_null = False
+
+    def emit(self, op, arg=None, pos_start=None, pos_end=None):
+        self.instructions.append((op, arg, pos_start, pos_end))
+        return len(self.instructions) - 1
+
+    def patch(self, idx, arg):
+        op, _, pos_start, pos_end = self.instructions[idx]
+        self.instructions[idx] = (op, arg, pos_start, pos_end)
+
+    def here(self):
+        return len(self.instructions)
+
+    def compile(self, node, keep=True):
+        method = getattr(self, f'compile_{type(node).__name__}')
+        method(node, keep)
+
+    def compile_program(self, node):
+        self.compile(node)
+        self.emit(OP_END)
+        return CodeObject('<program>', self.instructions)
+
+    def compile_function(self, name, body_node, should_auto_return):
+        self.returns_null = not should_auto_return
+        if should_auto_return:
+            self.compile(body_node)
+        else:
+            # A block body's value is never used, the function gives back NULL
+            self.compile(body_node, False)
+            self.emit(OP_LOAD_NULL)
+        self.emit(OP_END)
+        return CodeObject(name, self.instructions)
+
+    def compile_NumberNode(self, node, keep):
+        if keep: self.emit(OP_LOAD_NUMBER, node.tok.value, node.pos_start, node.pos_end)
+
+    def compile_StringNode(self, node, keep):
+        if keep: self.emit(OP_LOAD_STRING, node.tok.value, node.pos_start, node.pos_end)
+
+    def compile_VarAccessNode(self, node, keep):
+        # The lookup can still fail, so it runs even when the value is not used
+        self.emit(OP_LOAD_NAME, node.var_name_tok.value, node.pos_start, node.pos_end)
+        if not keep: self.emit(OP_POP)
+
+    def compile_VarAssignNode(self, node, keep):
+        self.compile(node.value_node)
+        self.emit(OP_STORE_NAME if keep else OP_STORE_NAME_POP, node.var_name_tok.value)
+
+    def compile_BinOpNode(self, node, keep):
+        self.compile(node.left_node)
+        self.compile(node.right_node)
+        op_tok = node.op_tok
+        if op_tok.type == TT_KEYWORD: method_name = BINARY_KEYWORD_METHODS[op_tok.value]
+        else: method_name = BINARY_OP_METHODS[op_tok.type]
+        self.emit(OP_BINARY_OP, (method_name, node.left_node, node.right_node), node.pos_start, node.pos_end)
+        if not keep: self.emit(OP_POP)
+
+    def compile_UnaryOpNode(self, node, keep):
+        self.compile(node.node)
+        # A unary plus gives back its operand as it is
+        if node.op_tok.type == TT_MINUS: self.emit(OP_UNARY_MINUS, node.node, node.pos_start, node.pos_end)
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'): self.emit(OP_UNARY_NOT, node.node, node.pos_start, node.pos_end)
+        if not keep: self.emit(OP_POP)
+
+    def compile_branch(self, body_node, should_return_null, keep):
+        self.compile(body_node, keep and not should_return_null)
+        if keep and should_return_null: self.emit(OP_LOAD_NULL)
+
+    def compile_IfNode(self, node, keep):
+        end_jumps = []
+        for condition, expr, should_return_null in node.cases:
+            self.compile(condition)
+            skip = self.emit(OP_POP_JUMP_IF_FALSE)
+            self.compile_branch(expr, should_return_null, keep)
+            end_jumps.append(self.emit(OP_JUMP))
+            self.patch(skip, self.here())
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            self.compile_branch(expr, should_return_null, keep)
+        elif keep:
+            self.emit(OP_LOAD_NULL)
+
+        for jump in end_jumps: self.patch(jump, self.here())
+
+    def loop_result(self, node, keep):
+        if not keep: return LOOP_RESULT_NONE
+        return LOOP_RESULT_NULL if node.should_return_null else LOOP_RESULT_LIST
+
+    def compile_loop_body(self, body_node, result):
+        self.compile(body_node, result == LOOP_RESULT_LIST)
+        if result == LOOP_RESULT_LIST: self.emit(OP_LOOP_APPEND)
+
+    def compile_ForNode(self, node, keep):
+        result = self.loop_result(node, keep)
+        self.compile(node.start_value_node)
+        self.compile(node.end_value_node)
+        if node.step_value_node: self.compile(node.step_value_node)
+
+        setup = self.emit(OP_SETUP_FOR)
+        loop_start = self.emit(OP_FOR_ITER)
+        self.compile_loop_body(node.body_node, result)
+        self.emit(OP_JUMP, loop_start)
+        loop_end = self.emit(OP_END_LOOP, result, node.pos_start, node.pos_end)
+
+        hoisted = [hoisted_node.cache for hoisted_node in node.hoisted]
+        self.patch(setup, (loop_start, loop_end, result == LOOP_RESULT_LIST, node.step_value_node is not None, hoisted))
+        self.patch(loop_start, (node.var_name_tok.value, loop_end, [cache for cache in hoisted if len(cache) > 2]))
+
+    def compile_WhileNode(self, node, keep):
+        result = self.loop_result(node, keep)
+        setup = self.emit(OP_SETUP_WHILE)
+        loop_start = self.here()
+        self.compile(node.condition_node)
+        exit_jump = self.emit(OP_POP_JUMP_IF_FALSE)
+        self.compile_loop_body(node.body_node, result)
+        self.emit(OP_JUMP, loop_start)
+        loop_end = self.emit(OP_END_LOOP, result, node.pos_start, node.pos_end)
+
+        self.patch(setup, (loop_start, loop_end, result == LOOP_RESULT_LIST, [hoisted_node.cache for hoisted_node in node.hoisted]))
+        self.patch(exit_jump, loop_end)
+
+    def compile_FuncDefNode(self, node, keep):
+        name = node.var_name_tok.value if node.var_name_tok else None
+        code = Compiler().compile_function(name or '<anonymous>', node.body_node, node.should_auto_return)
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        template = FunctionTemplate(name, code, arg_names, node.should_auto_return, node.body_node)
+        self.emit(OP_MAKE_FUNCTION, template, node.pos_start, node.pos_end)
+        if not keep: self.emit(OP_POP)
+
+    def compile_CallNode(self, node, keep):
+        callee = node.node_to_call
+        if type(callee).__name__ == 'VarAccessNode':
+            self.emit(OP_LOAD_CALLEE, (callee.var_name_tok.value, callee.pos_start, callee.pos_end), node.pos_start, node.pos_end)
+        else:
+            self.compile(callee)
+            self.emit(OP_PREPARE_CALL, None, node.pos_start, node.pos_end)
+        for arg_node in node.arg_nodes:
+            self.compile(arg_node)
+        if node.tail: self.emit(OP_TAIL_CALL, (len(node.arg_nodes), self.returns_null), node.pos_start, node.pos_end)
+        self.emit(OP_CALL, len(node.arg_nodes), node.pos_start, node.pos_end)
+        if not keep: self.emit(OP_POP)
+
+    def compile_ListNode(self, node, keep):
+        for element_node in node.element_nodes:
+            self.compile(element_node, keep)
+        if keep: self.emit(OP_BUILD_LIST, len(node.element_nodes), node.pos_start, node.pos_end)
+
+    def compile_ReturnNode(self, node, keep):
+        # The returned expression is evaluated, but like in the Interpreter the function gives back NULL
+        if node.node_to_return: self.compile(node.node_to_return, False)
+        self.emit(OP_RETURN)
+
+    def compile_ContinueNode(self, node, keep):
+        self.emit(OP_CONTINUE)
+
+    def compile_BreakNode(self, node, keep):
+        self.emit(OP_BREAK)
+
+    def compile_InlineCallNode(self, node, keep):
+        callee = node.node_to_call
+        self.emit(OP_LOAD_INLINE_CALLEE, callee.var_name_tok.value, callee.pos_start, callee.pos_end)
+        for arg_node in node.arg_nodes:
+            self.compile(arg_node)
+        evaluator = compile_inline_number(node.body_node, [tok.value for tok in node.arg_name_toks])
+        inline = self.emit(OP_INLINE_CALL, None, node.pos_start, node.pos_end)
+        self.emit(OP_CALL, len(node.arg_nodes), node.pos_start, node.pos_end)
+        self.patch(inline, (len(node.arg_nodes), evaluator, node.body_node, self.here()))
+        if not keep: self.emit(OP_POP)
+
+    def compile_InvariantNode(self, node, keep):
+        if not keep: return self.compile(node.node, False)
+        load = self.emit(OP_LOAD_HOISTED, None, node.pos_start, node.pos_end)
+        self.compile(node.node)
+        self.emit(OP_KEEP_HOISTED, node)
+        self.patch(load, (node.cache, self.here()))
+
+    compile_InductionNode = compile_InvariantNode
+
+    def compile_NumericNode(self, node, keep):
+        if not keep: return self.compile(node.node, False)
+        numeric = self.emit(OP_NUMERIC, None, node.pos_start, node.pos_end)
+        self.compile(node.node)
+        self.patch(numeric, (compile_inline_number(node.node, ()), self.here()))
+
+
+class CompiledFunction(Function):
+    def __init__(self, name, body_node, arg_names, should_auto_return, code):
+        super().__init__(name, body_node, arg_names, should_auto_return)
+        self.code = code
+
+    def enter(self, args):
+        # (the call's Context with the arguments in it, None) or (None, the error the call fails with)
+        exec_ctx = self.generate_new_context()
+        arg_names = self.arg_names
+        if len(args) != len(arg_names):
+            return None, self.check_args(arg_names, args).error
+        symbols = exec_ctx.symbol_table.symbols
+        for arg_name, arg_value in zip(arg_names, args):
+            symbols[arg_name] = arg_value
+        return exec_ctx, None
+
+    def call(self, args):
+        # Returns (value, error, signal) like a VM frame, a CONTINUE or BREAK escapes to the caller's loop
+        exec_ctx, error = self.enter(args)
+        if error: return None, error, SIGNAL_NONE
+
+        value, error, signal = run_code(self.code, exec_ctx)
+        if error: return None, error, SIGNAL_NONE
+        if signal == SIGNAL_RETURN: return Number.null, None, SIGNAL_NONE
+        if signal: return None, None, signal
+        return value, None, SIGNAL_NONE
+
+    def execute(self, args):
+        # For callers in the tree Interpreter
+        response = RTResult()
+        value, error, signal = self.call(args)
+        if error: return response.failure(error)
+        if signal == SIGNAL_CONTINUE: return response.success_continue()
+        if signal == SIGNAL_BREAK: return response.success_break()
+        return response.success(value)
+
+    def copy(self):
+        copy = CompiledFunction(self.name, self.body_node, self.arg_names, self.should_auto_return, self.code)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+
+# VM
+# A call from one CompiledFunction to another does not recurse into run_code: the caller's frame is put on a
+# list and the callee runs in the same loop, so how deep EasyCode calls can go does not depend on Python's
+# recursion limit. A frame costs its stacks on the heap, and past MAX_CALL_DEPTH frames the call fails with an
+# RTError (with a traceback line for each of them).
+MAX_CALL_DEPTH = 100_000
+
+def resume_caller(frames, value, signal):
+    # After a frame ended with value or signal: the state the frame that goes on from there resumes with, or
+    # None when every frame ended. A CONTINUE or BREAK that ends a function acts in its caller's loop
+    while frames:
+        instructions, context, symbol_table, stack, blocks, pc, returns_null, pos_start, pos_end = frames.pop()
+        if signal == SIGNAL_RETURN: value, signal = Number.null, SIGNAL_NONE
+        if not signal:
+            stack.append(value)
+            return instructions, context, symbol_table, stack, blocks, pc, returns_null
+        if blocks:
+            continue_target, break_target, height = blocks[-1]
+            del stack[height:]
+            return instructions, context, symbol_table, stack, blocks, continue_target if signal == SIGNAL_CONTINUE else break_target, returns_null
+    return None
+
+def leave_loops(stack, blocks):
+    # For a frame that ends inside loops: gives their hoisted caches back what they held (see LOOP PRE-HEADERS)
+    for continue_target, break_target, height in reversed(blocks):
+        state = stack[height - 1]
+        if state[-2]: leave_loop(state[-2], state[-1])
+
+def run_code(code, context):
+    # Runs one frame, and the frames of the calls it makes, and returns (value, error, signal)
+    instructions = code.instructions
+    symbol_table = context.symbol_table
+    stack = []
+    # One (continue target, break target, stack height) per loop the frame is in
+    blocks = []
+    pc = 0
+    # Set once a block FUN's frame was taken over by a tail call: the frame then gives back NULL (see TAIL CALLS)
+    returns_null = False
+    # The frames waiting for a call to end: (instructions, context, symbol_table, stack, blocks, pc, returns_null,
+    # and the position of the call)
+    frames = []
+
+    while True:
+        op, arg, pos_start, pos_end = instructions[pc]
+        pc += 1
+
+        if op == OP_LOAD_NAME:
+            value = symbol_table.get(arg)
+            if value is None:
+                return None, RTError(pos_start, pos_end, f"'{arg}' is not defined", context), SIGNAL_NONE
+            stack.append(value)
+
+        elif op == OP_LOAD_NUMBER:
+            stack.append(new_number(arg, context, pos_start, pos_end))
+
+        elif op == OP_BINARY_OP:
+            right = stack.pop()
+            result, error = getattr(stack[-1], arg[0])(right)
+            if error: return None, operation_error(context, arg[0], stack[-1], arg[1], right, arg[2]), SIGNAL_NONE
+            stack[-1] = result
+
+        elif op == OP_STORE_NAME_POP:
+            symbol_table.set(arg, stack.pop())
+
+        elif op == OP_POP_JUMP_IF_FALSE:
+            if not stack.pop().is_true(): pc = arg
+
+        elif op == OP_JUMP:
+            pc = arg
+
+        elif op == OP_FOR_ITER:
+            state = stack[-1]
+            i = state[1]
+            if (i < state[2]) if state[4] else (i > state[2]):
+                symbol_table.set(arg[0], small_number(i))
+                state[1] = i + state[3]
+                if arg[2]: step_inductions(arg[2])
+            else:
+                pc = arg[1]
+
+        elif op == OP_LOOP_APPEND:
+            value = stack.pop()
+            stack[-1][0].append(value)
+
+        elif op == OP_POP:
+            stack.pop()
+
+        elif op == OP_STORE_NAME:
+            symbol_table.set(arg, stack[-1])
+
+        elif op == OP_LOAD_CALLEE:
+            value = symbol_table.get(arg[0])
+            if value is None:
+                return None, RTError(arg[1], arg[2], f"'{arg[0]}' is not defined", context), SIGNAL_NONE
+            stack.append(value.copy().set_pos(pos_start, pos_end).set_context(context))
+
+        elif op == OP_PREPARE_CALL:
+            stack[-1] = stack[-1].copy().set_pos(pos_start, pos_end).set_context(context)
+
+        elif op == OP_CALL:
+            if arg:
+                args = stack[-arg:]
+                del stack[-arg:]
+            else:
+                args = []
+            value_to_call = stack.pop()
+
+            if type(value_to_call) is CompiledFunction:
+                if len(frames) >= MAX_CALL_DEPTH:
+                    return None, RTError(pos_start, pos_end, f'Maximum call depth ({MAX_CALL_DEPTH}) exceeded', context), SIGNAL_NONE
+                exec_ctx, error = value_to_call.enter(args)
+                if error: return None, error, SIGNAL_NONE
+                frames.append((instructions, context, symbol_table, stack, blocks, pc, returns_null, pos_start, pos_end))
+                instructions = value_to_call.code.instructions
+                context = exec_ctx
+                symbol_table = exec_ctx.symbol_table
+                stack, blocks, pc, returns_null = [], [], 0, False
+                continue
+            else:
+                response = value_to_call.execute(args)
+                value, error, signal = response.value, response.error, SIGNAL_NONE
+                if response.loop_should_continue: signal = SIGNAL_CONTINUE
+                elif response.loop_should_break: signal = SIGNAL_BREAK
+                elif response.func_return_value: signal = SIGNAL_RETURN
+
+            if error: return None, error, SIGNAL_NONE
+            if signal:
+                # The callee's CONTINUE or BREAK acts right here, in the caller's loop
+                if signal == SIGNAL_RETURN or not blocks:
+                    if blocks: leave_loops(stack, blocks)
+                    resumed = resume_caller(frames, None, signal)
+                    if resumed is None: return None, None, signal
+                    instructions, context, symbol_table, stack, blocks, pc, returns_null = resumed
+                    continue
+                continue_target, break_target, height = blocks[-1]
+                del stack[height:]
+                pc = continue_target if signal == SIGNAL_CONTINUE else break_target
+                continue
+            stack.append(value)
+
+        elif op == OP_LOAD_STRING:
+            stack.append(String(arg).set_context(context).set_pos(pos_start, pos_end))
+
+        elif op == OP_LOAD_NULL:
+            stack.append(Number.null)
+
+        elif op == OP_BUILD_LIST:
+            if arg:
+                elements = stack[-arg:]
+                del stack[-arg:]
+            else:
+                elements = []
+            stack.append(List(elements).set_context(context).set_pos(pos_start, pos_end))
+
+        elif op == OP_UNARY_MINUS:
+            number, error = stack[-1].multiplied_by(Number(-1))
+            if error: return None, operation_error(context, 'multiplied_by', stack[-1], arg, Number(-1)), SIGNAL_NONE
+            stack[-1] = number
+
+        elif op == OP_UNARY_NOT:
+            number, error = stack[-1].notted()
+            if error: return None, operation_error(context, 'notted', stack[-1], arg), SIGNAL_NONE
+            stack[-1] = number
+
+        elif op == OP_MAKE_FUNCTION:
+            func_value = CompiledFunction(arg.name, arg.body_node, arg.arg_names, arg.should_auto_return, arg.code)
+            func_value.set_context(context).set_pos(pos_start, pos_end)
+            if arg.name: symbol_table.set(arg.name, func_value)
+            stack.append(func_value)
+
+        elif op == OP_SETUP_FOR:
+            continue_target, break_target, collect, has_step, hoisted = arg
+            step_value = stack.pop() if has_step else Number(1)
+            end_value = stack.pop()
+            start_value = stack.pop()
+            # Read in the order the Interpreter reads them, so a bad operand fails the same way
+            i = start_value.value
+            ascending = step_value.value >= 0
+            saved = enter_loop(hoisted, step_value.value) if hoisted else None
+            # state: [elements, i, end, step, ascending, hoisted caches, what they held before]
+            stack.append([[] if collect else None, i, end_value.value, step_value.value, ascending, hoisted, saved])
+            blocks.append((continue_target, break_target, len(stack)))
+
+        elif op == OP_SETUP_WHILE:
+            continue_target, break_target, collect, hoisted = arg
+            saved = enter_loop(hoisted) if hoisted else None
+            stack.append([[] if collect else None, hoisted, saved])
+            blocks.append((continue_target, break_target, len(stack)))
+
+        elif op == OP_END_LOOP:
+            blocks.pop()
+            state = stack.pop()
+            if state[-2]: leave_loop(state[-2], state[-1])
+            if arg == LOOP_RESULT_LIST:
+                stack.append(List(state[0]).set_context(context).set_pos(pos_start, pos_end))
+            elif arg == LOOP_RESULT_NULL:
+                stack.append(Number.null)
+
+        elif op == OP_CONTINUE or op == OP_BREAK:
+            signal = SIGNAL_CONTINUE if op == OP_CONTINUE else SIGNAL_BREAK
+            if not blocks:
+                resumed = resume_caller(frames, None, signal)
+                if resumed is None: return None, None, signal
+                instructions, context, symbol_table, stack, blocks, pc, returns_null = resumed
+                continue
+            continue_target, break_target, height = blocks[-1]
+            del stack[height:]
+            pc = continue_target if op == OP_CONTINUE else break_target
+
+        elif op == OP_RETURN:
+            if blocks: leave_loops(stack, blocks)
+            resumed = resume_caller(frames, None, SIGNAL_RETURN)
+            if resumed is None: return None, None, SIGNAL_RETURN
+            instructions, context, symbol_table, stack, blocks, pc, returns_null = resumed
+
+        elif op == OP_LOAD_HOISTED:
+            cache = arg[0]
+            if cache[0] is not None and cache[1] == rebinds[0]:
+                stack.append(new_number(cache[0], context, pos_start, pos_end))
+                pc = arg[1]
+
+        elif op == OP_KEEP_HOISTED:
+            value = stack[-1]
+            keep_hoisted(arg, symbol_table, value.value if type(value) is Number else None)
+
+        elif op == OP_LOAD_INLINE_CALLEE:
+            value = symbol_table.get(arg)
+            if value is None:
+                return None, RTError(pos_start, pos_end, f"'{arg}' is not defined", context), SIGNAL_NONE
+            stack.append(value)
+
+        elif op == OP_INLINE_CALL:
+            count, evaluator, body_node, target = arg
+            callee_idx = len(stack) - count - 1
+            value = stack[callee_idx]
+            number = inline_number(evaluator, value, body_node, stack[callee_idx + 1:], symbol_table)
+            if number is not None:
+                del stack[callee_idx:]
+                stack.append(new_number(number, context, pos_start, pos_end))
+                pc = target
+            else:
+                # The CALL right after makes the call
+                stack[callee_idx] = value.copy().set_pos(pos_start, pos_end).set_context(context)
+
+        elif op == OP_NUMERIC:
+            try:
+                number = arg[0]((), symbol_table)
+            except Exception:
+                # The code right after works it out with Values
+                number = None
+            if number is not None:
+                stack.append(new_number(number, context, pos_start, pos_end))
+                pc = arg[1]
+
+        elif op == OP_TAIL_CALL:
+            # A call to a FUN the frame is done once it returns: the callee's frame takes this one's place
+            count, caller_returns_null = arg
+            value_to_call = stack[-count - 1]
+            if type(value_to_call) is CompiledFunction:
+                exec_ctx, error = value_to_call.enter(stack[len(stack) - count:])
+                if error: return None, error, SIGNAL_NONE
+                elide_tail_caller(exec_ctx, context)
+                instructions = value_to_call.code.instructions
+                context = exec_ctx
+                symbol_table = exec_ctx.symbol_table
+                stack, blocks, pc = [], [], 0
+                returns_null = returns_null or caller_returns_null
+
+        elif op == OP_END:
+            value = Number.null if returns_null else stack[-1]
+            resumed = resume_caller(frames, value, SIGNAL_NONE)
+            if resumed is None: return value, None, SIGNAL_NONE
+            instructions, context, symbol_table, stack, blocks, pc, returns_null = resumed
+
+def run_bytecode(node):
+    code = Compiler().compile_program(node)
+    context = Context('<runningProgram>')
+    context.symbol_table = global_symbol_table
+    value, error, signal = run_code(code, context)
+    # Like the Interpreter, a RETURN, CONTINUE or BREAK that reaches the top level ends the program with no value
+    if error or signal: return None, error
+    return value, None
+
+
+##############################################################################################################
+##                                  CLOSURE COMPILER
+##############################################################################################################
+
+# Every node is turned once into a Python closure that takes the Context and gives back the node's Value, so
+# running a program (or calling a function) never dispatches on node types again. Closures make the same Values,
+# positions and errors as the Interpreter. Errors, RETURN, CONTINUE and BREAK are raised as exceptions, which cost
+# nothing until they happen, instead of being checked after every node.
+class ClosureSignal(Exception):
+    pass
+
+class ClosureError(ClosureSignal):
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+class ClosureReturn(ClosureSignal):
+    # tail_call is the TailCall a RETURN's expression gave, for the function's call() to make
+    def __init__(self, tail_call=None):
+        super().__init__()
+        self.tail_call = tail_call
+
+class ClosureContinue(ClosureSignal):
+    pass
+
+class ClosureBreak(ClosureSignal):
+    pass
+
+def binary_method(op_tok):
+    if op_tok.type == TT_KEYWORD: return BINARY_KEYWORD_METHODS[op_tok.value]
+    return BINARY_OP_METHODS[op_tok.type]
+
+def is_true(value):
+    return value.value != 0 if type(value) is Number else value.is_true()
+
+def skip(context):
+    return None
+
+
+# SCOPE RESOLUTION
+# A function body is compiled knowing its layout: its argument names and every name it binds with VAR, FOR or
+# FUN, each given a slot of the FrameSymbolTable its calls run in. So each access is resolved when it is compiled:
+#   local     a slot read by index. Until the body assigns it, the name is found in the caller's scopes, as before
+#   free      anything else in a function body, found through the table's bound and found (see SYMBOL TABLE)
+#   global    top level code, which runs in the global table itself
+# Scoping stays dynamic (a function still sees its caller's variables), and deep recursion no longer walks
+# every caller's table to reach a global like the function's own name.
+def function_layout(arg_names, body_node):
+    names = list(dict.fromkeys(arg_names))
+    names.extend(sorted(assigned_names(body_node, set()) - set(names)))
+    return {name: index for index, name in enumerate(names)}
+
+
+# COMPILER
+# compile(node, keep) gives the node's closure. Closures compiled with keep unset may return anything, so
+# statement lists, loop bodies and multi-line IF blocks never build values nobody reads. layout is None for
+# top level code and the function's layout for a function body. number_names are arguments the body never
+# assigns that every call is known to pass a Number for (see TIERED EXECUTION): they are read without checks.
+class ClosureCompiler:
+    def __init__(self, layout=None, number_names=()):
+        self.layout = layout
+        self.number_names = number_names
+
+    def compile(self, node, keep=True):
+        method = getattr(self, f'compile_{type(node).__name__}')
+        return method(node, keep)
+
+    def compile_function(self, body_node, should_auto_return):
+        # A block body's value is never used, the function gives back NULL
+        return self.compile(body_node, should_auto_return)
+
+    def compile_NumberNode(self, node, keep):
+        if not keep: return skip
+        value, pos_start, pos_end = node.tok.value, node.pos_start, node.pos_end
+        return lambda context: new_number(value, context, pos_start, pos_end)
+
+    def compile_StringNode(self, node, keep):
+        if not keep: return skip
+        value, pos_start, pos_end = node.tok.value, node.pos_start, node.pos_end
+        return lambda context: String(value).set_context(context).set_pos(pos_start, pos_end)
+
+    def lookup(self, var_name):
+        # A closure giving the Value var_name is bound to (None if there is none), resolved as SCOPE RESOLUTION says
+        index = self.layout.get(var_name) if self.layout is not None else None
+        if index is not None:
+            def local_lookup(context):
+                symbol_table = context.symbol_table
+                value = symbol_table.slots[index]
+                return value if value is not None else symbol_table.get(var_name)
+            return local_lookup
+
+        if self.layout is not None:
+            def free_lookup(context):
+                symbol_table = context.symbol_table
+                value = symbol_table.symbols.get(var_name)
+                return value if value is not None else symbol_table.above(var_name)
+            return free_lookup
+
+        def global_lookup(context):
+            symbol_table = context.symbol_table
+            value = symbol_table.symbols.get(var_name)
+            return value if value is not None else symbol_table.get(var_name)
+        return global_lookup
+
+    def number_slot(self, node):
+        # The slot of a variable known to hold a Number, or None
+        if type(node).__name__ != 'VarAccessNode' or node.var_name_tok.value not in self.number_names: return None
+        return self.layout[node.var_name_tok.value]
+
+    def compile_VarAccessNode(self, node, keep):
+        # The lookup can still fail, so it runs even when the value is not used
+        var_name, pos_start, pos_end = node.var_name_tok.value, node.pos_start, node.pos_end
+        index = self.number_slot(node)
+        if index is not None:
+            return lambda context: context.symbol_table.slots[index]
+        lookup = self.lookup(var_name)
+
+        def var_access(context):
+            value = lookup(context)
+            if value is None:
+                raise ClosureError(RTError(pos_start, pos_end, f"'{var_name}' is not defined", context))
+            return value
+        return var_access
+
+    def compile_VarAssignNode(self, node, keep):
+        var_name = node.var_name_tok.value
+        value_closure = self.compile(node.value_node)
+        index = self.layout.get(var_name) if self.layout is not None else None
+
+        if index is not None:
+            def var_assign(context):
+                value = value_closure(context)
+                context.symbol_table.slots[index] = value
+                return value
+            return var_assign
+
+        def var_assign(context):
+            value = value_closure(context)
+            context.symbol_table.set(var_name, value)
+            return value
+        return var_assign
+
+    def compile_BinOpNode(self, node, keep):
+        method_name = binary_method(node.op_tok)
+        left_node, right_node = node.left_node, node.right_node
+        left_closure = self.compile(left_node)
+        right_closure = self.compile(right_node)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def generic(context, left, right):
+            result, error = getattr(left, method_name)(right)
+            if error: raise ClosureError(operation_error(context, method_name, left, left_node, right, right_node))
+            return result
+
+        constant = right_node.tok.value if type(right_node).__name__ == 'NumberNode' else None
+        operation = NUMBER_OPERATIONS.get(method_name)
+        if method_name == 'divided_by' and constant:
+            operation = operator.truediv
+
+        if operation is None:
+            return lambda context: generic(context, left_closure(context), right_closure(context))
+
+        left_index = self.number_slot(left_node)
+        right_index = self.number_slot(right_node)
+        if left_index is not None and (constant is not None or right_index is not None):
+            # Both sides are known Numbers, so no type checks
+            if constant is not None:
+                return lambda context: new_number(operation(context.symbol_table.slots[left_index].value, constant), context, pos_start, pos_end)
+            def binary_op(context):
+                slots = context.symbol_table.slots
+                return new_number(operation(slots[left_index].value, slots[right_index].value), context, pos_start, pos_end)
+            return binary_op
+
+        if constant is not None:
+            # Like `i + 1`: the literal only becomes a Number when the slow path needs one
+            def binary_op(context):
+                left = left_closure(context)
+                if type(left) is Number:
+                    return new_number(operation(left.value, constant), context, pos_start, pos_end)
+                return generic(context, left, right_closure(context))
+            return binary_op
+
+        def binary_op(context):
+            left = left_closure(context)
+            right = right_closure(context)
+            if type(left) is Number and type(right) is Number:
+                return new_number(operation(left.value, right.value), context, pos_start, pos_end)
+            return generic(context, left, right)
+        return binary_op
+
+    def compile_UnaryOpNode(self, node, keep):
+        operand_node = node.node
+        operand_closure = self.compile(operand_node)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        if node.op_tok.type == TT_MINUS:
+            def unary_op(context):
+                value = operand_closure(context)
+                if type(value) is Number: return new_number(value.value * -1, context, pos_start, pos_end)
+                number, error = value.multiplied_by(Number(-1))
+                if error: raise ClosureError(operation_error(context, 'multiplied_by', value, operand_node, Number(-1)))
+                return number
+
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            def unary_op(context):
+                value = operand_closure(context)
+                number, error = value.notted()
+                if error: raise ClosureError(operation_error(context, 'notted', value, operand_node))
+                return number
+
+        else:
+            # A unary plus gives back its operand as it is
+            unary_op = operand_closure
+        return unary_op
+
+    def compile_branch(self, body_node, should_return_null, keep):
+        body_closure = self.compile(body_node, keep and not should_return_null)
+        if not (keep and should_return_null): return body_closure
+
+        def null_branch(context):
+            body_closure(context)
+            return Number.null
+        return null_branch
+
+    def compile_IfNode(self, node, keep):
+        cases = [(self.compile(condition), self.compile_branch(expr, should_return_null, keep))
+                 for condition, expr, should_return_null in node.cases]
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            else_closure = self.compile_branch(expr, should_return_null, keep)
+        else:
+            else_closure = lambda context: Number.null
+
+        def if_node(context):
+            for condition_closure, branch_closure in cases:
+                if is_true(condition_closure(context)): return branch_closure(context)
+            return else_closure(context)
+        return if_node
+
+    def compile_ForNode(self, node, keep):
+        var_name = node.var_name_tok.value
+        start_closure = self.compile(node.start_value_node)
+        end_closure = self.compile(node.end_value_node)
+        step_closure = self.compile(node.step_value_node) if node.step_value_node else None
+        collect = keep and not node.should_return_null
+        body_closure = self.compile(node.body_node, collect)
+        pos_start, pos_end = node.pos_start, node.pos_end
+        index = self.layout.get(var_name) if self.layout is not None else None
+        hoisted = [hoisted_node.cache for hoisted_node in node.hoisted]
+        inductions = [cache for cache in hoisted if len(cache) > 2]
+
+        def for_node(context):
+            start_value = start_closure(context)
+            end_value = end_closure(context)
+            step_value = step_closure(context) if step_closure else Number(1)
+            symbol_table = context.symbol_table
+            elements = []
+
+            # Read in the order the Interpreter reads them, so a bad operand fails the same way
+            i = start_value.value
+            step = step_value.value
+            ascending = step >= 0
+            end = end_value.value
+            saved = enter_loop(hoisted, step)
+            try:
+                while (i < end) if ascending else (i > end):
+                    if index is not None:
+                        symbol_table.slots[index] = small_number(i)
+                    else:
+                        symbol_table.set(var_name, small_number(i))
+                    i += step
+                    if inductions: step_inductions(inductions)
+                    try:
+                        value = body_closure(context)
+                    except ClosureContinue:
+                        continue
+                    except ClosureBreak:
+                        break
+                    if collect: elements.append(value)
+            finally:
+                leave_loop(hoisted, saved)
+
+            if collect: return List(elements).set_context(context).set_pos(pos_start, pos_end)
+            return Number.null
+        return for_node
+
+    def compile_WhileNode(self, node, keep):
+        condition_closure = self.compile(node.condition_node)
+        collect = keep and not node.should_return_null
+        body_closure = self.compile(node.body_node, collect)
+        pos_start, pos_end = node.pos_start, node.pos_end
+        hoisted = [hoisted_node.cache for hoisted_node in node.hoisted]
+
+        def while_node(context):
+            elements = []
+            saved = enter_loop(hoisted)
+            try:
+                while is_true(condition_closure(context)):
+                    try:
+                        value = body_closure(context)
+                    except ClosureContinue:
+                        continue
+                    except ClosureBreak:
+                        break
+                    if collect: elements.append(value)
+            finally:
+                leave_loop(hoisted, saved)
+
+            if collect: return List(elements).set_context(context).set_pos(pos_start, pos_end)
+            return Number.null
+        return while_node
+
+    def compile_FuncDefNode(self, node, keep):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        body_node = node.body_node
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        should_auto_return = node.should_auto_return
+        # The body is compiled here, once, and not again on every call
+        layout = function_layout(arg_names, body_node)
+        body_closure = ClosureCompiler(layout).compile_function(body_node, should_auto_return)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def func_def(context):
+            func_value = ClosureFunction(func_name, body_node, arg_names, should_auto_return, body_closure, layout)
+            func_value.set_context(context).set_pos(pos_start, pos_end)
+            if func_name: context.symbol_table.set(func_name, func_value)
+            return func_value
+        return func_def
+
+    def compile_CallNode(self, node, keep):
+        callee_closure = self.compile(node.node_to_call)
+        arg_closures = [self.compile(arg_node) for arg_node in node.arg_nodes]
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        make_call = tail_call_value if node.tail else call_value
+
+        def call(context):
+            value_to_call = callee_closure(context).copy().set_pos(pos_start, pos_end).set_context(context)
+            return make_call(value_to_call, [arg_closure(context) for arg_closure in arg_closures])
+        return call
+
+    def compile_InlineCallNode(self, node, keep):
+        callee = node.node_to_call
+        var_name, var_start, var_end = callee.var_name_tok.value, callee.pos_start, callee.pos_end
+        arg_closures = [self.compile(arg_node) for arg_node in node.arg_nodes]
+        evaluator = compile_inline_number(node.body_node, [tok.value for tok in node.arg_name_toks])
+        body_node = node.body_node
+        pos_start, pos_end = node.pos_start, node.pos_end
+        lookup = self.lookup(var_name)
+
+        def inline_call(context):
+            value = lookup(context)
+            if value is None:
+                raise ClosureError(RTError(var_start, var_end, f"'{var_name}' is not defined", context))
+            args = [arg_closure(context) for arg_closure in arg_closures]
+
+            number = inline_number(evaluator, value, body_node, args, context.symbol_table)
+            if number is not None: return new_number(number, context, pos_start, pos_end)
+            return call_value(value.copy().set_pos(pos_start, pos_end).set_context(context), args)
+        return inline_call
+
+    def compile_ListNode(self, node, keep):
+        element_closures = [self.compile(element_node, keep) for element_node in node.element_nodes]
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        if keep:
+            return lambda context: List([element(context) for element in element_closures]).set_context(context).set_pos(pos_start, pos_end)
+
+        element_closures = [element for element in element_closures if element is not skip]
+        def statements(context):
+            for element in element_closures: element(context)
+        return statements
+
+    def compile_ReturnNode(self, node, keep):
+        # The returned expression is evaluated, but like in the Interpreter the function gives back NULL
+        if node.node_to_return and has_tail_calls(node.node_to_return):
+            tail_closure = self.compile(node.node_to_return)
+
+            def return_tail_call(context):
+                value = tail_closure(context)
+                raise ClosureReturn(value if type(value) is TailCall else None)
+            return return_tail_call
+
+        value_closure = self.compile(node.node_to_return, False) if node.node_to_return else skip
+
+        def return_node(context):
+            value_closure(context)
+            raise ClosureReturn()
+        return return_node
+
+    def compile_ContinueNode(self, node, keep):
+        def continue_node(context):
+            raise ClosureContinue()
+        return continue_node
+
+    def compile_BreakNode(self, node, keep):
+        def break_node(context):
+            raise ClosureBreak()
+        return break_node
+
+    def compile_InvariantNode(self, node, keep):
+        if not keep: return self.compile(node.node, False)
+        expression_closure = self.compile(node.node)
+        cache = node.cache
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def hoisted(context):
+            number = cache[0]
+            if number is not None and cache[1] == rebinds[0]: return new_number(number, context, pos_start, pos_end)
+            value = expression_closure(context)
+            keep_hoisted(node, context.symbol_table, value.value if type(value) is Number else None)
+            return value
+        return hoisted
+
+    compile_InductionNode = compile_InvariantNode
+
+    def compile_raw(self, node):
+        # A closure giving the raw number of a NumericNode's expression, that raises where the Values would do
+        # anything else (see compile_inline_number)
+        kind = type(node).__name__
+        if kind == 'NumberNode':
+            value = node.tok.value
+            return lambda context: value
+
+        if kind == 'VarAccessNode':
+            index = self.number_slot(node)
+            if index is not None: return lambda context: context.symbol_table.slots[index].value
+            lookup = self.lookup(node.var_name_tok.value)
+
+            def raw_variable(context):
+                value = lookup(context)
+                if type(value) is not Number: raise InlineFallback()
+                return value.value
+            return raw_variable
+
+        if kind == 'BinOpNode':
+            method_name = binary_method(node.op_tok)
+            operation = operator.truediv if method_name == 'divided_by' else NUMBER_OPERATIONS[method_name]
+            left = self.compile_raw(node.left_node)
+            if type(node.right_node).__name__ == 'NumberNode':
+                constant = node.right_node.tok.value
+                return lambda context: operation(left(context), constant)
+            right = self.compile_raw(node.right_node)
+            return lambda context: operation(left(context), right(context))
+
+        if kind == 'UnaryOpNode':
+            operand = self.compile_raw(node.node)
+            if node.op_tok.type == TT_MINUS: return lambda context: operand(context) * -1
+            if node.op_tok.matches(TT_KEYWORD, 'NOT'): return lambda context: 1 if operand(context) == 0 else 0
+            return operand
+
+        # An InvariantNode or InductionNode, kept like compile_InvariantNode keeps it
+        expression = self.compile_raw(node.node)
+        cache = node.cache
+
+        def raw_hoisted(context):
+            number = cache[0]
+            if number is not None and cache[1] == rebinds[0]: return number
+            number = expression(context)
+            keep_hoisted(node, context.symbol_table, number)
+            return number
+        return raw_hoisted
+
+    def compile_NumericNode(self, node, keep):
+        if not keep: return self.compile(node.node, False)
+        raw = self.compile_raw(node.node)
+        expression_closure = self.compile(node.node)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def numeric(context):
+            try:
+                number = raw(context)
+            except Exception:
+                return expression_closure(context)
+            return new_number(number, context, pos_start, pos_end)
+        return numeric
+
+
+def tail_call_value(value_to_call, args):
+    # A call in tail position (see TAIL CALLS): a FUN is given back as a TailCall for the caller's call() to make
+    value_type = type(value_to_call)
+    if value_type is ClosureFunction or value_type is RaisingFunction or value_type is Function:
+        return TailCall(value_to_call, args)
+    return call_value(value_to_call, args)
+
+def call_value(value_to_call, args):
+    # The value of a call, with the callee already copied to the call's position and context
+    if type(value_to_call) is ClosureFunction or type(value_to_call) is RaisingFunction:
+        return value_to_call.call(args)
+    response = value_to_call.execute(args)
+    if response.error: raise ClosureError(response.error)
+    if response.loop_should_continue: raise ClosureContinue()
+    if response.loop_should_break: raise ClosureBreak()
+    if response.func_return_value: raise ClosureReturn()
+    return response.value
+
+
+class ClosureFunction(Function):
+    def __init__(self, name, body_node, arg_names, should_auto_return, body_closure, layout):
+        super().__init__(name, body_node, arg_names, should_auto_return)
+        self.body_closure = body_closure
+        self.layout = layout
+        # Set for the compiled tier of an interpreted FUN (see TierProfile.execute_compiled)
+        self.tier = False
+
+    def generate_new_context(self):
+        new_context = Context(self.name, self.context, self.pos_start)
+        new_context.symbol_table = FrameSymbolTable(new_context.parent.symbol_table, self.layout)
+        return new_context
+
+    def call(self, args, tail_ctx=None):
+        # Returns the value or raises, a CONTINUE or BREAK escapes to the caller's loop. Tail calls the body gives
+        # back are made here, one after the other, and returns_null says a RETURN made one of them. tail_ctx is
+        # the Context of the caller when this call is a tail call itself
+        function = self
+        returns_null = False
+
+        while True:
+            exec_ctx = function.generate_new_context()
+            if tail_ctx is not None: elide_tail_caller(exec_ctx, tail_ctx)
+            arg_names = function.arg_names
+            if len(args) != len(arg_names):
+                raise ClosureError(function.check_args(arg_names, args).error)
+            layout = function.layout
+            slots = exec_ctx.symbol_table.slots
+            for arg_name, arg_value in zip(arg_names, args):
+                slots[layout[arg_name]] = arg_value
+
+            returns_null = returns_null or not function.should_auto_return
+            try:
+                value = function.body_closure(exec_ctx)
+            except ClosureReturn as signal:
+                value, returns_null = signal.tail_call, True
+            except RecursionError:
+                raise ClosureError(call_depth_error(function))
+
+            if type(value) is not TailCall: return Number.null if returns_null else value
+            if type(value.function) is not ClosureFunction:
+                if self.tier:
+                    value.returns_null = returns_null
+                    return value
+                value = call_value(value.function, value.args)
+                return Number.null if returns_null else value
+            function, args, tail_ctx = value.function, value.args, exec_ctx
+
+    def execute(self, args, tail_ctx=None):
+        # For callers in the tree Interpreter and the VM
+        response = RTResult()
+        try:
+            return response.success(self.call(args, tail_ctx))
+        except ClosureError as signal:
+            return response.failure(signal.error)
+        except ClosureContinue:
+            return response.success_continue()
+        except ClosureBreak:
+            return response.success_break()
+
+    def copy(self):
+        copy = ClosureFunction(self.name, self.body_node, self.arg_names, self.should_auto_return, self.body_closure, self.layout)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+def run_closures(node):
+    program = ClosureCompiler().compile(node)
+    context = Context('<runningProgram>')
+    context.symbol_table = global_symbol_table
+    try:
+        return program(context), None
+    except ClosureError as signal:
+        return None, signal.error
+    except ClosureSignal:
+        # Like the Interpreter, a RETURN, CONTINUE or BREAK that reaches the top level ends the program with no value
+        return None, None
+
+
+##############################################################################################################
+##                                  TIERED EXECUTION
+##############################################################################################################
+
+# Functions the Interpreter makes start out interpreted. Each FUN definition gets a TierProfile, shared by every
+# copy of the function, that counts calls and loop iterations (back edges) in the body. Once a function is hot
+# (TIER_CALL_THRESHOLD calls or TIER_LOOP_THRESHOLD iterations) its body is compiled to closures once, and from
+# the next call on it runs like a ClosureFunction. A function that is already running keeps running interpreted.
+#
+# The compiled body assumes what the interpreted calls showed: an argument that was a Number in every call (and
+# that the body never assigns) is read straight from its slot. A call that breaks that assumption is run by the
+# Interpreter instead, the compiled body is dropped, and the function has to get hot again before it is compiled
+# without the assumption.
+TIERED_EXECUTION = True
+TIER_CALL_THRESHOLD = 50
+TIER_LOOP_THRESHOLD = 1000
+
+TIER_INTERPRETED = 'interpreted'
+TIER_COMPILED = 'compiled'
+
+# Every profile still in use, for tier_stats()
+tier_profiles = weakref.WeakSet()
+
+class TierProfile:
+    def __init__(self, name):
+        self.name = name
+        self.tier = TIER_INTERPRETED
+        self.calls = 0
+        self.back_edges = 0
+        self.promotions = 0
+        self.deopts = 0
+        # Indexes of the arguments that were a Number in every interpreted call, None before the first call
+        self.number_args = None
+        # The compiled tier: body closure, layout and the argument indexes it expects Numbers at
+        self.body_closure = None
+        self.layout = None
+        self.guards = ()
+        tier_profiles.add(self)
+
+    def enter(self, function, args):
+        # Counts a call, and says whether it runs compiled
+        self.calls += 1
+        if self.tier == TIER_COMPILED:
+            if len(args) != len(function.arg_names) or all(type(args[index]) is Number for index in self.guards): return True
+            self.deoptimize(args)
+            return False
+
+        numbers = {index for index, arg in enumerate(args) if type(arg) is Number}
+        self.number_args = numbers if self.number_args is None else self.number_args & numbers
+        if self.calls >= TIER_CALL_THRESHOLD or self.back_edges >= TIER_LOOP_THRESHOLD:
+            self.promote(function)
+            return True
+        return False
+
+    def promote(self, function):
+        arg_names = function.arg_names
+        self.layout = function_layout(arg_names, function.body_node)
+        assigned = assigned_names(function.body_node, set())
+        # A name given twice only holds the last argument, so it is not worth the bookkeeping
+        self.guards = [index for index in sorted(self.number_args or ()) if index < len(arg_names) and
+            arg_names.count(arg_names[index]) == 1 and arg_names[index] not in assigned]
+        number_names = {arg_names[index] for index in self.guards}
+        self.body_closure = ClosureCompiler(self.layout, number_names).compile_function(function.body_node, function.should_auto_return)
+        self.tier = TIER_COMPILED
+        self.promotions += 1
+
+    def deoptimize(self, args):
+        # The arguments of this call are what the next compile has to allow for
+        self.deopts += 1
+        self.number_args = {index for index in self.guards if type(args[index]) is Number}
+        self.tier = TIER_INTERPRETED
+        self.body_closure = self.layout = None
+        self.guards = ()
+        self.calls = self.back_edges = 0
+
+    def execute_compiled(self, function, args, tail_ctx=None):
+        # tail_ctx: the Context of the caller when this is a tail call (see TAIL CALLS)
+        compiled = ClosureFunction(function.name, function.body_node, function.arg_names, function.should_auto_return, self.body_closure, self.layout)
+        compiled.set_context(function.context).set_pos(function.pos_start, function.pos_end)
+        compiled.tier = True
+        return compiled.execute(args, tail_ctx)
+
+    def __repr__(self):
+        return (f'<{self.name}: {self.tier}, {self.calls} calls, {self.back_edges} back edges, '
+            f'{self.promotions} promotions, {self.deopts} deopts>')
+
+def tier_stats():
+    # The profile of every function still alive, to see what got compiled (and what fell back)
+    return sorted(tier_profiles, key=lambda profile: profile.name)
+
+
+##############################################################################################################
+##                                  EXCEPTION INTERPRETER
+##############################################################################################################
+
+# The tree walk without RTResults: a visit gives back the node's Value, and anything else leaves it as one of
+# the closure engine's exceptions, a runtime error as a ClosureError carrying its RTError and RETURN, CONTINUE
+# and BREAK as ClosureReturn, ClosureContinue and ClosureBreak. Loops and calls catch what they handle, the
+# rest goes up by itself, so no visit has to check what its children gave. Values that still work with
+# RTResults (built-in functions, FUNs made by another engine) are called through call_value.
+class RaisingInterpreter:
+    # visit_<name> method by node class, flat view classes share the names but not the classes
+    visitors = {}
+
+    def visit(self, node, context):
+        visitor = self.visitors.get(type(node))
+        if visitor is None: visitor = self.visitors[type(node)] = getattr(RaisingInterpreter, f'visit_{type(node).__name__}')
+        return visitor(self, node, context)
+
+    def visit_NumberNode(self, node, context):
+        return new_number(node.tok.value, context, node.pos_start, node.pos_end)
+
+    def visit_StringNode(self, node, context):
+        return String(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_VarAccessNode(self, node, context):
+        var_name = node.var_name_tok.value
+        value = context.symbol_table.get(var_name)
+        if value is None:
+            raise ClosureError(RTError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context))
+        return value
+
+    def visit_VarAssignNode(self, node, context):
+        value = self.visit(node.value_node, context)
+        context.symbol_table.set(node.var_name_tok.value, value)
+        return value
+
+    def visit_BinOpNode(self, node, context):
+        left = self.visit(node.left_node, context)
+        right = self.visit(node.right_node, context)
+        method_name = binary_method(node.op_tok)
+        result, error = getattr(left, method_name)(right)
+        if error: raise ClosureError(operation_error(context, method_name, left, node.left_node, right, node.right_node))
+        return result
+
+    def visit_UnaryOpNode(self, node, context):
+        value = self.visit(node.node, context)
+        if node.op_tok.type == TT_MINUS:
+            number, error = value.multiplied_by(Number(-1))
+            if error: raise ClosureError(operation_error(context, 'multiplied_by', value, node.node, Number(-1)))
+            return number
+        if node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            number, error = value.notted()
+            if error: raise ClosureError(operation_error(context, 'notted', value, node.node))
+            return number
+        return value
+
+    def visit_IfNode(self, node, context):
+        for condition, expr, should_return_null in node.cases:
+            if self.visit(condition, context).is_true():
+                value = self.visit(expr, context)
+                return Number.null if should_return_null else value
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            value = self.visit(expr, context)
+            return Number.null if should_return_null else value
+        return Number.null
+
+    def visit_ForNode(self, node, context):
+        start_value = self.visit(node.start_value_node, context)
+        end_value = self.visit(node.end_value_node, context)
+        step_value = self.visit(node.step_value_node, context) if node.step_value_node else Number(1)
+        var_name, body_node = node.var_name_tok.value, node.body_node
+        symbol_table = context.symbol_table
+        elements = []
+
+        i = start_value.value
+        ascending = step_value.value >= 0
+        hoisted = [hoisted_node.cache for hoisted_node in node.hoisted]
+        inductions = [cache for cache in hoisted if len(cache) > 2]
+        saved = enter_loop(hoisted, step_value.value)
+        try:
+            while (i < end_value.value) if ascending else (i > end_value.value):
+                symbol_table.set(var_name, small_number(i))
+                i += step_value.value
+                if inductions: step_inductions(inductions)
+                try:
+                    value = self.visit(body_node, context)
+                except ClosureContinue:
+                    continue
+                except ClosureBreak:
+                    break
+                elements.append(value)
+        finally:
+            leave_loop(hoisted, saved)
+
+        return Number.null if node.should_return_null else List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_WhileNode(self, node, context):
+        # A CONTINUE or BREAK in the condition is not this loop's, it is outside the try
+        condition_node, body_node = node.condition_node, node.body_node
+        elements = []
+        hoisted = [hoisted_node.cache for hoisted_node in node.hoisted]
+        saved = enter_loop(hoisted)
+        try:
+            while self.visit(condition_node, context).is_true():
+                try:
+                    value = self.visit(body_node, context)
+                except ClosureContinue:
+                    continue
+                except ClosureBreak:
+                    break
+                elements.append(value)
+        finally:
+            leave_loop(hoisted, saved)
+
+        return Number.null if node.should_return_null else List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_FuncDefNode(self, node, context):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        func_value = RaisingFunction(func_name, node.body_node, arg_names, node.should_auto_return).set_context(context).set_pos(node.pos_start, node.pos_end)
+        if node.var_name_tok: context.symbol_table.set(func_name, func_value)
+        return func_value
+
+    def visit_CallNode(self, node, context):
+        value_to_call = self.visit(node.node_to_call, context).copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+        args = [self.visit(arg_node, context) for arg_node in node.arg_nodes]
+        if node.tail: return tail_call_value(value_to_call, args)
+        return call_value(value_to_call, args)
+
+    def visit_ListNode(self, node, context):
+        elements = [self.visit(element_node, context) for element_node in node.element_nodes]
+        return List(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def visit_ReturnNode(self, node, context):
+        # The returned expression is evaluated, but like in the Interpreter the function gives back NULL
+        value = self.visit(node.node_to_return, context) if node.node_to_return else None
+        raise ClosureReturn(value if type(value) is TailCall else None)
+
+    def visit_ContinueNode(self, node, context):
+        raise ClosureContinue()
+
+    def visit_BreakNode(self, node, context):
+        raise ClosureBreak()
+
+    def visit_InlineCallNode(self, node, context):
+        callee = node.node_to_call
+        var_name = callee.var_name_tok.value
+        value = context.symbol_table.get(var_name)
+        if value is None:
+            raise ClosureError(RTError(callee.pos_start, callee.pos_end, f"'{var_name}' is not defined", context))
+        args = [self.visit(arg_node, context) for arg_node in node.arg_nodes]
+
+        number = inline_number(inline_evaluator(node), value, node.body_node, args, context.symbol_table)
+        if number is not None: return new_number(number, context, node.pos_start, node.pos_end)
+        value_to_call = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+        return call_value(value_to_call, args)
+
+    def visit_InvariantNode(self, node, context):
+        number = hoisted_number(node.cache)
+        if number is not None: return new_number(number, context, node.pos_start, node.pos_end)
+        value = self.visit(node.node, context)
+        keep_hoisted(node, context.symbol_table, value.value if type(value) is Number else None)
+        return value
+
+    visit_InductionNode = visit_InvariantNode
+
+    def visit_NumericNode(self, node, context):
+        number = numeric_number(node, context.symbol_table)
+        if number is not None: return new_number(number, context, node.pos_start, node.pos_end)
+        return self.visit(node.node, context)
+
+
+class RaisingFunction(Function):
+    # A FUN the RaisingInterpreter made. Its calls get a plain SymbolTable like an Interpreter FUN's, and
+    # call_value makes them without an RTResult
+    def call(self, args):
+        # Returns the value or raises, a CONTINUE or BREAK escapes to the caller's loop. Tail calls are made
+        # here, like ClosureFunction.call makes them
+        function = self
+        returns_null = False
+        tail_ctx = None
+
+        while True:
+            exec_ctx = function.generate_new_context()
+            if tail_ctx is not None: elide_tail_caller(exec_ctx, tail_ctx)
+            if len(args) != len(function.arg_names):
+                raise ClosureError(function.check_args(function.arg_names, args).error)
+            function.populate_args(function.arg_names, args, exec_ctx)
+
+            returns_null = returns_null or not function.should_auto_return
+            try:
+                value = RaisingInterpreter().visit(function.body_node, exec_ctx)
+            except ClosureReturn as signal:
+                value, returns_null = signal.tail_call, True
+            except RecursionError:
+                raise ClosureError(call_depth_error(function))
+
+            if type(value) is not TailCall: return Number.null if returns_null else value
+            if type(value.function) is not RaisingFunction:
+                value = call_value(value.function, value.args)
+                return Number.null if returns_null else value
+            function, args, tail_ctx = value.function, value.args, exec_ctx
+
+    def execute(self, args):
+        # For callers that work with RTResults
+        response = RTResult()
+        try:
+            return response.success(self.call(args))
+        except ClosureError as signal:
+            return response.failure(signal.error)
+        except ClosureContinue:
+            return response.success_continue()
+        except ClosureBreak:
+            return response.success_break()
+
+    def copy(self):
+        copy = RaisingFunction(self.name, self.body_node, self.arg_names, self.should_auto_return)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+def run_raising(node):
+    context = Context('<runningProgram>')
+    context.symbol_table = global_symbol_table
+    try:
+        return RaisingInterpreter().visit(node, context), None
+    except ClosureError as signal:
+        return None, signal.error
+    except ClosureSignal:
+        # Like the Interpreter, a RETURN, CONTINUE or BREAK that reaches the top level ends the program with no value
+        return None, None
+
+
+##############################################################################################################
+##                                  PYTHON TRANSPILER
+##############################################################################################################
+
+# The program is written out as Python source, one def per FUN body plus one for the top level, and run with
+# compile() and exec(), so CPython's own bytecode runs the loops. The generated code uses the same Values,
+# Contexts and FrameSymbolTables as the closure engine (FUN values are ClosureFunctions whose body is a
+# generated def), resolves names the same way (see SCOPE RESOLUTION) and raises the same ClosureSignals, so
+# results, positions and error messages match the Interpreter. On top of that:
+#   - every node's value goes into a temporary, so the order things happen in is the order of the tree
+#   - FOR and WHILE become Python loops, and a CONTINUE or BREAK in their body becomes continue or break.
+#     Loop bodies with calls in them still catch the signals a callee can let escape
+#   - operators on two Numbers work on the raw values
+# Positions are plain offsets, so they are written into the code as numbers. Other objects the code needs
+# (FUN bodies, layouts, caches) are passed in as the globals K1, K2, ...
+#
+# Set PYTHON_OUTPUT_DIR (or EASYCODE_PY_DIR in the environment) to a folder to have every transpiled program
+# written there as <script name>.py, to read what was generated.
+PYTHON_OUTPUT_DIR = os.environ.get('EASYCODE_PY_DIR')
+
+# Number operators on raw values, and as a condition (where the 1/0 result does not need to be made)
+PYTHON_OPERATORS = {
+    'added_to': '{} + {}', 'subtracted_by': '{} - {}', 'multiplied_by': '{} * {}', 'divided_by': '{} / {}',
+    'power_of': '{} ** {}',
+    'get_comparison_equals': 'int({} == {})', 'get_comparison_notEquals': 'int({} != {})',
+    'get_comparison_lessThan': 'int({} < {})', 'get_comparison_greaterThan': 'int({} > {})',
+    'get_comparison_lessThanEquals': 'int({} <= {})', 'get_comparison_greaterThanEquals': 'int({} >= {})',
+    'and_comparedTo': 'int({} and {})', 'or_comparedTo': 'int({} or {})',
+}
+PYTHON_CONDITIONS = {
+    'get_comparison_equals': '{} == {}', 'get_comparison_notEquals': '{} != {}',
+    'get_comparison_lessThan': '{} < {}', 'get_comparison_greaterThan': '{} > {}',
+    'get_comparison_lessThanEquals': '{} <= {}', 'get_comparison_greaterThanEquals': '{} >= {}',
+    'and_comparedTo': 'int({} and {}) != 0', 'or_comparedTo': 'int({} or {}) != 0',
+}
+
+# RUNTIME
+# Generated code calls these for anything that is not worth writing out inline
+def py_missing(context, var_name, pos_start, pos_end):
+    # A variable with no slot value yet, or a global, found the slow way
+    value = context.symbol_table.get(var_name)
+    if value is None:
+        raise ClosureError(RTError(pos_start, pos_end, f"'{var_name}' is not defined", context))
+    return value
+
+def py_free(context, var_name, pos_start, pos_end):
+    # A free name in a FUN body, found through the table's bound and found (see SYMBOL TABLE)
+    symbol_table = context.symbol_table
+    value = symbol_table.symbols.get(var_name)
+    if value is None: value = symbol_table.above(var_name)
+    if value is None:
+        raise ClosureError(RTError(pos_start, pos_end, f"'{var_name}' is not defined", context))
+    return value
+
+def py_copy(value, context, pos_start, pos_end):
+    # The copy of a callee a call runs with
+    return value.copy().set_pos(pos_start, pos_end).set_context(context)
+
+def py_binary(left, method_name, right, context, left_node, right_node):
+    result, error = getattr(left, method_name)(right)
+    if error: raise ClosureError(operation_error(context, method_name, left, left_node, right, right_node))
+    return result
+
+def py_negate(value, context, node):
+    number, error = value.multiplied_by(Number(-1))
+    if error: raise ClosureError(operation_error(context, 'multiplied_by', value, node, Number(-1)))
+    return number
+
+def py_not(value, context, node):
+    number, error = value.notted()
+    if error: raise ClosureError(operation_error(context, 'notted', value, node))
+    return number
+
+def py_for_range(start_value, end_value, step_value):
+    # The numbers a FOR loop counts through, read in the order the Interpreter reads them
+    i = start_value.value
+    step = step_value.value if step_value is not None else 1
+    ascending = step >= 0
+    end = end_value.value
+    if type(i) is int and type(step) is int and type(end) is int and step: return range(i, end, step)
+    return py_count(i, end, step, ascending)
+
+def py_count(i, end, step, ascending):
+    while (i < end) if ascending else (i > end):
+        yield i
+        i += step
+
+PYTHON_RUNTIME = {
+    'Number': Number, 'String': String, 'List': List, 'NULL': Number.null, 'ClosureFunction': ClosureFunction,
+    'ClosureError': ClosureError, 'ClosureReturn': ClosureReturn, 'ClosureContinue': ClosureContinue,
+    'ClosureBreak': ClosureBreak, 'RTError': RTError, 'new_number': new_number, 'small_number': small_number,
+    'is_true': is_true, 'call_value': call_value, 'tail_call_value': tail_call_value, 'inline_number': inline_number, 'rebinds': rebinds,
+    'keep_hoisted': keep_hoisted, 'enter_loop': enter_loop, 'leave_loop': leave_loop, 'step_inductions': step_inductions,
+    'py_missing': py_missing, 'py_free': py_free, 'py_copy': py_copy,
+    'py_binary': py_binary, 'py_negate': py_negate, 'py_not': py_not, 'py_for_range': py_for_range,
+    'InlineFallback': InlineFallback,
+}
+
+def loop_needs_try(node):
+    # Whether a loop body can get a CONTINUE or BREAK as an exception: from a call, or from the condition of
+    # a WHILE inside it (which is outside that WHILE's Python loop). Not inside FUN bodies, those are not run here
+    kind = type(node).__name__
+    if kind in ('CallNode', 'InlineCallNode'): return True
+    if kind == 'FuncDefNode': return False
+    if kind == 'WhileNode' and has_loop_signal(node.condition_node): return True
+    return any(loop_needs_try(child) for child in ast_children(node))
+
+def has_loop_signal(node):
+    kind = type(node).__name__
+    if kind in ('ContinueNode', 'BreakNode'): return True
+    if kind == 'FuncDefNode': return False
+    return any(has_loop_signal(child) for child in ast_children(node))
+
+
+# TRANSPILER
+# emit(node, keep) writes the statements of a node into the def being written and gives a Python expression for
+# its value, which has to be used before any other statement is written (value() puts it in a temporary). Like in
+# the ClosureCompiler, nothing is made for values nobody reads (keep unset), and then the result may be None.
+class PythonTranspiler:
+    def __init__(self):
+        self.namespace = dict(PYTHON_RUNTIME)
+        self.constants = {}
+        self.functions = []
+        self.def_count = 0
+        # State of the def being written
+        self.lines = None
+        self.depth = 0
+        self.temps = 0
+        self.layout = None
+        self.in_loop = False
+
+    def transpile(self, node):
+        # The module source, with a def program(context) that runs the top level
+        self.write_def('program', node, True, None)
+        return '\n\n'.join(self.functions) + '\n'
+
+    def write_def(self, def_name, body_node, keep, layout):
+        saved = self.lines, self.depth, self.temps, self.layout, self.in_loop
+        self.lines, self.depth, self.temps, self.layout, self.in_loop = [], 1, 0, layout, False
+        if layout is None:
+            self.line('symbols = context.symbol_table.symbols')
+        else:
+            self.line('table = context.symbol_table')
+            self.line('slots = table.slots')
+        value = self.emit(body_node, keep)
+        if keep: self.line(f'return {value}')
+        self.functions.append(f'def {def_name}(context):\n' + '\n'.join(self.lines))
+        self.lines, self.depth, self.temps, self.layout, self.in_loop = saved
+
+    # Writing
+    def line(self, text):
+        self.lines.append('    ' * self.depth + text)
+
+    def open_block(self, header):
+        self.line(header)
+        self.depth += 1
+        return len(self.lines)
+
+    def close_block(self, start):
+        if len(self.lines) == start: self.line('pass')
+        self.depth -= 1
+
+    def temp(self):
+        self.temps += 1
+        return f'_{self.temps}'
+
+    def value(self, node):
+        # The name of a temporary holding node's value
+        expression = self.emit(node)
+        if expression.startswith('_') and expression.isidentifier(): return expression
+        result = self.temp()
+        self.line(f'{result} = {expression}')
+        return result
+
+    def constant(self, value):
+        name = self.constants.get(id(value))
+        if name is None:
+            name = self.constants[id(value)] = f'K{len(self.constants) + 1}'
+            self.namespace[name] = value
+        return name
+
+    def number(self, value):
+        # A literal for a number, except for the inf or nan folding can give, which have none
+        if type(value) is float and not math.isfinite(value): return self.constant(value)
+        return repr(value)
+
+    # Names
+    def slot(self, var_name):
+        return self.layout.get(var_name) if self.layout is not None else None
+
+    def lookup(self, node):
+        # An expression giving the Value a VarAccessNode reads (not copied), failing like the access would
+        var_name, pos_start, pos_end = node.var_name_tok.value, node.pos_start, node.pos_end
+        index = self.slot(var_name)
+        if index is not None:
+            return f'(slots[{index}] or py_missing(context, {var_name!r}, {pos_start!r}, {pos_end!r}))'
+        if self.layout is not None:
+            # The common case inline: a global, which no table between this one and the root binds
+            return (f'((table.root.symbols.get({var_name!r}) if {var_name!r} not in table.bound and not table.symbols '
+                f'else py_free(context, {var_name!r}, {pos_start!r}, {pos_end!r})) '
+                f'or py_missing(context, {var_name!r}, {pos_start!r}, {pos_end!r}))')
+        return f'(symbols.get({var_name!r}) or py_missing(context, {var_name!r}, {pos_start!r}, {pos_end!r}))'
+
+    def store(self, var_name, value):
+        index = self.slot(var_name)
+        if index is not None:
+            self.line(f'slots[{index}] = {value}')
+        else:
+            self.line(f'context.symbol_table.set({var_name!r}, {value})')
+
+    def emit(self, node, keep=True):
+        method = getattr(self, f'emit_{type(node).__name__}')
+        return method(node, keep)
+
+    # Nodes
+    def emit_NumberNode(self, node, keep):
+        if not keep: return None
+        return f'new_number({self.number(node.tok.value)}, context, {node.pos_start!r}, {node.pos_end!r})'
+
+    def emit_StringNode(self, node, keep):
+        if not keep: return None
+        return f'String({node.tok.value!r}).set_context(context).set_pos({node.pos_start!r}, {node.pos_end!r})'
+
+    def emit_VarAccessNode(self, node, keep):
+        # The lookup can still fail, so it is made even when the value is not used
+        result = self.temp()
+        self.line(f'{result} = {self.lookup(node)}')
+        return result
+
+    def emit_VarAssignNode(self, node, keep):
+        result = self.value(node.value_node)
+        self.store(node.var_name_tok.value, result)
+        return result
+
+    def binary_parts(self, node):
+        # Writes both operands, and gives what the fast path (two Numbers) and the slow path need
+        method_name = binary_method(node.op_tok)
+        left = self.value(node.left_node)
+        right_node = node.right_node
+        constant = right_node.tok.value if type(right_node).__name__ == 'NumberNode' else None
+
+        if constant is not None:
+            # Like `i + 1`: the literal only becomes a Number when the slow path needs one
+            fast = f'type({left}) is Number'
+            right_value = f'({self.number(constant)})'
+            right = f'new_number({self.number(constant)}, context, {right_node.pos_start!r}, {right_node.pos_end!r})'
+            if method_name == 'divided_by' and constant == 0: fast = None
+        else:
+            right = self.value(right_node)
+            fast = f'type({left}) is Number and type({right}) is Number'
+            right_value = f'{right}.value'
+            if method_name == 'divided_by': fast += f' and {right}.value != 0'
+
+        slow = f'py_binary({left}, {method_name!r}, {right}, context, {self.constant(node.left_node)}, {self.constant(right_node)})'
+        return method_name, fast, f'{left}.value', right_value, slow
+
+    def emit_BinOpNode(self, node, keep):
+        method_name, fast, left_value, right_value, slow = self.binary_parts(node)
+        result = self.temp()
+        if fast is None:
+            self.line(f'{result} = {slow}')
+            return result
+
+        block = self.open_block(f'if {fast}:')
+        value = PYTHON_OPERATORS[method_name].format(left_value, right_value)
+        self.line(f'{result} = new_number({value}, context, {node.pos_start!r}, {node.pos_end!r})')
+        self.close_block(block)
+        block = self.open_block('else:')
+        self.line(f'{result} = {slow}')
+        self.close_block(block)
+        return result
+
+    def condition(self, node):
+        # The name of a Python bool saying whether node's value is true
+        result = self.temp()
+        if type(node).__name__ == 'BinOpNode' and binary_method(node.op_tok) in PYTHON_CONDITIONS:
+            method_name, fast, left_value, right_value, slow = self.binary_parts(node)
+            block = self.open_block(f'if {fast}:')
+            self.line(f'{result} = ' + PYTHON_CONDITIONS[method_name].format(left_value, right_value))
+            self.close_block(block)
+            block = self.open_block('else:')
+            self.line(f'{result} = is_true({slow})')
+            self.close_block(block)
+            return result
+
+        if type(node).__name__ == 'NumericNode':
+            block = self.open_block('try:')
+            expression = node.node
+            reads = {}
+            if type(expression).__name__ == 'BinOpNode' and binary_method(expression.op_tok) in PYTHON_CONDITIONS and \
+                expression.op_tok.type != TT_KEYWORD:
+                left, right = self.raw(expression.left_node, reads), self.raw(expression.right_node, reads)
+                self.line(f'{result} = ' + PYTHON_CONDITIONS[binary_method(expression.op_tok)].format(left, right))
+            else:
+                self.line(f'{result} = {self.raw(expression, reads)} != 0')
+            self.close_block(block)
+            block = self.open_block('except Exception:')
+            value = self.value(expression)
+            self.line(f'{result} = {value}.value != 0 if type({value}) is Number else {value}.is_true()')
+            self.close_block(block)
+            return result
+
+        value = self.value(node)
+        self.line(f'{result} = {value}.value != 0 if type({value}) is Number else {value}.is_true()')
+        return result
+
+    def emit_UnaryOpNode(self, node, keep):
+        value = self.value(node.node)
+        pos = f'{node.pos_start!r}, {node.pos_end!r}'
+        operand = self.constant(node.node)
+        result = self.temp()
+
+        if node.op_tok.type == TT_MINUS:
+            self.line(f'{result} = new_number({value}.value * -1, context, {pos}) if type({value}) is Number else py_negate({value}, context, {operand})')
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            self.line(f'{result} = py_not({value}, context, {operand})')
+        else:
+            # A unary plus gives back its operand as it is
+            return value
+        return result
+
+    def emit_branch(self, body_node, should_return_null, keep, result):
+        value = self.emit(body_node, keep and not should_return_null)
+        if keep: self.line(f'{result} = {"NULL" if should_return_null else value}')
+
+    def emit_IfNode(self, node, keep):
+        # Every ELIF is an if inside the else of the one before it, as its condition may need statements of its own
+        result = self.temp() if keep else None
+        blocks = []
+        for condition, expr, should_return_null in node.cases:
+            truth = self.condition(condition)
+            block = self.open_block(f'if {truth}:')
+            self.emit_branch(expr, should_return_null, keep, result)
+            self.close_block(block)
+            blocks.append(self.open_block('else:'))
+
+        if node.else_case:
+            expr, should_return_null = node.else_case
+            self.emit_branch(expr, should_return_null, keep, result)
+        elif keep:
+            self.line(f'{result} = NULL')
+        for block in reversed(blocks): self.close_block(block)
+        return result
+
+    def emit_loop_body(self, body_node, collect, elements):
+        # The body of a Python loop, with CONTINUE and BREAK as continue and break
+        saved = self.in_loop
+        self.in_loop = True
+        if loop_needs_try(body_node):
+            block = self.open_block('try:')
+            value = self.emit(body_node, collect)
+            if collect: self.line(f'{elements}.append({value})')
+            self.close_block(block)
+            block = self.open_block('except ClosureContinue:')
+            self.line('continue')
+            self.close_block(block)
+            block = self.open_block('except ClosureBreak:')
+            self.line('break')
+            self.close_block(block)
+        else:
+            value = self.emit(body_node, collect)
+            if collect: self.line(f'{elements}.append({value})')
+        self.in_loop = saved
+
+    def loop_result(self, collect, elements, node):
+        if not collect: return 'NULL'
+        return f'List({elements}).set_context(context).set_pos({node.pos_start!r}, {node.pos_end!r})'
+
+    def emit_ForNode(self, node, keep):
+        start = self.value(node.start_value_node)
+        end = self.value(node.end_value_node)
+        step = self.value(node.step_value_node) if node.step_value_node else 'None'
+        collect = keep and not node.should_return_null
+        elements = self.temp()
+        if collect: self.line(f'{elements} = []')
+
+        counter = self.temp()
+        numbers = self.temp()
+        self.line(f'{numbers} = py_for_range({start}, {end}, {step})')
+        hoisted = self.enter_loop(node, f'{step}.value' if node.step_value_node else '1')
+        block = self.open_block(f'for {counter} in {numbers}:')
+        self.store(node.var_name_tok.value, f'small_number({counter})')
+        inductions = [hoisted_node.cache for hoisted_node in node.hoisted if type(hoisted_node).__name__ == 'InductionNode']
+        if inductions: self.line(f'step_inductions({self.constant(inductions)})')
+        self.emit_loop_body(node.body_node, collect, elements)
+        self.close_block(block)
+        self.leave_loop(hoisted)
+        return self.loop_result(collect, elements, node)
+
+    def emit_WhileNode(self, node, keep):
+        collect = keep and not node.should_return_null
+        elements = self.temp()
+        if collect: self.line(f'{elements} = []')
+
+        hoisted = self.enter_loop(node, 'None')
+        block = self.open_block('while True:')
+        # A CONTINUE or BREAK in the condition belongs to the loop around this one, so it is raised
+        saved = self.in_loop
+        self.in_loop = False
+        truth = self.condition(node.condition_node)
+        self.in_loop = saved
+        check = self.open_block(f'if not {truth}:')
+        self.line('break')
+        self.close_block(check)
+        self.emit_loop_body(node.body_node, collect, elements)
+        self.close_block(block)
+        self.leave_loop(hoisted)
+        return self.loop_result(collect, elements, node)
+
+    def enter_loop(self, node, step):
+        # The pre-header of a loop with hoisted nodes, which opens the try whose finally leave_loop writes. Gives
+        # what leave_loop needs, None for a loop without any
+        if not node.hoisted: return None
+        caches = self.constant([hoisted_node.cache for hoisted_node in node.hoisted])
+        saved = self.temp()
+        self.line(f'{saved} = enter_loop({caches}, {step})')
+        return caches, saved, self.open_block('try:')
+
+    def leave_loop(self, hoisted):
+        if hoisted is None: return
+        caches, saved, block = hoisted
+        self.close_block(block)
+        block = self.open_block('finally:')
+        self.line(f'leave_loop({caches}, {saved})')
+        self.close_block(block)
+
+    def emit_FuncDefNode(self, node, keep):
+        func_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        layout = function_layout(arg_names, node.body_node)
+        self.def_count += 1
+        def_name = f'f{self.def_count}_{func_name if func_name and func_name.isidentifier() else "anonymous"}'
+        # The body's def is written now, next to (not inside) the def being written
+        self.write_def(def_name, node.body_node, node.should_auto_return, layout)
+
+        result = self.temp()
+        self.line(f'{result} = ClosureFunction({func_name!r}, {self.constant(node.body_node)}, {self.constant(arg_names)}, '
+            f'{node.should_auto_return!r}, {def_name}, {self.constant(layout)}).set_context(context).set_pos({node.pos_start!r}, {node.pos_end!r})')
+        if func_name: self.store(func_name, result)
+        return result
+
+    def emit_CallNode(self, node, keep):
+        pos = f'{node.pos_start!r}, {node.pos_end!r}'
+        value_to_call = self.temp()
+        self.line(f'{value_to_call} = py_copy({self.emit(node.node_to_call)}, context, {pos})')
+        args = self.arguments(node.arg_nodes)
+        result = self.temp()
+        self.line(f'{result} = {"tail_call_value" if node.tail else "call_value"}({value_to_call}, [{args}])')
+        return result
+
+    def arguments(self, arg_nodes):
+        return ', '.join([self.value(arg_node) for arg_node in arg_nodes])
+
+    def emit_InlineCallNode(self, node, keep):
+        pos = f'{node.pos_start!r}, {node.pos_end!r}'
+        value = self.temp()
+        self.line(f'{value} = {self.lookup(node.node_to_call)}')
+        args = self.arguments(node.arg_nodes)
+        evaluator = self.constant(compile_inline_number(node.body_node, [tok.value for tok in node.arg_name_toks]))
+        result = self.temp()
+        self.line(f'{result} = inline_number({evaluator}, {value}, {self.constant(node.body_node)}, [{args}], context.symbol_table)')
+        block = self.open_block(f'if {result} is not None:')
+        self.line(f'{result} = new_number({result}, context, {pos})')
+        self.close_block(block)
+        block = self.open_block('else:')
+        self.line(f'{result} = call_value(py_copy({value}, context, {pos}), [{args}])')
+        self.close_block(block)
+        return result
+
+    def emit_ListNode(self, node, keep):
+        if not keep:
+            for element_node in node.element_nodes: self.emit(element_node, False)
+            return None
+        elements = self.arguments(node.element_nodes)
+        return f'List([{elements}]).set_context(context).set_pos({node.pos_start!r}, {node.pos_end!r})'
+
+    def emit_ReturnNode(self, node, keep):
+        # The returned expression is evaluated, but like in the Interpreter the function gives back NULL. A tail
+        # call it makes is given back for ClosureFunction.call to make, which knows a block FUN gives NULL
+        if node.node_to_return and has_tail_calls(node.node_to_return):
+            self.line(f'return {self.emit(node.node_to_return)}')
+            return 'NULL'
+        if node.node_to_return: self.emit(node.node_to_return, False)
+        self.line('raise ClosureReturn()' if self.layout is None else 'return NULL')
+        return 'NULL'
+
+    def emit_ContinueNode(self, node, keep):
+        self.line('continue' if self.in_loop else 'raise ClosureContinue()')
+        return 'NULL'
+
+    def emit_BreakNode(self, node, keep):
+        self.line('break' if self.in_loop else 'raise ClosureBreak()')
+        return 'NULL'
+
+    def emit_InvariantNode(self, node, keep):
+        if not keep: return self.emit(node.node, False)
+        cache = self.constant(node.cache)
+        result = self.temp()
+        self.line(f'{result} = {cache}[0]')
+        block = self.open_block(f'if {result} is not None and {cache}[1] == rebinds[0]:')
+        self.line(f'{result} = new_number({result}, context, {node.pos_start!r}, {node.pos_end!r})')
+        self.close_block(block)
+        block = self.open_block('else:')
+        self.line(f'{result} = {self.emit(node.node)}')
+        self.line(f'keep_hoisted({self.constant(node)}, context.symbol_table, {result}.value if type({result}) is Number else None)')
+        self.close_block(block)
+        return result
+
+    emit_InductionNode = emit_InvariantNode
+
+    def raw(self, node, reads):
+        # A Python expression for the raw number of a NumericNode's expression, written inside its try. Each
+        # variable is read once (reads has the temporaries), and raises InlineFallback unless it holds a Number
+        kind = type(node).__name__
+        if kind == 'NumberNode': return f'({self.number(node.tok.value)})'
+
+        if kind == 'VarAccessNode':
+            var_name = node.var_name_tok.value
+            if var_name not in reads:
+                value = reads[var_name] = self.temp()
+                self.line(f'{value} = {self.lookup(node)}')
+                self.line(f'if type({value}) is not Number: raise InlineFallback()')
+            return f'{reads[var_name]}.value'
+
+        if kind == 'BinOpNode':
+            method_name = binary_method(node.op_tok)
+            left, right = self.raw(node.left_node, reads), self.raw(node.right_node, reads)
+            if method_name in BINARY_KEYWORD_METHODS.values():
+                # Python's and/or would skip the right side, which still has to fail if it fails
+                value = self.temp()
+                self.line(f'{value} = {right}')
+                right = value
+            return '(' + PYTHON_OPERATORS[method_name].format(left, right) + ')'
+
+        if kind == 'UnaryOpNode':
+            operand = self.raw(node.node, reads)
+            if node.op_tok.type == TT_MINUS: return f'({operand} * -1)'
+            if node.op_tok.matches(TT_KEYWORD, 'NOT'): return f'(1 if {operand} == 0 else 0)'
+            return operand
+
+        # An InvariantNode or InductionNode, kept like emit_InvariantNode keeps it. Its expression only runs in the
+        # else, so the variables it reads there are not in reads
+        cache = self.constant(node.cache)
+        result = self.temp()
+        self.line(f'{result} = {cache}[0]')
+        block = self.open_block(f'if {result} is None or {cache}[1] != rebinds[0]:')
+        self.line(f'{result} = {self.raw(node.node, {})}')
+        self.line(f'keep_hoisted({self.constant(node)}, context.symbol_table, {result})')
+        self.close_block(block)
+        return result
+
+    def emit_NumericNode(self, node, keep):
+        if not keep: return self.emit(node.node, False)
+        result = self.temp()
+        block = self.open_block('try:')
+        self.line(f'{result} = new_number({self.raw(node.node, {})}, context, {node.pos_start!r}, {node.pos_end!r})')
+        self.close_block(block)
+        block = self.open_block('except Exception:')
+        self.line(f'{result} = {self.emit(node.node)}')
+        self.close_block(block)
+        return result
+
+
+def transpile_python(node):
+    # (Python source, the globals it runs with)
+    transpiler = PythonTranspiler()
+    return transpiler.transpile(node), transpiler.namespace
+
+def write_python(source, node):
+    name = os.path.basename(find_source(node.pos_start).fn) if node.pos_start is not None else 'program'
+    os.makedirs(PYTHON_OUTPUT_DIR, exist_ok=True)
+    with open(os.path.join(PYTHON_OUTPUT_DIR, name.strip('<>') + '.py'), 'w') as f:
+        f.write(f'# Transpiled from {name} (runs with the constants K1, K2, ... given by run_python)\n\n{source}')
+
+def run_python(node):
+    try:
+        source, namespace = transpile_python(node)
+        code = compile(source, '<easycode>', 'exec')
+    except (SyntaxError, RecursionError, MemoryError):
+        # Nesting deeper than CPython allows in one function (blocks or indentation), which closures do not mind
+        return run_closures(node)
+    if PYTHON_OUTPUT_DIR: write_python(source, node)
+    exec(code, namespace)
+
+    context = Context('<runningProgram>')
+    context.symbol_table = global_symbol_table
+    try:
+        return namespace['program'](context), None
+    except ClosureError as signal:
+        return None, signal.error
+    except ClosureSignal:
+        # Like the Interpreter, a RETURN, CONTINUE or BREAK that reaches the top level ends the program with no value
+        return None, None
+
 
 ##############################################################################################################
 ##                                     RUN CODE
@@ -1968,27 +5714,135 @@ global_symbol_table.set("IS_FUN", BuiltInFunction.is_function)
 global_symbol_table.set("APPEND", BuiltInFunction.append)
 global_symbol_table.set("POP", BuiltInFunction.pop)
 global_symbol_table.set("EXTEND", BuiltInFunction.extend)
+global_symbol_table.set("ARRAY", BuiltInFunction.array)
+global_symbol_table.set("SUM", BuiltInFunction.sum)
+global_symbol_table.set("MIN", BuiltInFunction.min)
+global_symbol_table.set("MAX", BuiltInFunction.max)
+global_symbol_table.set("MEAN", BuiltInFunction.mean)
 global_symbol_table.set("RUN", BuiltInFunction.run)
 
-def run(fn, text):
-    # Token generator
-    lexer = Lexer(fn, text)
-    tokens, error = lexer.make_tokens()
-    if error: return None, error
-    
-    # Generate AST
-    parser = Parser(tokens)
-    ast = parser.parse()
+STREAM_TOKENS = False
+# Set to True to have RUN parse and run scripts one statement at a time (see run_stream)
+STREAM_SCRIPTS = False
+
+def stream_lexer(fn, text, lexer_engine=None):
+    # Mapped scripts are bytes, which only the regex lexer reads
+    if isinstance(text, str): return LEXERS[lexer_engine or 'regex'](fn, text)
+    if lexer_engine not in (None, 'regex'): raise ValueError(f"The {lexer_engine} lexer can't read mapped scripts")
+    return RegexLexer(fn, text)
+
+def parse_tokens(lexer, token_store=None):
+    # Lexes the whole text into a token list (or a TokenBuffer) before parsing
+    if (token_store or DEFAULT_TOKEN_STORE) == 'buffer':
+        tokens, error = lexer.make_buffer()
+        if error: return None, error
+        ast = BufferParser(tokens).parse()
+    else:
+        tokens, error = lexer.make_tokens()
+        if error: return None, error
+        ast = Parser(tokens).parse()
     if ast.error: return None, ast.error
+    return ast, None
+
+def parse_stream(fn, text, lexer_engine=None):
+    stream = TokenStream(stream_lexer(fn, text, lexer_engine))
+    ast = StreamParser(stream).parse()
+    # The whole text is lexed before parsing in the list mode, so a lexer error wins over a syntax error
+    if ast.error: stream.drain()
+    if stream.error: return None, stream.error
+    if ast.error: return None, ast.error
+    return ast, None
+
+# 'list' keeps Token objects, 'buffer' a TokenBuffer: less memory, slower parsing (see TOKEN BUFFER)
+DEFAULT_TOKEN_STORE = 'list'
+# 'tree' keeps the parser's node objects, 'flat' packs them into a FlatAST and runs that
+DEFAULT_AST_FORMAT = 'tree'
+# Run the AST optimizer between parsing and running (see ASTOptimizer)
+OPTIMIZE_AST = True
+
+def parse_source(fn, text, lexer_engine=None, stream=None, token_store=None, ast_format=None, optimize=None):
+    if stream is None: stream = STREAM_TOKENS or not isinstance(text, str)
+
+    if stream:
+        # Lazy token stream, there is no token store to pick
+        ast, error = parse_stream(fn, text, lexer_engine)
+    else:
+        # Token generator
+        ast, error = parse_tokens(LEXERS[lexer_engine or DEFAULT_LEXER](fn, text), token_store)
+    if error: return None, error
 
+    node = ast.node
+    if OPTIMIZE_AST if optimize is None else optimize: node = optimize_ast(node)
+    elif TAIL_CALLS: mark_tail_calls(node)
+
+    if (ast_format or DEFAULT_AST_FORMAT) == 'flat':
+        return FlatAST.from_tree(node).root_node(), None
+    return node, None
+
+def interpret(node):
     # Run interpreter
     interpreter = Interpreter()
     context = Context('<runningProgram>')
     context.symbol_table = global_symbol_table
-    result = interpreter.visit(ast.node, context)
+    result = interpreter.visit(node, context)
 
     return result.value, result.error
 
+# 'tree' walks the AST with the Interpreter, 'raising' walks it with the RaisingInterpreter, 'vm' compiles it to
+# bytecode for the stack VM, 'closure' compiles it to nested Python closures and 'python' transpiles it to
+# Python source. Only the VM keeps EasyCode calls off Python's stack, deep recursion needs 'vm' (see CALL DEPTH)
+ENGINES = {'tree': interpret, 'raising': run_raising, 'vm': run_bytecode, 'closure': run_closures, 'python': run_python}
+DEFAULT_ENGINE = 'tree'
+
+def run(fn, text, lexer_engine=None, stream=None, token_store=None, ast_format=None, engine=None, optimize=None):
+    # The caller is done with what earlier runs gave back (see RUNS in SourceFile.py)
+    release_finished_runs()
+    try:
+        node, error = parse_source(fn, text, lexer_engine, stream, token_store, ast_format, optimize)
+        if error: return None, error
+        return ENGINES[engine or DEFAULT_ENGINE](node)
+    finally:
+        end_run(fn, text)
+
+# STREAMED RUNS
+# run() parses the whole program before running any of it, so even when its tokens are streamed the memory it
+# takes grows with the AST. run_stream() parses one top level statement at a time from a TokenStream and runs
+# it before parsing the next, so only the statement running, and the FUN bodies the program defined, are kept.
+# A program that has no error does the same either way. One that has an error runs up to it: a syntax or lexer
+# error is reported once the statements before it ran, where run() reports it before running anything.
+# Statements are optimized one at a time, without the passes that need to see the whole program (see
+# optimize_ast). The value is the List of the last statement, where run() gives the List of all of them.
+def run_stream(fn, text, lexer_engine=None, engine=None, optimize=None):
+    stream = TokenStream(stream_lexer(fn, text, lexer_engine))
+    value = None
+    for response in StreamParser(stream).iter_statements():
+        # Errors are reported the way parse_stream reports them
+        if response.error: stream.drain()
+        if stream.error: return None, stream.error
+        if response.error: return None, response.error
+
+        node = response.node
+        if OPTIMIZE_AST if optimize is None else optimize: node = optimize_ast(node, whole_program=False)
+        elif TAIL_CALLS: mark_tail_calls(node)
+        value, error = ENGINES[engine or DEFAULT_ENGINE](node)
+        if error: return None, error
+        # A RETURN, CONTINUE or BREAK reached the top level and ended the program
+        if value is None: return None, None
+    return value, None
+
+# With this set (or EASYCODE_AST_CACHE in the environment), scripts loaded through RUN reuse the AST in their
+# cache file while they are unchanged (see ASTCache.py). It is off by default, as the cache writes files
+USE_AST_CACHE = bool(os.environ.get('EASYCODE_AST_CACHE'))
+
+def run_script(fn, text):
+    if STREAM_SCRIPTS: return run_stream(fn, text)
+    node = ASTCache.load(fn, text) if USE_AST_CACHE else None
+    if node is None:
+        node, error = parse_source(fn, text)
+        if error: return None, error
+        if USE_AST_CACHE: ASTCache.store(fn, text, node)
+    return ENGINES[DEFAULT_ENGINE](node)
+
 # Possible operands for later
 # reserved = {
 #     'display': 'DISPLAY',
@@ -0,0 +1,86 @@
+import operator
+from array import array
+from itertools import repeat
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+##############################################################################################################
+##                                NUMERIC ARRAY
+##############################################################################################################
+
+# The storage of an EasyCode Array: numbers unboxed in one typed buffer, a NumPy array when NumPy is installed
+# and otherwise an array('q') of ints or an array('d') of floats. The functions here take and give Python
+# numbers and buffers only, the Array Value in LexPars wraps them.
+#
+# operate() applies an operator to every element in one call: NumPy's own loop, or map() over the buffer
+# without making a Value per element. Either operand may be a number instead of a buffer, which then goes
+# with every element of the other. A buffer is never changed once made.
+#
+# Both backends give the same results, the ones the operator gives for each pair of Python numbers: results
+# that do not fit in an int64 turn the whole buffer into floats, and a division by zero, a float out of range
+# or a result that is not a real number raise. NumPy wraps int64s around and makes infs and NaNs instead, so
+# its results are only kept when none of that can have happened, and are worked out in Python otherwise.
+
+# Past this, NumPy's int64 results may have wrapped around
+NUMPY_INT_LIMIT = 2.0 ** 62
+
+def from_numbers(values):
+    # A buffer of values (a list of ints and floats): ints while they all are ints and fit in 64 bits
+    if numpy is not None:
+        # An empty list would make a float64 buffer, where the array backend makes an array('q')
+        data = numpy.array(values) if len(values) else numpy.zeros(0, numpy.int64)
+        # Comparisons give bools, and ints too big for int64 come back as unsigned ints or objects
+        if data.dtype.kind == 'b': return data.astype(numpy.int64)
+        return data if data.dtype.kind in 'if' else data.astype(numpy.float64)
+    try:
+        return array('q', values)
+    except (OverflowError, TypeError):
+        return array('d', values)
+
+def operate(op, left, right):
+    # op (from operator) applied to left and right element by element. Raises ZeroDivisionError, OverflowError
+    # (a float out of range) or ValueError (a result that is not a real number) when op does for some element
+    if numpy is not None:
+        try:
+            with numpy.errstate(all='ignore'):
+                result = op(left, right)
+        except (ValueError, OverflowError):
+            # Ints to negative int powers, or an int operand too big for int64
+            result = None
+        if result is not None and exact(op, result, left, right):
+            return result.astype(numpy.int64) if result.dtype.kind == 'b' else result
+    return from_numbers(operate_elements(op, left, right))
+
+def exact(op, result, left, right):
+    # Whether NumPy's result is what op gives each pair of Python numbers
+    kind = result.dtype.kind
+    if kind == 'f': return bool(numpy.isfinite(result).all())
+    if kind != 'i': return True
+    with numpy.errstate(all='ignore'):
+        wide = op(numpy.asarray(left, numpy.float64), numpy.asarray(right, numpy.float64))
+    return bool((numpy.abs(wide) < NUMPY_INT_LIMIT).all())
+
+def operate_elements(op, left, right):
+    # The results of op for each pair of elements as a list of Python numbers, worked out one at a time
+    results = list(map(op, elements(left), elements(right)))
+    # Only a power gives a complex number for real operands
+    if op is operator.pow and complex in set(map(type, results)): raise ValueError('not a real number')
+    return results
+
+def elements(operand):
+    return repeat(operand) if isinstance(operand, (int, float)) else operand.tolist()
+
+def total(data):
+    return data.sum().item() if numpy is not None else sum(data)
+
+def minimum(data):
+    return data.min().item() if numpy is not None else min(data)
+
+def maximum(data):
+    return data.max().item() if numpy is not None else max(data)
+
+def mean(data):
+    return data.mean().item() if numpy is not None else sum(data) / len(data)
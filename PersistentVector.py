@@ -0,0 +1,223 @@
+import operator
+from bisect import bisect_right
+
+##############################################################################################################
+##                                PERSISTENT VECTOR
+##############################################################################################################
+
+# The elements of an EasyCode List. A Vector never changes: appending, removing at an index or concatenating
+# gives a new Vector that shares everything but one path of nodes with the old one, so they cost O(log32 n)
+# instead of a copy of the elements.
+#
+# The elements sit in leaves (plain lists) of up to BRANCH elements, under VectorNodes of up to BRANCH children.
+# A VectorNode keeps the running sizes of its children, so leaves and nodes don't have to be full (a relaxed
+# radix tree, as in RRB-trees): removing an element or joining two trees only rebuilds the nodes along one path
+# or seam, and a lookup finds its child with a bisect of the sizes. The last elements are not in the tree but in
+# a tail list, which makes appending O(1) until the tail is full and goes into the tree as a leaf.
+#
+# Nodes and leaves in a tree are never changed once made, whatever Vector they are in. A TransientVector is the
+# mutable mode of a Vector: it has a tail of its own, which append() and pop() change in place, and it puts its
+# changes into the tree by rebuilding paths like a Vector does. persistent() gives its elements back as a Vector,
+# after which the transient can't be used.
+
+BRANCH = 32
+
+class VectorNode:
+	__slots__ = ('children', 'sizes')
+
+	def __init__(self, children):
+		self.children = children
+		sizes = []
+		total = 0
+		for child in children:
+			total += len(child) if type(child) is list else child.sizes[-1]
+			sizes.append(total)
+		self.sizes = sizes
+
+def tree_size(node):
+	return len(node) if type(node) is list else node.sizes[-1]
+
+def find_leaf(node, height, index):
+	# The leaf with the element at index in node's tree, and where the element is in that leaf
+	while height:
+		sizes = node.sizes
+		slot = bisect_right(sizes, index)
+		if slot: index -= sizes[slot - 1]
+		node = node.children[slot]
+		height -= 1
+	return node, index
+
+def tree_leaves(node, height):
+	if height == 0:
+		yield node
+	else:
+		for child in node.children:
+			yield from tree_leaves(child, height - 1)
+
+def pack(items, height):
+	# items (the elements of a leaf or the children of a node) as one node at height, or as a full one and the rest
+	parts = [items] if len(items) <= BRANCH else [items[:BRANCH], items[BRANCH:]]
+	return parts if height == 0 else [VectorNode(part) for part in parts]
+
+def join_nodes(left, left_height, right, right_height):
+	# left's elements followed by right's in one or two nodes at the taller one's height. Only the nodes along
+	# the seam between them are rebuilt, the leaves on both sides of it are merged when they fit in one
+	if left_height > right_height:
+		items = left.children[:-1] + join_nodes(left.children[-1], left_height - 1, right, right_height)
+	elif left_height < right_height:
+		items = join_nodes(left, left_height, right.children[0], right_height - 1) + right.children[1:]
+	elif left_height:
+		seam = join_nodes(left.children[-1], left_height - 1, right.children[0], right_height - 1)
+		items = left.children[:-1] + seam + right.children[1:]
+	else:
+		items = left + right
+	return pack(items, max(left_height, right_height))
+
+def join_trees(left, left_height, right, right_height):
+	# The root and height of a tree with left's elements followed by right's
+	if not tree_size(right): return left, left_height
+	if not tree_size(left): return right, right_height
+	nodes = join_nodes(left, left_height, right, right_height)
+	height = max(left_height, right_height)
+	if len(nodes) == 1: return nodes[0], height
+	return VectorNode(nodes), height + 1
+
+def remove_from_node(node, height, index):
+	# node without the element at index, None when nothing is left in it
+	if height == 0:
+		return node[:index] + node[index + 1:] or None
+	sizes = node.sizes
+	slot = bisect_right(sizes, index)
+	if slot: index -= sizes[slot - 1]
+	child = remove_from_node(node.children[slot], height - 1, index)
+	children = node.children[:slot] + node.children[slot + 1:] if child is None else node.children[:slot] + [child] + node.children[slot + 1:]
+	return VectorNode(children) if children else None
+
+def remove_from_tree(node, height, index):
+	# The root and height of node's tree without the element at index
+	root = remove_from_node(node, height, index)
+	if root is None: return [], 0
+	while height and len(root.children) == 1:
+		root = root.children[0]
+		height -= 1
+	return root, height
+
+def build_tree(elements):
+	# The root and height of a tree with elements, all in full leaves but the last one
+	nodes = [elements[start:start + BRANCH] for start in range(0, len(elements), BRANCH)]
+	height = 0
+	while len(nodes) > 1:
+		nodes = [VectorNode(nodes[start:start + BRANCH]) for start in range(0, len(nodes), BRANCH)]
+		height += 1
+	return (nodes[0] if nodes else []), height
+
+def concat_vectors(left, right):
+	# The root, height, size and tail of left's elements followed by right's (the tail is right's own)
+	root, height = left.root, left.height
+	if not right.size: return root, height, left.size, left.tail
+	if left.tail: root, height = join_trees(root, height, left.tail, 0)
+	root, height = join_trees(root, height, right.root, right.height)
+	return root, height, left.size + right.size, right.tail
+
+def new_vector(vector_class, root, height, size, tail):
+	vector = vector_class.__new__(vector_class)
+	vector.root = root
+	vector.height = height
+	vector.size = size
+	vector.tail = tail
+	return vector
+
+
+class BaseVector:
+	__slots__ = ('root', 'height', 'size', 'tail')
+
+	def __init__(self, elements):
+		# Takes elements, the list itself when they all fit in the tail
+		in_tree = (len(elements) - 1) // BRANCH * BRANCH if elements else 0
+		self.root, self.height = build_tree(elements[:in_tree]) if in_tree else ([], 0)
+		self.size = len(elements)
+		self.tail = elements[in_tree:] if in_tree else elements
+
+	def position(self, index):
+		# index counted from the start, negative ones count from the end like they do for a Python list
+		index = operator.index(index)
+		if index < 0: index += self.size
+		if not 0 <= index < self.size: raise IndexError('vector index out of range')
+		return index
+
+	def __len__(self):
+		return self.size
+
+	def __getitem__(self, index):
+		index = self.position(index)
+		in_tree = self.size - len(self.tail)
+		if index >= in_tree: return self.tail[index - in_tree]
+		leaf, index = find_leaf(self.root, self.height, index)
+		return leaf[index]
+
+	def __iter__(self):
+		for leaf in tree_leaves(self.root, self.height):
+			yield from leaf
+		yield from self.tail
+
+
+class Vector(BaseVector):
+	__slots__ = ()
+
+	def appended(self, value):
+		if len(self.tail) < BRANCH:
+			return new_vector(Vector, self.root, self.height, self.size + 1, self.tail + [value])
+		root, height = join_trees(self.root, self.height, self.tail, 0)
+		return new_vector(Vector, root, height, self.size + 1, [value])
+
+	def removed(self, index):
+		index = self.position(index)
+		in_tree = self.size - len(self.tail)
+		if index >= in_tree:
+			index -= in_tree
+			return new_vector(Vector, self.root, self.height, self.size - 1, self.tail[:index] + self.tail[index + 1:])
+		root, height = remove_from_tree(self.root, self.height, index)
+		return new_vector(Vector, root, height, self.size - 1, self.tail)
+
+	def concatenated(self, other):
+		if not self.size: return other
+		return new_vector(Vector, *concat_vectors(self, other))
+
+	def transient(self):
+		return new_vector(TransientVector, self.root, self.height, self.size, list(self.tail))
+
+
+class TransientVector(BaseVector):
+	__slots__ = ()
+
+	def append(self, value):
+		if len(self.tail) == BRANCH:
+			self.root, self.height = join_trees(self.root, self.height, self.tail, 0)
+			self.tail = []
+		self.tail.append(value)
+		self.size += 1
+
+	def pop(self, index=-1):
+		index = self.position(index)
+		in_tree = self.size - len(self.tail)
+		if index >= in_tree:
+			value = self.tail.pop(index - in_tree)
+		else:
+			leaf, offset = find_leaf(self.root, self.height, index)
+			value = leaf[offset]
+			self.root, self.height = remove_from_tree(self.root, self.height, index)
+		self.size -= 1
+		return value
+
+	def extend(self, values):
+		if isinstance(values, BaseVector):
+			root, height, size, tail = concat_vectors(self, values)
+			self.root, self.height, self.size, self.tail = root, height, size, list(tail)
+		else:
+			for value in values: self.append(value)
+
+	def persistent(self):
+		vector = new_vector(Vector, self.root, self.height, self.size, self.tail)
+		# The Vector has the tail now, nothing may change it any more
+		self.tail = None
+		return vector
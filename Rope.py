@@ -0,0 +1,60 @@
+##############################################################################################################
+##                                ROPE
+##############################################################################################################
+
+# The contents of an EasyCode String: a Python str, or a rope once + and * have made it long. A rope is a tree
+# of Concat and Repeat nodes over strs. concat() and repeat() give a new node that shares its operands instead
+# of copying their text, so building a string one piece at a time in a loop costs O(1) per piece instead of a
+# copy of everything so far. flatten() makes the str once something reads the text.
+#
+# Short results are still made as strs right away: a node and a later join cost more than copying a few bytes.
+
+MIN_LENGTH = 256
+
+class Concat:
+    __slots__ = ('left', 'right', 'length')
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.length = length(left) + length(right)
+
+class Repeat:
+    __slots__ = ('part', 'count', 'length')
+
+    def __init__(self, part, count):
+        self.part = part
+        self.count = count
+        self.length = length(part) * count
+
+def length(contents):
+    return len(contents) if type(contents) is str else contents.length
+
+def concat(left, right):
+    # The contents of left followed by right
+    if not length(right): return left
+    if not length(left): return right
+    if length(left) + length(right) < MIN_LENGTH: return flatten(left) + flatten(right)
+    return Concat(left, right)
+
+def repeat(part, count):
+    # The contents of part count times over, count is anything str * count takes
+    if type(count) is not int or count < 2 or length(part) * count < MIN_LENGTH: return flatten(part) * count
+    return Repeat(part, count)
+
+def flatten(contents):
+    # contents as one str. Appending in a loop makes a deep chain of Concats, so this walks it with a stack
+    if type(contents) is str: return contents
+    pieces = []
+    stack = [contents]
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is str:
+            pieces.append(node)
+        elif node_type is Concat:
+            stack.append(node.right)
+            stack.append(node.left)
+        else:
+            pieces.append(flatten(node.part) * node.count)
+    return ''.join(pieces)
@@ -0,0 +1,135 @@
+import bisect
+import mmap
+import os
+
+##############################################################################################################
+##                                SOURCE FILES
+##############################################################################################################
+
+# Positions are plain integer offsets into one address space shared by every source that has been lexed.
+# Each source gets its own base offset, so an offset alone is enough to find its file, and lines and
+# columns are only worked out (through bisect on a lazily built line table) when an error is rendered.
+#
+# A source stays registered while positions into it may still be rendered. Offsets are never handed out twice,
+# so once a source is released its range just belongs to no file, and errors there are shown without the text.
+
+class SourceFile:
+	def __init__(self, fn, text, base):
+		self.fn = fn
+		# A str, or the bytes/mmap of a mapped script whose offsets count bytes
+		self.text = text
+		self.base = base
+		# Lexers can hand out offsets up to two past the end of the text (EOF after an unterminated string)
+		self.end = base + len(text) + 3
+		self.decoded_text = text if isinstance(text, str) else None
+		self.line_starts = None
+
+	def get_text(self):
+		if self.decoded_text is None:
+			self.decoded_text = bytes(self.text).decode('utf-8', 'replace')
+		return self.decoded_text
+
+	def char_index(self, pos):
+		idx = pos - self.base
+		if isinstance(self.text, str) or idx <= 0: return idx
+		raw = self.text[:idx]
+		return len(raw.decode('utf-8', 'replace')) + idx - len(raw)
+
+	def get_line_starts(self):
+		if self.line_starts is None:
+			text = self.get_text()
+			line_starts = [0]
+			idx = text.find('\n')
+			while idx >= 0:
+				line_starts.append(idx + 1)
+				idx = text.find('\n', idx + 1)
+			self.line_starts = line_starts
+		return self.line_starts
+
+	def line_col(self, pos):
+		idx = self.char_index(pos)
+		line_starts = self.get_line_starts()
+		ln = max(bisect.bisect_right(line_starts, idx) - 1, 0)
+		return ln, idx - line_starts[ln]
+
+	def end_line_col(self, pos):
+		# An end offset is exclusive, so it sits on the same line as the character before it
+		if pos <= self.base: return self.line_col(pos)
+		ln, col = self.line_col(pos - 1)
+		return ln, col + 1
+
+
+sources = []
+source_bases = []
+source_lookup = {}
+next_base = 0
+
+def source_key(fn, text):
+	# Mapped scripts are kept alive by the registry, so their identity is a safe key
+	return (fn, text) if isinstance(text, str) else (fn, id(text))
+
+def add_source(fn, text, base=None):
+	global next_base
+	key = source_key(fn, text)
+	source = source_lookup.get(key)
+	if source: return source
+
+	# A new source can ask for a base that is still free (past next_base), as cached ASTs do to keep their offsets
+	if base is None or base < next_base: base = next_base
+	source = SourceFile(fn, text, base)
+	sources.append(source)
+	source_bases.append(base)
+	source_lookup[key] = source
+	next_base = source.end
+	return source
+
+def find_source(pos):
+	index = bisect.bisect_right(source_bases, pos) - 1
+	if index >= 0 and pos < sources[index].end: return sources[index]
+	return SourceFile('<released source>', '', pos)
+
+def release_source(source):
+	# Drops source from the registry, and closes its mapping if nothing reads it any more
+	index = bisect.bisect_left(source_bases, source.base)
+	if index == len(sources) or sources[index] is not source: return
+	del sources[index]
+	del source_bases[index]
+	del source_lookup[source_key(source.fn, source.text)]
+	close_unused(source.text)
+
+
+# RUNS
+# A top level run hands back at most an error to render, which its caller is done with once it starts the next
+# run. Only the FUN bodies a run defines can keep positions into its source for longer, so the source of a run
+# whose text has no FUN is released when the next run starts: one-off REPL lines are not kept forever.
+finished_runs = []
+
+def end_run(fn, text):
+	source = source_lookup.get(source_key(fn, text))
+	if source is not None and isinstance(text, str) and 'FUN' not in text: finished_runs.append(source)
+
+def release_finished_runs():
+	while finished_runs: release_source(finished_runs.pop())
+
+
+# Path -> ((mtime, size), mapping) of the scripts mapped so far
+mapped_files = {}
+
+def map_file(fn):
+	# Scripts are memory mapped instead of read, and an unchanged file keeps the mapping it already has. A file
+	# that changed is mapped again, and its old mapping is closed unless a registered source still reads it
+	stat = os.stat(fn)
+	path = os.path.abspath(fn)
+	version = (stat.st_mtime_ns, stat.st_size)
+	mapped = mapped_files.get(path)
+	if mapped is not None and mapped[0] == version: return mapped[1]
+
+	with open(fn, 'rb') as f:
+		text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+	mapped_files[path] = (version, text)
+	if mapped is not None: close_unused(mapped[1])
+	return text
+
+def close_unused(text):
+	if not isinstance(text, mmap.mmap) or any(source.text is text for source in sources): return
+	if not any(mapped is text for _, mapped in mapped_files.values()): text.close()
@@ -2,19 +2,95 @@
 ##                                SYMBOL TABLE
 ##############################################################################################################
 
+# A function's table has the caller's table as its parent, so a name that is not bound in the function is found
+# wherever the caller (or its caller, up to the global table) has it. Walking that chain costs as much as the
+# calls are deep, which every access to a global from a recursive function would pay. While a table is in use
+# its parents are waiting for the calls they made to end, so none of them binds or unbinds a name in that time
+# (only the root can change, through RUN). So each table keeps, from when it is made:
+#   bound           the names some table between it and the root binds, shared with its parent's bound when the
+#                   parent binds nothing new. Any other name it does not bind itself is read from the root
+#                   straight away, which is how a recursive function reaches globals and its own name.
+#   found           name -> the table above this one that binds it, for the names in bound. The first lookup
+#                   walks the chain and notes the answer in every table it passed, so the next lookup from any of
+#                   them, or from a call they make, goes straight there.
+# The Value itself is read from the table that binds it every time, a RUN script can rebind a global.
+
 class SymbolTable:
 	def __init__(self, parent=None):
 		self.symbols = {}
 		self.parent = parent
+		self.root = parent.root if parent is not None else self
+		self.bound = parent.bound_below() if parent is not None else frozenset()
+		self.found = None
 
 	def get(self, name):
-		value = self.symbols.get(name, None)
-		if value == None and self.parent:
-			return self.parent.get(name)
+		value = self.own(name)
+		if value is None and self.parent is not None: return self.above(name)
 		return value
 
+	def own(self, name):
+		# The value this table itself binds name to
+		return self.symbols.get(name)
+
+	def bound_below(self):
+		# bound for a table made under this one
+		if self.parent is None: return self.bound
+		return self.bound if self.symbols.keys() <= self.bound else self.bound.union(self.symbols)
+
+	def above(self, name):
+		# The value name has in the tables above this one
+		if name not in self.bound: return self.root.symbols.get(name)
+		table = self.found.get(name) if self.found is not None else None
+		if table is None: table = self.resolve(name)
+		return table.own(name)
+
+	def resolve(self, name):
+		# The table above this one name is found in, walked to once and then noted in found
+		passed = [self]
+		table = self.parent
+		while table.parent is not None:
+			if table.own(name) is not None: break
+			known = table.found.get(name) if table.found is not None else None
+			if known is not None:
+				table = known
+				break
+			passed.append(table)
+			table = table.parent
+		for below in passed:
+			if below.found is None: below.found = {}
+			below.found[name] = table
+		return table
+
 	def set(self, name, value):
 		self.symbols[name] = value
 
 	def remove(self, name):
-		del self.symbols[name]
\ No newline at end of file
+		del self.symbols[name]
+
+
+# The table of a call whose names were resolved before it ran: arguments and locals live in slots, a list as
+# long as the function has names, at the indexes layout gives them. A slot that was not assigned yet is None,
+# and the name is then found in the caller's scopes like any other. Any other name goes to symbols.
+class FrameSymbolTable(SymbolTable):
+	def __init__(self, parent, layout):
+		super().__init__(parent)
+		self.layout = layout
+		self.slots = [None] * len(layout)
+
+	def own(self, name):
+		index = self.layout.get(name)
+		return self.slots[index] if index is not None else self.symbols.get(name)
+
+	def set(self, name, value):
+		index = self.layout.get(name)
+		if index is None: return super().set(name, value)
+		self.slots[index] = value
+
+	def bound_below(self):
+		bound = super().bound_below()
+		return bound if self.layout.keys() <= bound else bound.union(self.layout)
+
+	def remove(self, name):
+		index = self.layout.get(name)
+		if index is None: return super().remove(name)
+		self.slots[index] = None
@@ -1,18 +1,24 @@
-def string_with_arrows(text, pos_start, pos_end):
+from SourceFile import find_source
+
+
+def string_with_arrows(source, pos_start, pos_end):
 	result = ''
+	text = source.get_text()
+	ln_start, col_first = source.line_col(pos_start)
+	ln_end, col_last = find_source(pos_end).end_line_col(pos_end)
 
 	# Calculate indices
-	idx_start = max(text.rfind('\n', 0, pos_start.idx), 0)
+	idx_start = max(text.rfind('\n', 0, source.char_index(pos_start)), 0)
 	idx_end = text.find('\n', idx_start + 1)
 	if idx_end < 0: idx_end = len(text)
-	
+
 	# Generate each line
-	line_count = pos_end.ln - pos_start.ln + 1
+	line_count = ln_end - ln_start + 1
 	for i in range(line_count):
 		# Calculate line columns
 		line = text[idx_start:idx_end]
-		col_start = pos_start.col if i == 0 else 0
-		col_end = pos_end.col if i == line_count - 1 else len(line) - 1
+		col_start = col_first if i == 0 else 0
+		col_end = col_last if i == line_count - 1 else len(line) - 1
 
 		# Append to result
 		result += line + '\n'
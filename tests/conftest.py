@@ -0,0 +1,23 @@
+import os
+import sys
+import pytest
+
+# The interpreter is a set of top level modules, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import LexPars
+
+ENGINES = list(LexPars.ENGINES)
+
+def outcome(source, capsys, engine=None, optimize=None):
+    # What a run prints, and the error it ends with
+    _, error = LexPars.run('<test>', source, engine=engine, optimize=optimize)
+    return capsys.readouterr().out, error.as_string() if error else None
+
+def unoptimized(source, capsys):
+    # The outcome every engine and optimization is held to
+    return outcome(source, capsys, 'tree', False)
+
+def programs(table, argnames='source'):
+    # Parametrizes a test over the values of table, a dict of programs, with their names as test ids
+    return pytest.mark.parametrize(argnames, list(table.values()), ids=list(table))
@@ -0,0 +1,69 @@
+import pytest
+import LexPars
+import NumericArray
+from conftest import ENGINES
+
+BACKENDS = ['array'] + (['numpy'] if NumericArray.numpy is not None else [])
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    if request.param == 'array': monkeypatch.setattr(NumericArray, 'numpy', None)
+    return request.param
+
+def last_value(source, engine=None):
+    result, error = LexPars.run('<test>', source, engine=engine)
+    assert error is None, error.as_string()
+    return result.elements[-1]
+
+def error_message(source):
+    result, error = LexPars.run('<test>', source)
+    assert error is not None
+    return error.details
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_element_wise_operators_on_every_engine(backend, engine):
+    source = 'VAR a = ARRAY(FOR i = 0 TO 5 THEN i)\n'
+    assert str(last_value(source + 'a + 1', engine)) == '1, 2, 3, 4, 5'
+    assert str(last_value(source + '2 * a', engine)) == '0, 2, 4, 6, 8'
+    assert str(last_value(source + 'a * a', engine)) == '0, 1, 4, 9, 16'
+    assert str(last_value(source + '1 - a', engine)) == '1, 0, -1, -2, -3'
+    assert str(last_value(source + 'a > 2', engine)) == '0, 0, 0, 1, 1'
+    assert str(last_value(source + 'NOT a', engine)) == '1, 0, 0, 0, 0'
+    assert str(last_value('NOT ARRAY([0, 2, 0.0])', engine)) == '1, 0, 1'
+
+def test_bulk_builtins(backend):
+    assert last_value('SUM(ARRAY([1, 2, 3]))').value == 6
+    assert last_value('MIN([3, 9, 1])').value == 1
+    assert last_value('MAX(ARRAY([3, 9, 1]))').value == 9
+    assert last_value('MEAN(ARRAY([1, 2]))').value == 1.5
+    assert last_value('LEN(ARRAY([1, 2]))').value == 2
+
+def test_bulk_builtins_on_an_empty_array(backend):
+    empty = 'ARRAY(FOR i = 0 TO 0 THEN i)'
+    total = last_value(f'SUM({empty})').value
+    assert total == 0 and type(total) is int
+    assert last_value(f'LEN({empty})').value == 0
+    assert str(last_value(f'{empty} + 1')) == ''
+
+def test_int_overflow_promotes_to_floats(backend):
+    value = last_value('ARRAY([4611686018427387904, 4]) * 4')
+    assert value.data.tolist() == [18446744073709551616.0, 16.0]
+
+def test_negative_int_powers_give_floats(backend):
+    assert last_value('2 ^ ARRAY([1, 0 - 1])').data.tolist() == [2.0, 0.5]
+
+@pytest.mark.parametrize('source, message', [
+    ('VAR a = ARRAY([0 - 4, 0 - 9])\na ^ 0.5', 'Result is not a real number'),
+    ('ARRAY([10.0]) ^ 400', 'Result is too large'),
+    ('ARRAY([1, 2]) / 0', 'Division by zero'),
+    ('ARRAY([0, 1]) / ARRAY([0, 1])', 'Division by zero'),
+    ('10 / ARRAY([1, 0])', 'Division by zero'),
+    ('ARRAY([1, 2]) + ARRAY([1])', 'Arrays must have the same length'),
+    ('ARRAY([1]) + "x"', 'Illegal operation'),
+    ('ARRAY(["a"])', 'Argument must be list of numbers'),
+    ('SUM(5)', 'Argument must be array or list of numbers'),
+    ('MEAN(ARRAY(FOR i = 0 TO 0 THEN i))', 'Argument must not be empty'),
+])
+def test_errors(backend, source, message):
+    assert error_message(source) == message
@@ -0,0 +1,78 @@
+import os
+import pytest
+import ASTCache
+import LexPars
+import SourceFile
+
+
+@pytest.fixture
+def script(tmp_path, monkeypatch):
+    monkeypatch.setattr(LexPars, 'USE_AST_CACHE', True)
+    monkeypatch.setattr(ASTCache, 'stats', {'hits': 0, 'misses': 0})
+    path = tmp_path / 'script.ec'
+    path.write_text('PRINT(1 + 2)')
+    return path
+
+def run(path):
+    _, error = LexPars.run_script(str(path), SourceFile.map_file(str(path)))
+    assert error is None
+
+def touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_cache_is_off_by_default(tmp_path, capsys):
+    assert not LexPars.USE_AST_CACHE
+    path = tmp_path / 'script.ec'
+    path.write_text('PRINT(1)')
+    run(path)
+    assert capsys.readouterr().out == '1\n' and not (tmp_path / ASTCache.CACHE_FOLDER).exists()
+
+def test_unchanged_script_hits(script, capsys):
+    run(script)
+    run(script)
+    assert ASTCache.stats == {'hits': 1, 'misses': 1} and capsys.readouterr().out == '3\n3\n'
+
+def test_touched_script_hits_and_is_hashed_once(script, capsys, monkeypatch):
+    run(script)
+    touch(script)
+    run(script)
+    assert ASTCache.stats == {'hits': 1, 'misses': 1}
+
+    hashed = []
+    monkeypatch.setattr(ASTCache, 'source_hash', lambda text: hashed.append(text) or '')
+    run(script)
+    assert ASTCache.stats['hits'] == 2 and hashed == []
+    assert capsys.readouterr().out == '3\n3\n3\n'
+
+# Same size as the cached script (so the hash decides), and another size
+@pytest.mark.parametrize('source, printed', [('PRINT(1 + 5)', '6'), ('PRINT(10 + 2)', '12')])
+def test_edited_script_misses(script, capsys, source, printed):
+    run(script)
+    script.write_text(source)
+    touch(script)
+    run(script)
+    assert ASTCache.stats == {'hits': 0, 'misses': 2}
+    assert capsys.readouterr().out == f'3\n{printed}\n'
+
+def test_new_interpreter_version_misses(script, capsys, monkeypatch):
+    run(script)
+    monkeypatch.setattr(ASTCache, 'version', 'another')
+    run(script)
+    assert ASTCache.stats == {'hits': 0, 'misses': 2}
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='file ownership is POSIX only')
+def test_cache_file_others_can_write_is_not_loaded(script, capsys):
+    run(script)
+    os.chmod(ASTCache.cache_path(str(script)), 0o666)
+    run(script)
+    assert ASTCache.stats == {'hits': 0, 'misses': 2}
+
+def test_non_ascii_script_read_as_text_hits(script):
+    script.write_text('PRINT("héllo wörld")', encoding='utf-8')
+    text = script.read_text(encoding='utf-8')
+    node, error = LexPars.parse_source(str(script), text)
+    assert error is None
+    ASTCache.store(str(script), text, node)
+    assert ASTCache.load(str(script), text) is not None and ASTCache.stats == {'hits': 1, 'misses': 0}
@@ -0,0 +1,66 @@
+import pytest
+import LexPars
+from conftest import ENGINES
+
+PYTHON_STACK_ENGINES = [engine for engine in ENGINES if engine != 'vm']
+
+DOWN = 'FUN down(n) -> IF n == 0 THEN 0 ELSE 1 + down(n - 1)\nPRINT(down({}))'
+
+
+@pytest.mark.parametrize('engine', PYTHON_STACK_ENGINES)
+def test_recursion_past_pythons_limit_is_an_rt_error(capsys, engine):
+    _, error = LexPars.run('<test>', DOWN.format(2000), engine=engine)
+    assert isinstance(error, LexPars.RTError)
+    report = error.as_string()
+    assert 'Maximum call depth exceeded' in report
+    assert report.startswith('Traceback (most recent call last):') and report.count(', in down') > 50
+    assert capsys.readouterr().out == ''
+
+@pytest.mark.parametrize('engine', PYTHON_STACK_ENGINES)
+def test_engine_runs_again_after_a_call_depth_error(capsys, engine):
+    LexPars.run('<test>', DOWN.format(2000), engine=engine)
+    _, error = LexPars.run('<test>', DOWN.format(20), engine=engine)
+    assert error is None and capsys.readouterr().out == '20\n'
+
+def test_vm_recursion_does_not_use_pythons_stack(capsys):
+    _, error = LexPars.run('<test>', DOWN.format(5000), engine='vm')
+    assert error is None and capsys.readouterr().out == '5000\n'
+
+def test_vm_call_depth_limit(capsys, monkeypatch):
+    monkeypatch.setattr(LexPars, 'MAX_CALL_DEPTH', 50)
+    _, error = LexPars.run('<test>', DOWN.format(60), engine='vm')
+    report = error.as_string()
+    assert 'Maximum call depth (50) exceeded' in report
+    assert report.count(', in down') == 50
+
+    _, error = LexPars.run('<test>', DOWN.format(49), engine='vm')
+    assert error is None and capsys.readouterr().out == '49\n'
+
+COUNT = 'FUN count(n, a) -> IF n == 0 THEN a ELSE count(n - 1, a + 1)\nPRINT(count({}, 0))'
+
+@pytest.mark.parametrize('optimize', [False, True])
+@pytest.mark.parametrize('engine', ENGINES)
+def test_tail_recursion_takes_no_depth(capsys, engine, optimize):
+    _, error = LexPars.run('<test>', COUNT.format(3000), engine=engine, optimize=optimize)
+    assert error is None and capsys.readouterr().out == '3000\n'
+
+@pytest.mark.parametrize('optimize', [False, True])
+@pytest.mark.parametrize('engine', ENGINES)
+def test_tail_call_from_a_return_still_gives_null(capsys, engine, optimize):
+    source = 'FUN five(n) -> 5\nFUN block(n)\n    IF n == 0 THEN RETURN five(n)\n    RETURN block(n - 1)\nEND\nPRINT(block(3000))'
+    _, error = LexPars.run('<test>', source, engine=engine, optimize=optimize)
+    assert error is None and capsys.readouterr().out == '0\n'
+
+@pytest.mark.parametrize('optimize', [False, True])
+@pytest.mark.parametrize('engine', ENGINES)
+def test_traceback_counts_the_elided_tail_calls(engine, optimize):
+    source = 'FUN fail(n) -> IF n == 0 THEN 1 / 0 ELSE fail(n - 1)\nFUN top() -> 1 + fail(3000)\nPRINT(top())'
+    _, error = LexPars.run('<test>', source, engine=engine, optimize=optimize)
+    report = error.as_string()
+    assert 'Division by zero' in report and report.count(', in fail') == 1
+    assert ', in top\n  [3000 tail call frames elided]\n' in report
+
+def test_function_with_tail_calls_is_tiered(capsys):
+    _, error = LexPars.run('<test>', 'FUN tally(n, a) -> IF n == 0 THEN a ELSE tally(n - 1, a + 1)\nPRINT(tally(500, 0))')
+    assert error is None and capsys.readouterr().out == '500\n'
+    assert any(profile.name == 'tally' and profile.promotions for profile in LexPars.tier_profiles)
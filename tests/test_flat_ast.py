@@ -0,0 +1,42 @@
+import pickle
+import pytest
+import LexPars
+from conftest import ENGINES
+
+PROGRAM = ('FUN f(n) -> n * 2 + 1\nVAR t = 0\nFOR i = 0 TO 30 THEN\n    VAR t = t + f(i) - i / 3\n'
+    '    IF t > 5 THEN VAR t = t - 1 ELSE CONTINUE\nEND\nWHILE t > 100 THEN VAR t = t - 50\nPRINT(t)\nPRINT([1, "a", -t])')
+
+def flat_root(source):
+    node, error = LexPars.parse_source('<test>', source, ast_format='flat')
+    assert error is None
+    return node
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_flat_ast_runs_what_the_tree_runs(capsys, engine):
+    LexPars.run('<test>', PROGRAM, engine=engine)
+    ran = capsys.readouterr().out
+    _, error = LexPars.run('<test>', PROGRAM, engine=engine, ast_format='flat')
+    assert error is None and capsys.readouterr().out == ran
+
+def test_views_are_made_once_per_node():
+    root = flat_root(PROGRAM)
+    assert root.ast.root_node() is root
+    first = root.element_nodes
+    assert root.element_nodes is first and first[0].body_node is first[0].body_node
+    assert root.ast.node(first[1].index) is first[1]
+
+def test_moved_positions_give_new_views():
+    root = flat_root('VAR x = 1')
+    assignment = root.element_nodes[0]
+    start, token_start = assignment.pos_start, assignment.var_name_tok.pos_start
+    root.ast.shift_positions(100)
+    moved = root.ast.root_node().element_nodes[0]
+    assert (moved.pos_start, moved.var_name_tok.pos_start) == (start + 100, token_start + 100)
+
+def test_pickled_flat_ast_keeps_no_views():
+    root = flat_root(PROGRAM)
+    root.element_nodes[0].body_node
+    copy = pickle.loads(pickle.dumps(root))
+    assert copy.ast.views.keys() == {copy.index}
+    assert [type(node).__name__ for node in copy.element_nodes] == [type(node).__name__ for node in root.element_nodes]
@@ -0,0 +1,45 @@
+import pytest
+import LexPars
+from conftest import ENGINES, outcome, unoptimized, programs
+
+# (source, whether the inlined body gives the call's number). Every other call falls back to a real call
+CALLS = {
+    'inlined': ('FUN mult(a, b) -> a * b + 1\nFOR i = 0 TO 3 THEN PRINT(mult(i, 3))', True),
+    'name rebound': ('FUN mult(a, b) -> a * b + 1\nFUN other(a, b)\n    PRINT("called")\nEND\nVAR mult = other\nPRINT(mult(2, 3))', False),
+    'argument not a Number': ('FUN twice(a) -> a + a\nPRINT(twice("ab"))', False),
+    'division by zero': ('FUN part(a, b) -> a / b\nPRINT(part(4, 0))', False),
+}
+
+@pytest.fixture
+def inlined(monkeypatch):
+    # The numbers inline_number gave for the calls it was asked about, None for those it left to a real call
+    numbers = []
+    def counted(*args):
+        number = inline_number(*args)
+        numbers.append(number)
+        return number
+    inline_number = LexPars.inline_number
+    monkeypatch.setattr(LexPars, 'inline_number', counted)
+    monkeypatch.setitem(LexPars.PYTHON_RUNTIME, 'inline_number', counted)
+    return numbers
+
+
+@programs(CALLS, 'source, gives_number')
+def test_small_arrow_calls_become_inline_calls(source, gives_number):
+    node, error = LexPars.parse_source('<test>', source)
+    assert error is None
+    kinds = set()
+    pending = [node]
+    while pending:
+        child = pending.pop()
+        kinds.add(type(child).__name__)
+        pending.extend(LexPars.ast_children(child))
+    assert 'InlineCallNode' in kinds
+
+@pytest.mark.parametrize('engine', ENGINES)
+@programs(CALLS, 'source, gives_number')
+def test_inlined_calls_give_what_calls_give(capsys, inlined, engine, source, gives_number):
+    expected = unoptimized(source, capsys)
+    assert not inlined
+    assert outcome(source, capsys, engine) == expected
+    assert inlined and all((number is not None) == gives_number for number in inlined)
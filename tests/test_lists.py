@@ -0,0 +1,38 @@
+import os
+import pytest
+import LexPars
+import SourceFile
+from conftest import ENGINES, programs
+
+# What each program prints is the same on every engine: a List is shared by every name bound to it, APPEND, POP
+# and EXTEND change it for all of them, and the operators give a new List
+PROGRAMS = {
+    'alias sees APPEND': ('VAR a = [1, 2]\nVAR b = a\nAPPEND(b, 3)\nPRINT(a)', '1, 2, 3\n'),
+    'alias sees POP and EXTEND': ('VAR a = [1, 2, 3]\nVAR b = a\nPOP(b, 0)\nEXTEND(b, [7])\nPRINT(a)', '2, 3, 7\n'),
+    'operators leave their operand': ('VAR a = [1, 2]\nVAR b = a + 3\nVAR c = a * [4]\nVAR d = a - 0\nPRINT(a)\nPRINT(b)\nPRINT(c)\nPRINT(d)',
+        '1, 2\n1, 2, 3\n1, 2, 4\n2\n'),
+    'new List does not see its operand change': ('VAR a = [1, 2]\nVAR b = a + 3\nAPPEND(a, 9)\nAPPEND(b, 4)\nPRINT(a)\nPRINT(b)',
+        '1, 2, 9\n1, 2, 3, 4\n'),
+    'operand changed in place, then shared': ('VAR a = [1]\nAPPEND(a, 2)\nVAR b = a * [3]\nAPPEND(a, 4)\nPRINT(a)\nPRINT(b)',
+        '1, 2, 4\n1, 2, 3\n'),
+    'EXTEND copies the elements in': ('VAR a = [1]\nVAR b = [2]\nEXTEND(a, b)\nAPPEND(b, 3)\nPRINT(a)\nPRINT(b)', '1, 2\n2, 3\n'),
+    'argument is the caller\'s List': ('FUN push(l, x) -> APPEND(l, x)\nVAR a = [1]\npush(a, 2)\nPRINT(a)', '1, 2\n'),
+    'returned List is the one the FUN made': ('VAR kept = [0]\nFUN get() -> kept\nVAR a = get()\nAPPEND(a, 1)\nPRINT(kept)', '0, 1\n'),
+    'nested List is shared': ('VAR a = [1]\nVAR outer = [a]\nAPPEND(a, 2)\nPRINT(outer / 0)', '1, 2\n'),
+    'element read in a loop': ('VAR a = [1, 2, 3]\nVAR t = 0\nFOR i = 0 TO 3 THEN\n    VAR t = t + a / i\n    APPEND(a, i)\nEND\nPRINT(t)\nPRINT(a)',
+        '6\n1, 2, 3, 0, 1, 2\n'),
+}
+
+@pytest.mark.parametrize('optimize', [False, True])
+@pytest.mark.parametrize('engine', ENGINES)
+@programs(PROGRAMS, 'source, printed')
+def test_list_aliasing(capsys, engine, source, printed, optimize):
+    _, error = LexPars.run('<test>', source, engine=engine, optimize=optimize)
+    assert error is None, error.as_string()
+    assert capsys.readouterr().out == printed
+
+def test_example_script_grows_its_list(capsys):
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ExampleCode.ec')
+    _, error = LexPars.run_script(path, SourceFile.map_file(path))
+    assert error is None
+    assert capsys.readouterr().out.endswith('0, 2, 6, 12, 20, 30, 42, 56, 72, 90\nThe length of the list you just made is: \n10\n')
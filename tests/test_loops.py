@@ -0,0 +1,64 @@
+import pytest
+import LexPars
+from conftest import ENGINES, outcome, unoptimized, programs
+
+
+LOOPS = {
+    'invariants': 'VAR a = 3\nVAR t = 0\nFOR i = 0 TO 6 THEN\n    VAR t = t + a ^ 2 + a * 4\n    PRINT(t)\nEND',
+    'inductions': 'VAR n = 7\nVAR t = 0\nFOR i = 0 TO 6 THEN\n    VAR t = t + i * n - 3 * i\n    PRINT(t)\nEND',
+    'negative step': 'FOR i = 10 TO 0 STEP 0 - 3 THEN\n    PRINT(i * 4)\nEND',
+    'float factor': 'VAR k = 2.5\nFOR i = 0 TO 4 THEN\n    PRINT(i * k)\nEND',
+    'float step': 'FOR i = 0 TO 2 STEP 0.5 THEN\n    PRINT(i * 3)\nEND',
+    'continue': 'FOR i = 0 TO 6 THEN\n    IF i == 2 THEN CONTINUE\n    PRINT(i * 5)\nEND',
+    'nested': 'VAR n = 2\nFOR i = 0 TO 3 THEN\n    FOR j = 0 TO 3 THEN\n        PRINT(i * n + j * n)\n    END\nEND',
+    'while': 'VAR c = 0\nVAR a = 4\nWHILE c < a * 2 THEN\n    VAR c = c + a - 3\n    PRINT(c)\nEND',
+    'recursion': 'FUN f(d)\n    FOR i = 1 TO 4 THEN\n        PRINT(i * 7 + d * 2)\n        IF d > 0 AND i == 2 THEN f(d - 1)\n    END\nEND\nf(3)',
+    'list operand': 'VAR l = [1]\nFOR i = 0 TO 3 THEN\n    PRINT(l / 0 * 2)\n    POP(l, 0)\n    APPEND(l, i)\nEND',
+}
+
+@pytest.mark.parametrize('engine', ENGINES)
+@programs(LOOPS)
+def test_hoisted_loops_print_what_unoptimized_loops_do(capsys, engine, source):
+    assert outcome(source, capsys, engine) == unoptimized(source, capsys)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_invariant_fails_on_the_iteration_it_always_did(capsys, engine):
+    source = 'VAR z = 0\nFOR i = 0 TO 3 THEN\n    PRINT(i)\n    PRINT(i * 5 + 1 / z)\nEND'
+    printed, error = outcome(source, capsys, engine)
+    assert (printed, error) == unoptimized(source, capsys)
+    assert printed == '0\n' and 'Division by zero' in error
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_run_script_rebinding_an_invariant(capsys, engine, tmp_path):
+    script = tmp_path / 'rebind.ec'
+    script.write_text('VAR n = 100')
+    source = (f'VAR n = 2\nFOR i = 1 TO 5 THEN\n    PRINT(i * n + n * 10)\n'
+        f'    IF i == 2 THEN RUN("{script}")\nEND')
+    printed, error = outcome(source, capsys, engine)
+    assert error is None
+    assert printed.split() == ['22', '24', '1300', '1400']
+
+def test_loops_hoist_invariants_and_inductions():
+    node, error = LexPars.parse_source('<test>', 'VAR n = 3\nFOR i = 0 TO 3 THEN PRINT(i * n + n ^ 2)')
+    assert error is None
+    loop = node.element_nodes[1]
+    assert [type(hoisted).__name__ for hoisted in loop.hoisted] == ['InvariantNode', 'InductionNode', 'InvariantNode']
+
+def test_no_induction_for_a_variable_the_body_assigns():
+    node, error = LexPars.parse_source('<test>', 'FOR i = 0 TO 3 THEN\n    VAR i = i + 1\n    PRINT(i * 2)\nEND')
+    assert error is None
+    assert node.element_nodes[0].hoisted == []
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_hoisted_nodes_are_worked_out_once_per_run(monkeypatch, engine):
+    kept = []
+    keep_hoisted = LexPars.keep_hoisted
+    def counted(node, symbol_table, number):
+        kept.append(type(node).__name__)
+        keep_hoisted(node, symbol_table, number)
+    monkeypatch.setattr(LexPars, 'keep_hoisted', counted)
+    monkeypatch.setitem(LexPars.PYTHON_RUNTIME, 'keep_hoisted', counted)
+
+    _, error = LexPars.run('<test>', 'VAR n = 3\nVAR t = 0\nFOR i = 1 TO 100 THEN\n    VAR t = t + i * n + n ^ 2\nEND', engine=engine)
+    assert error is None
+    assert sorted(kept) == ['InductionNode', 'InvariantNode', 'InvariantNode']
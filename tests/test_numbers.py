@@ -0,0 +1,24 @@
+import pytest
+import LexPars
+from conftest import ENGINES, outcome, unoptimized, programs
+
+PROGRAMS = {
+    'ints and floats': 'VAR a = 7\nVAR b = 2.5\nPRINT(a * b - a / 2 + a ^ 2)',
+    'int division': 'VAR a = 7\nVAR b = 2\nPRINT(a / b)\nPRINT(-a + b * 3)',
+    'comparisons': 'VAR a = 3\nVAR b = 4\nPRINT(a < b)\nPRINT(a == b OR NOT a > b)',
+    'division by zero': 'VAR a = 1\nVAR z = 0\nPRINT(a + a / z)',
+    'hoisted in a numeric expression': 'VAR a = 3\nVAR t = 0\nFOR i = 0 TO 4 THEN\n    VAR t = t + a ^ 2\n    PRINT(t)\nEND',
+    'name that is not always a Number': 'VAR a = 2\nPRINT(a * 3)\nVAR a = "x"\nPRINT(a * 3)',
+}
+
+@pytest.mark.parametrize('engine', ENGINES)
+@programs(PROGRAMS)
+def test_raw_arithmetic_gives_what_values_give(capsys, engine, source):
+    assert outcome(source, capsys, engine) == unoptimized(source, capsys)
+
+def test_transpiled_raw_expression_keeps_hoisted_numbers():
+    source = 'VAR a = 3\nVAR t = 0\nFOR i = 0 TO 4 THEN VAR t = t + a ^ 2'
+    node, error = LexPars.parse_source('<test>', source)
+    assert error is None
+    python, _ = LexPars.transpile_python(node)
+    assert 'keep_hoisted(' in python and 'compile_inline_number' not in python
@@ -0,0 +1,27 @@
+import pytest
+import LexPars
+from conftest import ENGINES, outcome, unoptimized, programs
+
+# IFs whose conditions are all constant, so the optimizer prunes every case it can
+CONSTANT_IFS = {
+    'never taken': 'VAR x = IF 0 THEN 1\nPRINT(x)',
+    'never taken with an ELSE': 'VAR x = IF 0 THEN 1 ELSE 2\nPRINT(x)',
+    'never taken with an ELSE block': 'IF 0 THEN\n    PRINT(1)\nELSE\n    PRINT(2)\nEND',
+    'always taken block': 'IF 0 THEN\n    PRINT(1)\nELIF "yes" THEN\n    PRINT(2)\nELSE\n    PRINT(3)\nEND',
+    'always taken block as a value': 'VAR x = IF 1 THEN\n    PRINT(1)\nEND\nPRINT(x)',
+}
+
+@programs(CONSTANT_IFS)
+def test_pruned_if_keeps_a_case(source):
+    node, error = LexPars.parse_source('<test>', source, optimize=True)
+    assert error is None
+    pending = [node]
+    while pending:
+        child = pending.pop()
+        if type(child) is LexPars.IfNode: assert child.cases
+        pending.extend(LexPars.ast_children(child))
+
+@pytest.mark.parametrize('engine', ENGINES)
+@programs(CONSTANT_IFS)
+def test_pruned_if_gives_what_the_if_gives(capsys, engine, source):
+    assert outcome(source, capsys, engine) == unoptimized(source, capsys)
@@ -0,0 +1,49 @@
+import pytest
+import LexPars
+from conftest import ENGINES, outcome, programs
+
+# (expression, the tree the recursive descent grammar built for it)
+TREES = {
+    'exponent is right associative': ('2 ^ 3 ^ 2', '(2 EXPONENT (3 EXPONENT 2))'),
+    'unary minus binds looser than exponent': ('-2 ^ 2', '(MINUS (2 EXPONENT 2))'),
+    'unary minus in an exponent': ('2 ^ -1 ^ 2', '(2 EXPONENT (MINUS (1 EXPONENT 2)))'),
+    'unary minus binds tighter than product': ('- - 2 * 3', '((MINUS (MINUS 2)) MUL 3)'),
+    'minus is left associative': ('a - b - c', '((a MINUS b) MINUS c)'),
+    'product binds tighter than sum': ('1 + 2 * 3 - 4 / 5', '((1 PLUS (2 MUL 3)) MINUS (4 DIV 5))'),
+    'not binds looser than comparison': ('NOT a == b AND c', '((NOT (a EQ b)) AND c)'),
+    'comparisons are left associative': ('a < b == c OR d', '(((a LESSTHAN b) EQ c) OR d)'),
+    'and and or share a power': ('NOT NOT a OR b AND c', '(((NOT (NOT a)) OR b) AND c)'),
+    'parentheses': ('(1 + 2) * 3', '((1 PLUS 2) MUL 3)'),
+}
+
+# (program, what it prints), where another reading of the expression would print something else
+VALUES = {
+    'exponent is right associative': ('PRINT(2 ^ 3 ^ 2)', '512'),
+    'unary minus binds looser than exponent': ('PRINT(-2 ^ 2)', '-4'),
+    'minus is left associative': ('VAR a = 10\nVAR b = 4\nVAR c = 3\nPRINT(a - b - c)', '3'),
+    'not binds looser than comparison': ('VAR a = 1\nVAR b = 2\nVAR c = 0\nPRINT(NOT a == b AND c)', '0'),
+}
+
+def shape(node):
+    # The tree as nested parentheses, operators by token type or keyword
+    if isinstance(node, (LexPars.BinOpNode, LexPars.UnaryOpNode)):
+        op = node.op_tok.value if node.op_tok.type == LexPars.TT_KEYWORD else node.op_tok.type
+        if isinstance(node, LexPars.UnaryOpNode):
+            return f'({op} {shape(node.node)})'
+        return f'({shape(node.left_node)} {op} {shape(node.right_node)})'
+    if isinstance(node, LexPars.NumberNode):
+        return str(node.tok.value)
+    if isinstance(node, LexPars.VarAccessNode):
+        return node.var_name_tok.value
+    return type(node).__name__
+
+
+@programs(TREES, 'source, tree')
+def test_precedence_and_associativity(source, tree):
+    node, error = LexPars.parse_source('<test>', source, optimize=False)
+    assert error is None and shape(node.element_nodes[0]) == tree
+
+@pytest.mark.parametrize('engine', ENGINES)
+@programs(VALUES, 'source, printed')
+def test_precedence_on_every_engine(capsys, engine, source, printed):
+    assert outcome(source, capsys, engine) == (printed + '\n', None)
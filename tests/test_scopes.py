@@ -0,0 +1,47 @@
+import pytest
+import LexPars
+from SymbolTable import SymbolTable, FrameSymbolTable
+from conftest import ENGINES
+
+
+def printed(source, capsys, engine):
+    _, error = LexPars.run('<test>', source, engine=engine)
+    assert error is None, error.as_string()
+    return capsys.readouterr().out.split()
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_global_rebound_in_a_top_level_loop_is_seen_by_a_function(capsys, engine):
+    source = 'VAR g = 0\nFUN f() -> g * 10\nFOR i = 1 TO 4 THEN\n    VAR g = i\n    PRINT(f())\nEND'
+    assert printed(source, capsys, engine) == ['10', '20', '30']
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_a_parameter_name_shadows_a_global_only_below_its_call(capsys, engine):
+    source = ('VAR n = 5\nFUN show() -> n\nFUN takes(n) -> show()\n'
+        'PRINT(takes(1))\nPRINT(show())\nPRINT(takes(2))\nPRINT(show())')
+    assert printed(source, capsys, engine) == ['1', '5', '2', '5']
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_run_script_rebinding_a_global_mid_call(capsys, engine, tmp_path):
+    script = tmp_path / 'rebind.ec'
+    script.write_text('VAR g = 7')
+    source = f'VAR g = 1\nFUN f()\n    PRINT(g)\n    RUN("{script}")\n    PRINT(g)\nEND\nf()'
+    assert printed(source, capsys, engine) == ['1', '7']
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_recursion_reads_globals_and_caller_variables(capsys, engine):
+    source = ('VAR step = 1\nFUN outer()\n    VAR base = 100\n'
+        '    FUN down(n) -> IF n == 0 THEN base ELSE down(n - step) + step\n'
+        '    PRINT(down(40))\nEND\nouter()')
+    assert printed(source, capsys, engine) == ['140']
+
+def test_tables_share_bound_until_a_call_binds_a_new_name():
+    root = SymbolTable()
+    root.set('g', 1)
+    caller = FrameSymbolTable(root, {'n': 0})
+    caller.set('n', 2)
+    callee = FrameSymbolTable(caller, {'n': 0})
+    assert root.bound == frozenset() and caller.bound == frozenset()
+    assert callee.bound == {'n'}
+    assert FrameSymbolTable(callee, {'n': 0}).bound is callee.bound
+    assert callee.get('g') == 1 and callee.get('n') == 2
@@ -0,0 +1,42 @@
+import LexPars
+import SourceFile
+
+
+def test_one_off_lines_are_released_by_the_next_run(capsys):
+    LexPars.run('<stdin>', 'PRINT(0)')
+    registered = len(SourceFile.sources)
+    for i in range(1, 50):
+        _, error = LexPars.run('<stdin>', f'PRINT({i} * 2)')
+        assert error is None
+    assert len(SourceFile.sources) == registered
+
+def test_error_of_the_last_run_renders_with_its_line():
+    _, error = LexPars.run('<stdin>', 'VAR x = 1 / 0')
+    assert 'VAR x = 1 / 0' in error.as_string()
+
+def test_a_line_defining_a_function_is_kept(capsys):
+    LexPars.run('<stdin>', 'FUN broken(n) -> n / 0')
+    for i in range(3): LexPars.run('<stdin>', f'PRINT({i})')
+    _, error = LexPars.run('<stdin>', 'broken(5)')
+    assert 'FUN broken(n) -> n / 0' in error.as_string()
+
+def test_positions_in_a_released_source_render_without_it():
+    source = SourceFile.add_source('<released>', 'VAR y = 2')
+    SourceFile.release_source(source)
+    error = LexPars.InvalidSyntaxError(source.base + 4, source.base + 5, 'gone')
+    assert 'File <released source>, line 1' in error.as_string()
+    assert SourceFile.find_source(source.base) is not source
+
+def test_releasing_a_replaced_mapping_closes_it(tmp_path):
+    script = tmp_path / 'script.ec'
+    script.write_text('PRINT(1)')
+    first = SourceFile.map_file(str(script))
+    source = SourceFile.add_source(str(script), first)
+    script.write_text('PRINT(22)')
+    current = SourceFile.map_file(str(script))
+    assert not first.closed
+
+    SourceFile.release_source(source)
+    assert first.closed
+    SourceFile.release_source(SourceFile.add_source(str(script), current))
+    assert not current.closed
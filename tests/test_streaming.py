@@ -0,0 +1,88 @@
+import pytest
+import LexPars
+import SourceFile
+from conftest import ENGINES
+
+PROGRAM = 'VAR n = 3\nFUN f(x) -> x * n\n\nFOR i = 0 TO 3 THEN\n    PRINT(f(i))\nEND\nPRINT("done")'
+
+BROKEN = {
+    'syntax': 'PRINT(1)\nVAR = 3\nPRINT(4)',
+    'lexer': 'PRINT(1)\nPRINT(2) $',
+    'lexer after syntax': 'PRINT(1)\nVAR = 3 $',
+    'no newline': 'PRINT(1) PRINT(2)',
+    'empty': '',
+}
+
+def message(error):
+    return error.as_string() if error else None
+
+
+@pytest.mark.parametrize('lexer_engine', list(LexPars.LEXERS))
+@pytest.mark.parametrize('name', list(BROKEN))
+def test_streamed_parse_reports_the_error_a_full_parse_does(name, lexer_engine):
+    source = BROKEN[name]
+    _, streamed = LexPars.parse_source('<test>', source, lexer_engine, stream=True)
+    _, listed = LexPars.parse_source('<test>', source, lexer_engine, stream=False)
+    assert streamed is not None and message(streamed) == message(listed)
+
+def test_streamed_parse_uses_the_lexer_asked_for(monkeypatch):
+    made = []
+    monkeypatch.setitem(LexPars.LEXERS, 'classic', lambda fn, text: made.append(fn) or LexPars.Lexer(fn, text))
+    node, error = LexPars.parse_source('<classic>', PROGRAM, 'classic', stream=True)
+    assert error is None and made == ['<classic>']
+
+def test_mapped_scripts_need_the_regex_lexer():
+    with pytest.raises(ValueError):
+        LexPars.parse_source('<test>', PROGRAM.encode(), 'classic', stream=True)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_run_stream_does_what_run_does(capsys, engine):
+    LexPars.run('<test>', PROGRAM, engine=engine)
+    ran = capsys.readouterr().out
+    _, error = LexPars.run_stream('<test>', PROGRAM, engine=engine)
+    assert error is None and capsys.readouterr().out == ran
+
+@pytest.mark.parametrize('name', list(BROKEN))
+def test_run_stream_runs_up_to_the_error(capsys, name):
+    source = BROKEN[name]
+    _, expected = LexPars.run('<test>', source)
+    assert capsys.readouterr().out == ''
+    _, error = LexPars.run_stream('<test>', source)
+    assert message(error) == message(expected)
+    assert capsys.readouterr().out == ('1\n' if source else '')
+
+def test_run_stream_stops_at_a_top_level_return(capsys):
+    value, error = LexPars.run_stream('<test>', 'PRINT(1)\nIF 1 THEN RETURN\nPRINT(2)')
+    assert (value, error) == (None, None) and capsys.readouterr().out == '1\n'
+
+def test_changed_script_is_mapped_again_and_the_old_map_closed(tmp_path):
+    script = tmp_path / 'script.ec'
+    script.write_text('PRINT(1)')
+    first = SourceFile.map_file(str(script))
+    assert SourceFile.map_file(str(script)) is first
+
+    script.write_text('PRINT(22)')
+    second = SourceFile.map_file(str(script))
+    assert second is not first and first.closed and bytes(second) == b'PRINT(22)'
+
+def test_a_map_a_source_still_reads_stays_open(tmp_path):
+    script = tmp_path / 'script.ec'
+    script.write_text('PRINT(1)')
+    first = SourceFile.map_file(str(script))
+    LexPars.parse_source(str(script), first)
+    script.write_text('PRINT(22)')
+    SourceFile.map_file(str(script))
+    assert not first.closed
+
+@pytest.mark.parametrize('name', list(BROKEN))
+def test_token_buffer_parse_reports_the_error_a_list_parse_does(name):
+    source = BROKEN[name]
+    _, buffered = LexPars.parse_source('<test>', source, stream=False, token_store='buffer')
+    _, listed = LexPars.parse_source('<test>', source, stream=False, token_store='list')
+    assert message(buffered) == message(listed)
+
+def test_token_buffer_runs_what_a_token_list_runs(capsys):
+    LexPars.run('<test>', PROGRAM, stream=False, token_store='list')
+    ran = capsys.readouterr().out
+    _, error = LexPars.run('<test>', PROGRAM, stream=False, token_store='buffer')
+    assert error is None and capsys.readouterr().out == ran
@@ -0,0 +1,56 @@
+import pytest
+import LexPars
+import Rope
+from conftest import ENGINES, programs
+
+# (source, what the last statement's String holds, its text). Strings shorter than Rope.MIN_LENGTH stay strs
+STRINGS = {
+    'short concat': ('"ab" + "cd"', str, 'abcd'),
+    'concat one under the threshold': ('VAR a = "x" * 128\nVAR b = "y" * 127\na + b', str, 'x' * 128 + 'y' * 127),
+    'concat at the threshold': ('VAR a = "x" * 128\na + a', Rope.Concat, 'x' * 256),
+    'repeat under the threshold': ('VAR a = "ab"\na * 127', str, 'ab' * 127),
+    'repeat at the threshold': ('VAR a = "ab"\na * 128', Rope.Repeat, 'ab' * 128),
+    'concat onto a repeat': ('VAR a = "x" * 300\na + "y"', Rope.Concat, 'x' * 300 + 'y'),
+    'repeat of a rope': ('VAR a = "x" * 200 + "y" * 100\na * 3', Rope.Repeat, ('x' * 200 + 'y' * 100) * 3),
+    'built in a loop': ('VAR s = ""\nFOR i = 0 TO 100 THEN VAR s = s + "abc"\ns', Rope.Concat, 'abc' * 100),
+    'times zero': ('"s" * 0', str, ''),
+    'times minus one': ('"s" * -1', str, ''),
+}
+
+def last_string(source, engine):
+    value, error = LexPars.run('<test>', source, engine=engine)
+    assert error is None, error.as_string()
+    return value.elements[-1]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@programs(STRINGS, 'source, contents_type, text')
+def test_strings_hold_a_rope_only_when_long(engine, source, contents_type, text):
+    string = last_string(source, engine)
+    assert type(string.contents) is contents_type and Rope.length(string.contents) == len(text)
+    # Reading the text flattens the rope once
+    assert string.value == text and type(string.contents) is str
+
+@pytest.mark.parametrize('engine', ENGINES)
+@programs(STRINGS, 'source, contents_type, text')
+def test_printed_strings(capsys, engine, source, contents_type, text):
+    lines = source.split('\n')
+    _, error = LexPars.run('<test>', '\n'.join(lines[:-1] + [f'PRINT({lines[-1]})']), engine=engine)
+    assert error is None and capsys.readouterr().out == text + '\n'
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_truth_of_ropes(capsys, engine):
+    source = ('VAR long = "x" * 300 + "y"\nVAR none = "x" * 0\n'
+        'PRINT(IF long THEN 1 ELSE 0)\nPRINT(IF long * 2 THEN 1 ELSE 0)\nPRINT(IF none THEN 1 ELSE 0)\nPRINT(IF "s" * -1 THEN 1 ELSE 0)')
+    _, error = LexPars.run('<test>', source, engine=engine)
+    assert error is None and capsys.readouterr().out == '1\n1\n0\n0\n'
+
+def test_concat_with_an_empty_side_gives_the_other():
+    long = Rope.repeat('ab', 200)
+    assert Rope.concat(long, '') is long and Rope.concat('', long) is long
+
+def test_flatten_a_deep_chain():
+    contents = ''
+    for _ in range(100_000):
+        contents = Rope.concat(contents, 'abc' * 90)
+    assert Rope.flatten(contents) == 'abc' * 90 * 100_000